@@ -12,6 +12,7 @@ from .frame_extractor import ViralFrameExtractor, FrameData
 from .audio_analyzer import AudioExtractor, AudioExtraction, TranscriptSegment
 from .ad_analyzer import AdAnalyzer
 from .video_compressor import VideoCompressor
+from .video_info import VideoInfo, probe_video
 
 __all__ = [
     'ViralFrameExtractor',
@@ -20,5 +21,7 @@ __all__ = [
     'AudioExtraction',
     'TranscriptSegment',
     'AdAnalyzer',
-    'VideoCompressor'
+    'VideoCompressor',
+    'VideoInfo',
+    'probe_video'
 ]
\ No newline at end of file
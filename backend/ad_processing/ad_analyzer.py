@@ -14,7 +14,8 @@ import logging
 import tempfile
 import time
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from PIL import Image
 
@@ -31,6 +32,10 @@ logger = logging.getLogger(__name__)
 # Import classes from other modules instead of redefining
 from .frame_extractor import FrameData
 from .audio_analyzer import AudioExtraction, TranscriptSegment
+from .frame_encoder import get_frame_encoder
+from .token_budget import FramePlan, plan_frame_details
+from .stream_parser import ChunkStreamParser
+from .openai_clients import get_async_openai_client
 
 
 class AdAnalyzer:
@@ -40,19 +45,26 @@ class AdAnalyzer:
     """
     
     def __init__(self, openai_api_key: str = None, config_path: str = None):
-        import openai
-        
         # Use settings for API key with fallback
         self.openai_api_key = openai_api_key or settings.OPENAI_API_KEY
         if not self.openai_api_key:
             raise ValueError("OpenAI API key required. Set OPENAI_API_KEY env var or pass openai_api_key parameter.")
         
-        self.openai_client = openai.AsyncOpenAI(
-            api_key=self.openai_api_key,
-            timeout=1200.0  # 20 minute timeout for comprehensive analysis
-        )
+        # Process-wide pooled client (20 minute timeout for comprehensive analysis)
+        self.openai_client = get_async_openai_client(self.openai_api_key)
         self.model = settings.OPENAI_MODEL
         
+        # Pillow releases the GIL while resizing and encoding, so frames encode in parallel threads
+        self.encode_pool = ThreadPoolExecutor(max_workers=settings.FRAME_ENCODE_WORKERS, thread_name_prefix='frame-encode')
+        
+        # Vision token budgeting: detail level per frame type, encode profile per detail level
+        self.image_token_budget = settings.IMAGE_TOKEN_BUDGET
+        self.frame_details = settings.FRAME_DETAIL_BY_TYPE
+        self.detail_profiles = settings.DETAIL_ENCODE_PROFILES
+        
+        # Batched multi-pass analysis is opt-in; by default every video is one structured-output call
+        self.max_frames_per_batch = settings.MAX_FRAMES_PER_BATCH if settings.MULTI_PASS_ENABLED else None
+        
         # Load prompts from config file
         self.config = self._load_config(config_path)
     
@@ -78,11 +90,19 @@ class AdAnalyzer:
         audio_extraction: AudioExtraction, 
         original_url: str,
         content_description: Optional[str] = None,
-        max_frames_per_batch: int = None
+        max_frames_per_batch: int = None,
+        image_token_budget: int = None
     ) -> Dict:
         """
         Analyze advertisement using single API call approach (like viral analyzer).
         Sends ALL frames to OpenAI in one request for better reliability.
+        
+        image_token_budget caps the estimated image tokens for the request by
+        lowering frame detail (uses config default if None, 0 = no limit).
+        
+        max_frames_per_batch switches to batched multi-pass analysis when there
+        are more frames than fit in one batch (uses MAX_FRAMES_PER_BATCH if None
+        and api.multi_pass_enabled is set, 0 = always a single call).
         """
         print(f"🤖 Analyzing advertisement with {len(frames)} frames and {len(audio_extraction.transcript_segments)} audio segments...")
         
@@ -94,38 +114,199 @@ class AdAnalyzer:
         scene_interval_count = sum(1 for f in frames if f.frame_type == 'scene_interval')
         
         print(f"📹 Found {len(all_frames)} total frames ({jump_cut_count} jump cuts, {scene_interval_count} scene intervals)")
+        
+        if max_frames_per_batch is None:
+            max_frames_per_batch = self.max_frames_per_batch
+        if max_frames_per_batch and len(all_frames) > max_frames_per_batch:
+            return await self._analyze_multi_pass(
+                all_frames, audio_extraction, original_url, content_description, max_frames_per_batch,
+                image_token_budget=image_token_budget
+            )
+        
         print(f"✅ Single API call with ALL {len(all_frames)} frames")
         
-        return await self._analyze_single_call_all_frames(all_frames, audio_extraction, original_url, content_description)
+        return await self._analyze_single_call_all_frames(all_frames, audio_extraction, original_url, content_description, image_token_budget)
     
     async def _analyze_single_call_all_frames(
         self, 
         frames: List[FrameData], 
         audio_extraction: AudioExtraction, 
         original_url: str,
-        content_description: Optional[str] = None
+        content_description: Optional[str] = None,
+        image_token_budget: Optional[int] = None
     ) -> Dict:
         """
         Single API call with ALL frames (viral analyzer approach).
         Uses system + user message structure with better frame preprocessing.
         """
+        request, token_plan = await self._prepare_single_call(
+            frames, audio_extraction, original_url, content_description, image_token_budget
+        )
         
+        # Make single API call with all frames
+        try:
+            start_time = time.time()
+            print(f"🚀 ANALYZER: Starting OpenAI API call NOW ({len(frames)} frames)...", flush=True)
+            
+            # Use structured outputs to force valid JSON response
+            response = await self.openai_client.chat.completions.create(**request)
+            
+            elapsed = time.time() - start_time
+            print(f"✅ ANALYZER: OpenAI API call completed! ({elapsed:.1f}s)", flush=True)
+            
+            response_text = response.choices[0].message.content.strip()
+            return self._finish_single_call(response_text, getattr(response, 'usage', None), original_url, audio_extraction, token_plan)
+            
+        except Exception as e:
+            print(f"❌ Single call analysis failed: {e}")
+            raise Exception(f"Video analysis failed: {str(e)}")
+    
+    async def analyze_advertisement_stream(
+        self,
+        frames: List[FrameData],
+        audio_extraction: AudioExtraction,
+        original_url: str,
+        content_description: Optional[str] = None,
+        image_token_budget: int = None,
+        max_frames_per_batch: int = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Streaming variant of analyze_advertisement.
+        
+        Yields {'type': 'chunk', 'chunk': {...}} for each element of the
+        response's chunks array as soon as the model finishes writing it, then
+        {'type': 'result', 'analysis': {...}} with the complete analysis (same
+        shape as analyze_advertisement returns).
+        
+        When max_frames_per_batch (as in analyze_advertisement) splits the frames
+        into batches, the batched multi-pass analysis runs instead and each batch's
+        chunks are yielded as that batch finishes. Batches number their own chunks,
+        so chunk IDs are only final in the result.
+        """
+        all_frames = sorted(frames, key=lambda f: f.timestamp)
+        
+        if max_frames_per_batch is None:
+            max_frames_per_batch = self.max_frames_per_batch
+        if max_frames_per_batch and len(all_frames) > max_frames_per_batch:
+            batch_chunks = asyncio.Queue()
+            
+            def on_batch_result(batch_result: Dict):
+                # Copy now: reducing the batches renumbers the chunks in place
+                batch_chunks.put_nowait([dict(chunk) for chunk in batch_result.get('chunks', []) if isinstance(chunk, dict)])
+            
+            async def run_batches() -> Dict:
+                try:
+                    return await self._analyze_multi_pass(
+                        all_frames, audio_extraction, original_url, content_description, max_frames_per_batch,
+                        image_token_budget=image_token_budget,
+                        on_batch_result=on_batch_result
+                    )
+                finally:
+                    batch_chunks.put_nowait(None)
+            
+            task = asyncio.create_task(run_batches())
+            try:
+                while True:
+                    chunks = await batch_chunks.get()
+                    if chunks is None:
+                        break
+                    for chunk in chunks:
+                        yield {'type': 'chunk', 'chunk': chunk}
+                analysis = await task
+            finally:
+                # Stop the remaining batches if the consumer goes away
+                task.cancel()
+            yield {'type': 'result', 'analysis': analysis}
+            return
+        
+        print(f"🤖 Streaming advertisement analysis with {len(all_frames)} frames and {len(audio_extraction.transcript_segments)} audio segments...")
+        
+        request, token_plan = await self._prepare_single_call(
+            all_frames, audio_extraction, original_url, content_description, image_token_budget
+        )
+        
+        try:
+            start_time = time.time()
+            first_chunk_time = None
+            print(f"🚀 ANALYZER: Starting streaming OpenAI API call NOW ({len(all_frames)} frames)...", flush=True)
+            
+            stream = await self.openai_client.chat.completions.create(
+                **request,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            
+            parser = ChunkStreamParser('chunks')
+            usage = None
+            async for event in stream:
+                # The final event carries usage and no choices
+                if getattr(event, 'usage', None) is not None:
+                    usage = event.usage
+                if not event.choices:
+                    continue
+                delta = event.choices[0].delta.content
+                if not delta:
+                    continue
+                for chunk in parser.feed(delta):
+                    if first_chunk_time is None:
+                        first_chunk_time = time.time() - start_time
+                        print(f"⚡ ANALYZER: First chunk after {first_chunk_time:.1f}s", flush=True)
+                    yield {'type': 'chunk', 'chunk': chunk}
+            
+            elapsed = time.time() - start_time
+            print(f"✅ ANALYZER: OpenAI stream completed! ({elapsed:.1f}s, {parser.emitted} chunks streamed)", flush=True)
+            
+            analysis_json = self._finish_single_call(parser.text.strip(), usage, original_url, audio_extraction, token_plan)
+            
+        except Exception as e:
+            print(f"❌ Streaming analysis failed: {e}")
+            raise Exception(f"Video analysis failed: {str(e)}")
+        
+        yield {'type': 'result', 'analysis': analysis_json}
+    
+    async def _prepare_single_call(
+        self,
+        frames: List[FrameData],
+        audio_extraction: AudioExtraction,
+        original_url: str,
+        content_description: Optional[str] = None,
+        image_token_budget: Optional[int] = None,
+        batch: Optional[Dict] = None
+    ) -> Tuple[Dict, Dict]:
+        """
+        Plan frame detail, encode frames and build the chat completion request.
+        
+        batch (number, total, previous_context, entities) marks the request as one
+        batch of a multi-pass analysis; see _build_single_call_content.
+        
+        Returns:
+            tuple: (keyword arguments for chat.completions.create, token plan for _finish_single_call)
+        """
         print(f"🔧 ANALYZER: Building content for {len(frames)} frames...", flush=True)
         
+        # Pick detail level and resolution per frame to fit the image token budget
+        if image_token_budget is None:
+            image_token_budget = self.image_token_budget
+        frame_plans, expected_image_tokens = plan_frame_details(
+            frames, image_token_budget, self.frame_details, self.detail_profiles, get_frame_encoder().profiles
+        )
+        high_detail_count = sum(1 for plan in frame_plans if plan.detail == 'high')
+        print(f"🧮 ANALYZER: {high_detail_count} high / {len(frames) - high_detail_count} low detail frames, ~{expected_image_tokens} image tokens (budget: {image_token_budget or 'unlimited'})", flush=True)
+        
         # Create temporary directory for frame validation
-        import tempfile
-        import os
         temp_dir = tempfile.mkdtemp(prefix="frames_validation_")
         print(f"🔧 ANALYZER: Created temp directory for frame validation: {temp_dir}", flush=True)
         
         try:
             # Build content array with all frames
-            content = self._build_single_call_content(
+            content = await self._build_single_call_content(
                 frames=frames,
                 audio_extraction=audio_extraction,
                 original_url=original_url,
                 content_description=content_description,
-                temp_dir=temp_dir
+                temp_dir=temp_dir,
+                frame_plans=frame_plans,
+                batch=batch
             )
         finally:
             # Cleanup temp directory
@@ -138,122 +319,194 @@ class AdAnalyzer:
         
         print(f"🔧 ANALYZER: Content built successfully. Making OpenAI API call...", flush=True)
         
-        # Make single API call with all frames
-        try:
-            import time
-            start_time = time.time()
-            print(f"🚀 ANALYZER: Starting OpenAI API call NOW ({len(frames)} frames)...", flush=True)
-            
-            # Use structured outputs to force valid JSON response
-            response = await self.openai_client.chat.completions.create(
-                model=self.model,  # Use configured model (gpt-5-mini)
-                temperature=1,     # gpt-5-mini requires temperature=1
-                messages=[
-                    {
-                        "role": "system",
-                        "content": self.config['video_analysis']['system_prompt']
-                    },
-                    {
-                        "role": "user",
-                        "content": content
-                    }
-                ],
-                response_format={
-                    "type": "json_schema",
-                    "json_schema": {
-                        "name": "video_analysis",
-                        "strict": False,
-                        "schema": {
-                            "type": "object",
-                            "properties": {
-                                "id": {"type": "string"},
-                                "url": {"type": "string"},
-                                "summary": {"type": "string"},
-                                "visualStyle": {"type": "string"},
-                                "audioStyle": {"type": "string"},
-                                "duration": {"type": "number"},
-                                "entities": {
-                                    "type": "object"
-                                },
-                                "chunks": {
-                                    "type": "array",
-                                    "items": {
+        expected_text_tokens = self._estimate_text_tokens(content) + self._estimate_text_tokens(self.config['video_analysis']['system_prompt'])
+        token_plan = {
+            'image_token_budget': image_token_budget,
+            'expected_image_tokens': expected_image_tokens,
+            'expected_prompt_tokens': expected_image_tokens + expected_text_tokens,
+            'high_detail_frames': high_detail_count,
+            'low_detail_frames': len(frames) - high_detail_count
+        }
+        
+        request = {
+            'model': self.model,  # Use configured model (gpt-5-mini)
+            'temperature': 1,     # gpt-5-mini requires temperature=1
+            'messages': [
+                {
+                    "role": "system",
+                    "content": self.config['video_analysis']['system_prompt']
+                },
+                {
+                    "role": "user",
+                    "content": content
+                }
+            ],
+            'response_format': self._analysis_response_format(batch is not None)
+        }
+        return request, token_plan
+    
+    def _analysis_response_format(self, batch: bool = False) -> Dict:
+        """
+        Structured output schema for an analysis request. Batch requests also
+        return a context summary for the batches that follow.
+        """
+        response_format = {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "video_analysis",
+                "strict": False,
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "id": {"type": "string"},
+                        "url": {"type": "string"},
+                        "summary": {"type": "string"},
+                        "visualStyle": {"type": "string"},
+                        "audioStyle": {"type": "string"},
+                        "duration": {"type": "number"},
+                        "entities": {
+                            "type": "object"
+                        },
+                        "chunks": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "id": {"type": "string"},
+                                    "startTime": {"type": "number"},
+                                    "endTime": {"type": "number"},
+                                    "visual": {
                                         "type": "object",
                                         "properties": {
-                                            "id": {"type": "string"},
-                                            "startTime": {"type": "number"},
-                                            "endTime": {"type": "number"},
-                                            "visual": {
-                                                "type": "object",
-                                                "properties": {
-                                                    "subjects": {
-                                                        "type": "array",
-                                                        "items": {"type": "string"}
-                                                    },
-                                                    "location": {"type": "string"},
-                                                    "description": {"type": "string"},
-                                                    "cameraAngle": {"type": "string"},
-                                                    "movement": {"type": "string"},
-                                                    "textOverlay": {"type": "string"}
-                                                },
-                                                "required": ["subjects", "location", "description", "cameraAngle", "movement", "textOverlay"],
-                                                "additionalProperties": False
+                                            "subjects": {
+                                                "type": "array",
+                                                "items": {"type": "string"}
                                             },
-                                            "audio": {
-                                                "type": "object",
-                                                "properties": {
-                                                    "speaker": {"type": "string"},
-                                                    "transcript": {"type": "string"},
-                                                    "tone": {"type": "string"}
-                                                },
-                                                "required": ["transcript", "tone"],
-                                                "additionalProperties": False
-                                            }
+                                            "location": {"type": "string"},
+                                            "description": {"type": "string"},
+                                            "cameraAngle": {"type": "string"},
+                                            "movement": {"type": "string"},
+                                            "textOverlay": {"type": "string"}
                                         },
-                                        "required": ["id", "startTime", "endTime", "visual", "audio"],
+                                        "required": ["subjects", "location", "description", "cameraAngle", "movement", "textOverlay"],
+                                        "additionalProperties": False
+                                    },
+                                    "audio": {
+                                        "type": "object",
+                                        "properties": {
+                                            "speaker": {"type": "string"},
+                                            "transcript": {"type": "string"},
+                                            "tone": {"type": "string"}
+                                        },
+                                        "required": ["transcript", "tone"],
                                         "additionalProperties": False
                                     }
-                                }
-                            },
-                            "required": ["id", "url", "summary", "visualStyle", "audioStyle", "duration", "entities", "chunks"],
-                            "additionalProperties": False
+                                },
+                                "required": ["id", "startTime", "endTime", "visual", "audio"],
+                                "additionalProperties": False
+                            }
                         }
-                    }
+                    },
+                    "required": ["id", "url", "summary", "visualStyle", "audioStyle", "duration", "entities", "chunks"],
+                    "additionalProperties": False
                 }
-            )
-            
-            elapsed = time.time() - start_time
-            print(f"✅ ANALYZER: OpenAI API call completed! ({elapsed:.1f}s)", flush=True)
-            
-            response_text = response.choices[0].message.content.strip()
-            
-            # Debug: Show first 500 chars of response
-            print(f"📝 OpenAI Response Preview: {response_text[:500]}...")
-            
-            # With structured outputs, JSON is guaranteed to be valid
-            analysis_json = json.loads(response_text)
-            
-            # Set URL and validate structure
-            analysis_json['url'] = original_url
-            if not analysis_json.get('duration') or analysis_json['duration'] <= 0:
-                analysis_json['duration'] = audio_extraction.duration
-            
-            print(f"✅ Single call analysis complete: {len(analysis_json.get('chunks', []))} chunks")
-            return analysis_json
-            
-        except Exception as e:
-            print(f"❌ Single call analysis failed: {e}")
-            raise Exception(f"Video analysis failed: {str(e)}")
+            }
+        }
+        if batch:
+            schema = response_format['json_schema']['schema']
+            schema['properties']['context'] = {"type": "string"}
+            schema['required'].append('context')
+        return response_format
+    
+    def _finish_single_call(self, response_text: str, usage, original_url: str, audio_extraction: AudioExtraction, token_plan: Dict) -> Dict:
+        """Parse the structured output and attach url, duration and token usage."""
+        # Debug: Show first 500 chars of response
+        print(f"📝 OpenAI Response Preview: {response_text[:500]}...")
+        
+        # With structured outputs, JSON is guaranteed to be valid
+        analysis_json = json.loads(response_text)
+        
+        # Set URL and validate structure
+        analysis_json['url'] = original_url
+        if not analysis_json.get('duration') or analysis_json['duration'] <= 0:
+            analysis_json['duration'] = audio_extraction.duration
+        
+        # Compare the planned token cost with what the API reports
+        analysis_json['token_usage'] = {
+            'image_token_budget': token_plan['image_token_budget'],
+            'expected_image_tokens': token_plan['expected_image_tokens'],
+            'expected_prompt_tokens': token_plan['expected_prompt_tokens'],
+            'actual_prompt_tokens': getattr(usage, 'prompt_tokens', None),
+            'actual_completion_tokens': getattr(usage, 'completion_tokens', None),
+            'high_detail_frames': token_plan['high_detail_frames'],
+            'low_detail_frames': token_plan['low_detail_frames']
+        }
+        print(f"🧮 ANALYZER: Prompt tokens expected ~{analysis_json['token_usage']['expected_prompt_tokens']}, actual {analysis_json['token_usage']['actual_prompt_tokens']}", flush=True)
+        
+        print(f"✅ Single call analysis complete: {len(analysis_json.get('chunks', []))} chunks")
+        return analysis_json
+    
+    @staticmethod
+    def _estimate_text_tokens(content) -> int:
+        """Rough token count (~4 characters per token) of a prompt string or the text parts of a content array."""
+        if isinstance(content, str):
+            return len(content) // 4
+        return sum(len(part.get('text', '')) for part in content if part.get('type') == 'text') // 4
+    
+    async def _encode_frames(self, frames: List[FrameData], temp_dir: Optional[str] = None, profiles: Optional[List[str]] = None) -> List[str]:
+        """Encode frames on the encode pool concurrently, returning base64 data URLs in frame order."""
+        if profiles is None:
+            profiles = ['api'] * len(frames)
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(*[
+            loop.run_in_executor(self.encode_pool, self._prepare_frame_for_api_viral_style, frame, temp_dir, profile)
+            for frame, profile in zip(frames, profiles)
+        ], return_exceptions=True)
+        
+        for i, (frame, result) in enumerate(zip(frames, results)):
+            if isinstance(result, Exception):
+                error_msg = f"❌ Failed to encode frame {i+1} at {frame.timestamp:.2f}s: {result}"
+                print(error_msg)
+                logger.error(error_msg)
+                raise Exception(f"Frame encoding failed: {error_msg}")
+        
+        # Report payload size so the encode profile can be tuned against the API
+        if results:
+            encoded_sizes = [self._data_url_size(url) for url in results]
+            total_kb = sum(encoded_sizes) / 1024
+            print(f"📦 Encoded {len(results)} frames: {total_kb / len(results):.1f} KB/frame avg ({total_kb:.1f} KB total)", flush=True)
+        
+        return results
+    
+    @staticmethod
+    def _data_url_size(data_url: str) -> int:
+        """Decoded byte size of a base64 data URL's payload."""
+        payload = data_url.split(',', 1)[1]
+        return len(payload) * 3 // 4 - payload[-2:].count('=')
     
-    def _build_single_call_content(
+    async def _build_single_call_content(
         self, 
         frames: List[FrameData], 
         audio_extraction: AudioExtraction, 
         original_url: str,
         content_description: Optional[str] = None,
-        temp_dir: Optional[str] = None
+        temp_dir: Optional[str] = None,
+        frame_plans: Optional[List[FramePlan]] = None,
+        batch: Optional[Dict] = None
     ) -> List[Dict]:
-        """Build content array for single API call with all frames (viral analyzer style)"""
+        """
+        Build content array for single API call with all frames (viral analyzer style)
+        
+        For a multi-pass batch the content also names the batch, passes on the
+        previous batches' context and entity registry, and asks for a context
+        summary for the batches that follow.
+        """
+        if frame_plans is None:
+            frame_plans = [FramePlan(detail='auto', profile='api', estimated_tokens=0) for _ in frames]
+        
+        # Encode every frame up front in parallel
+        encoded_frames = await self._encode_frames(frames, temp_dir, [plan.profile for plan in frame_plans])
+        
         content = []
         
         # Add our entity-based prompt 
@@ -274,33 +527,40 @@ class AdAnalyzer:
                 "text": f"- Content description: {content_description}\n"
             })
         
+        if batch:
+            content.append({
+                "type": "text",
+                "text": f"- Batch {batch['number']} of {batch['total']} ({frames[0].timestamp:.2f}s - {frames[-1].timestamp:.2f}s)\n"
+            })
+            if batch.get('previous_context'):
+                content.append({
+                    "type": "text",
+                    "text": f"- Previous video context: {batch['previous_context']}\n"
+                })
+            if batch.get('entities'):
+                content.append({
+                    "type": "text",
+                    "text": f"- Previously identified entities (reference these by ID, don't redefine):\n{json.dumps(batch['entities'], indent=2)}\n"
+                })
+        
         # Add frames section (viral analyzer style)
         content.append({
             "type": "text",
             "text": f"\nVIDEO FRAMES (in chronological order):"
         })
         
-        for i, frame in enumerate(frames):
+        for i, (frame, base64_image, plan) in enumerate(zip(frames, encoded_frames, frame_plans)):
             # Add frame description with timestamp
             content.append({
                 "type": "text",
                 "text": f"\nFrame {i+1} - Timestamp: {frame.timestamp:.2f}s (Duration: {frame.duration:.2f}s, Type: {frame.frame_type})"
             })
             
-            try:
-                # Use better frame preprocessing with disk validation
-                base64_image = self._prepare_frame_for_api_viral_style(frame, temp_dir)
-                print(f"🔍 Frame {i+1} encoded successfully ({len(base64_image)} chars)")
-                
-                content.append({
-                    "type": "image_url",
-                    "image_url": {"url": base64_image}
-                })
-            except Exception as e:
-                error_msg = f"❌ Failed to encode frame {i+1} at {frame.timestamp:.2f}s: {e}"
-                print(error_msg)
-                logger.error(error_msg)
-                raise Exception(f"Frame encoding failed: {error_msg}")
+            print(f"🔍 Frame {i+1} encoded successfully ({len(base64_image)} chars, {plan.detail} detail)")
+            content.append({
+                "type": "image_url",
+                "image_url": {"url": base64_image, "detail": plan.detail}
+            })
         
         # Add full transcript (viral analyzer style)
         content.append({
@@ -320,9 +580,15 @@ class AdAnalyzer:
             "text": f"\n\nAnalyze and return structured JSON with entities and {len(frames)} chunks - one per frame analyzed."
         })
         
+        if batch:
+            content.append({
+                "type": "text",
+                "text": "\nOnly define entities that are not already identified above, and set context to a brief description of what this batch covered for analyzing the rest of the video."
+            })
+        
         return content
     
-    def _prepare_frame_for_api_viral_style(self, frame: FrameData, temp_dir: Optional[str] = None) -> str:
+    def _prepare_frame_for_api_viral_style(self, frame: FrameData, temp_dir: Optional[str] = None, profile: str = 'api') -> str:
         """Convert frame to base64 using simplified viral analyzer approach."""
         try:
             # Check if frame has valid image data first
@@ -332,39 +598,8 @@ class AdAnalyzer:
             if not hasattr(frame.image, 'shape') or len(frame.image.shape) < 2:
                 raise ValueError(f"Invalid frame image shape: {getattr(frame.image, 'shape', 'no shape')}")
             
-            # Simple direct conversion like viral project
-            pil_img = frame.to_pil()
-            if pil_img is None:
-                raise ValueError(f"Failed to convert frame to PIL image")
-            
-            # Always convert to RGB mode for JPEG compatibility
-            if pil_img.mode != 'RGB':
-                pil_img = pil_img.convert('RGB')
-            
-            # Use viral project settings: 512px max, 85% quality (simpler approach)
-            max_size = 512
-            quality = 85
-            
-            # Resize if needed
-            width, height = pil_img.size
-            if max(width, height) > max_size:
-                scale = max_size / max(width, height)
-                new_width = max(1, int(width * scale))
-                new_height = max(1, int(height * scale))
-                pil_img = pil_img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            
-            # Direct in-memory conversion (viral project style)
-            buffer = io.BytesIO()
-            pil_img.save(buffer, format='JPEG', quality=quality, optimize=True)
-            buffer.seek(0)
-            
-            image_data = buffer.read()
-            if len(image_data) == 0:
-                raise ValueError("Generated empty image data")
-            
-            # Convert to base64
-            base64_str = base64.b64encode(image_data).decode('utf-8')
-            return f"data:image/jpeg;base64,{base64_str}"
+            # Shared encode engine (cached across runs of the same video)
+            return frame.to_base64(profile=profile)
             
         except Exception as e:
             logger.error(f"Error converting frame to base64: {e}")
@@ -431,9 +666,21 @@ class AdAnalyzer:
         original_url: str, 
         content_description: Optional[str] = None,
         max_frames_per_batch: int = None,
-        max_passes: int = 3
+        max_passes: int = 3,
+        parallel: bool = None,
+        max_concurrent_batches: int = None,
+        image_token_budget: Optional[int] = None,
+        on_batch_result: Optional[Callable[[Dict], None]] = None
     ) -> Dict:
-        """Multi-pass analysis for videos with many jump cuts"""
+        """
+        Multi-pass analysis for videos with many jump cuts.
+        
+        Batches run one after another, each given the previous batch's context and
+        entities, unless parallel is set (defaults to MULTI_PASS_PARALLEL), in which
+        case _analyze_multi_pass_parallel is used. Each batch is a structured-output
+        request like the single call (image_token_budget applies per batch), and
+        on_batch_result is called with every batch result as it arrives.
+        """
         
         # Use settings default if not specified
         if max_frames_per_batch is None:
@@ -454,58 +701,39 @@ class AdAnalyzer:
         
         print(f"📦 Split into {len(batches)} batches (max {max_passes}): {[len(batch) for batch in batches]} frames each")
         
+        if parallel is None:
+            parallel = settings.MULTI_PASS_PARALLEL
+        if parallel and len(batches) > 1:
+            return await self._analyze_multi_pass_parallel(
+                batches, audio_extraction, original_url, content_description, max_concurrent_batches,
+                image_token_budget=image_token_budget,
+                on_batch_result=on_batch_result
+            )
+        
         all_chunks = []
         previous_context = None
         accumulated_entities = {}
+        batch_results = []
         
         for batch_num, batch_frames in enumerate(batches):
             is_final = (batch_num == len(batches) - 1)
             
-            # Show detailed frame information for this batch
-            frame_times = [f"{frame.timestamp:.2f}s" for frame in batch_frames]
-            print(f"🔄 Processing batch {batch_num + 1}/{len(batches)} ({len(batch_frames)} frames)")
-            print(f"   Frame times: {', '.join(frame_times)}")
-            
-            # Build content for this batch
-            content = self._build_analysis_content(
-                jump_cut_frames=batch_frames,
-                audio_extraction=audio_extraction,
-                original_url=original_url,
-                content_description=content_description,
-                is_final=is_final,
-                previous_context=previous_context,
-                accumulated_entities=accumulated_entities,
-                batch_info=f"Batch {batch_num + 1} of {len(batches)}"
-            )
-            
             try:
-                # Combine system prompt with content (no separate system message for vision API)
-                combined_content = [
-                    {
-                        "type": "text",
-                        "text": self._get_batch_system_prompt(is_final)
-                    }
-                ] + content
-                
-                response = await self.openai_client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": combined_content
-                        }
-                    ],
-                    max_tokens=settings.MAX_TOKENS,
-                    temperature=0.2
+                batch_result = await self._run_analysis_batch(
+                    batch_frames, batch_num, len(batches), audio_extraction, original_url, content_description,
+                    previous_context=previous_context,
+                    accumulated_entities=accumulated_entities,
+                    image_token_budget=image_token_budget
                 )
-                
-                response_text = response.choices[0].message.content.strip()
-                batch_result = self._parse_batch_response(response_text, is_final)
+                batch_results.append(batch_result)
+                if on_batch_result:
+                    on_batch_result(batch_result)
                 
                 # Extract chunks and context
                 if is_final:
                     # Final batch - return complete analysis
                     all_chunks.extend(batch_result.get('chunks', []))
+                    self._merge_entities(accumulated_entities, batch_result.get('entities', {}))
                     
                     final_analysis = {
                         "id": batch_result.get('id', f"ad_multipass_{int(time.time())}"),
@@ -515,7 +743,8 @@ class AdAnalyzer:
                         "audioStyle": batch_result.get('audioStyle', 'Varied audio elements throughout'),
                         "duration": audio_extraction.duration,
                         "entities": accumulated_entities,
-                        "chunks": all_chunks
+                        "chunks": all_chunks,
+                        "token_usage": self._combined_token_usage(batch_results)
                     }
                     
                     print(f"✅ Multi-pass analysis complete: {len(all_chunks)} total chunks")
@@ -528,18 +757,7 @@ class AdAnalyzer:
                     # Accumulate entities from this batch
                     batch_entities = batch_result.get('entities', {})
                     print(f"🏷️ Batch {batch_num + 1} entities: {len(batch_entities)} types")
-                    
-                    for entity_type, entities in batch_entities.items():
-                        if entity_type not in accumulated_entities:
-                            accumulated_entities[entity_type] = []
-                        # Add new entities, avoiding duplicates by ID
-                        existing_ids = {e.get('id') for e in accumulated_entities[entity_type]}
-                        new_entities_added = 0
-                        for entity in entities:
-                            if entity.get('id') not in existing_ids:
-                                accumulated_entities[entity_type].append(entity)
-                                new_entities_added += 1
-                        print(f"  {entity_type}: {new_entities_added} new (total: {len(accumulated_entities[entity_type])})")
+                    self._merge_entities(accumulated_entities, batch_entities)
                     
                     entities_summary = f", {sum(len(v) for v in accumulated_entities.values())} entities" if accumulated_entities else ""
                     print(f"📝 Batch {batch_num + 1} complete: {len(batch_result.get('chunks', []))} chunks{entities_summary}, context: {previous_context[:100]}...")
@@ -555,6 +773,187 @@ class AdAnalyzer:
         # Should not reach here - raise error instead of fallback
         raise Exception("Multi-pass analysis completed without returning results")
     
+    async def _analyze_multi_pass_parallel(
+        self,
+        batches: List[List[FrameData]],
+        audio_extraction: AudioExtraction,
+        original_url: str,
+        content_description: Optional[str] = None,
+        max_concurrent_batches: int = None,
+        image_token_budget: Optional[int] = None,
+        on_batch_result: Optional[Callable[[Dict], None]] = None
+    ) -> Dict:
+        """
+        Map-reduce multi-pass analysis.
+        
+        The first batch runs alone to build the entity registry and context. The
+        remaining batches then run concurrently (at most max_concurrent_batches
+        requests at a time, defaults to MULTI_PASS_MAX_CONCURRENCY), all
+        referencing that registry, and _reduce_batch_results merges the results.
+        """
+        if max_concurrent_batches is None:
+            max_concurrent_batches = settings.MULTI_PASS_MAX_CONCURRENCY
+        start_time = time.time()
+        
+        # Registry pass: entities defined here are referenced by ID in every other batch
+        try:
+            registry_result = await self._run_analysis_batch(
+                batches[0], 0, len(batches), audio_extraction, original_url, content_description,
+                image_token_budget=image_token_budget
+            )
+            if on_batch_result:
+                on_batch_result(registry_result)
+        except Exception as e:
+            print(f"❌ Batch 1 failed: {e}")
+            registry_result = {
+                'chunks': [],
+                'context': f"Previous batch analysis failed at {batches[0][0].timestamp:.1f}s",
+                'entities': {}
+            }
+        
+        registry = {}
+        self._merge_entities(registry, registry_result.get('entities', {}))
+        context = registry_result.get('context')
+        print(f"🏷️ Entity registry: {sum(len(v) for v in registry.values())} entities ({time.time() - start_time:.1f}s)")
+        
+        semaphore = asyncio.Semaphore(max(1, max_concurrent_batches))
+        
+        async def run_batch(batch_num: int) -> Dict:
+            async with semaphore:
+                result = await self._run_analysis_batch(
+                    batches[batch_num], batch_num, len(batches), audio_extraction, original_url, content_description,
+                    previous_context=context,
+                    accumulated_entities=registry,
+                    image_token_budget=image_token_budget
+                )
+            if on_batch_result:
+                on_batch_result(result)
+            return result
+        
+        print(f"🔀 Running {len(batches) - 1} batches with up to {max_concurrent_batches} concurrent requests...")
+        results = await asyncio.gather(*[run_batch(i) for i in range(1, len(batches))], return_exceptions=True)
+        
+        batch_results = [registry_result]
+        for batch_num, result in enumerate(results, start=1):
+            if isinstance(result, Exception):
+                print(f"❌ Batch {batch_num + 1} failed: {result}")
+                if batch_num == len(batches) - 1:
+                    raise Exception(f"Final batch analysis failed: {str(result)}")
+                result = {'chunks': [], 'context': 'Batch failed', 'entities': {}}
+            batch_results.append(result)
+        
+        final_analysis = self._reduce_batch_results(batch_results, original_url, audio_extraction.duration)
+        print(f"✅ Parallel multi-pass analysis complete: {len(final_analysis['chunks'])} total chunks ({time.time() - start_time:.1f}s)")
+        return final_analysis
+    
+    async def _run_analysis_batch(
+        self,
+        batch_frames: List[FrameData],
+        batch_num: int,
+        total_batches: int,
+        audio_extraction: AudioExtraction,
+        original_url: str,
+        content_description: Optional[str] = None,
+        previous_context: Optional[str] = None,
+        accumulated_entities: Optional[Dict] = None,
+        image_token_budget: Optional[int] = None
+    ) -> Dict:
+        """Build, send and parse one multi-pass batch request (a structured-output call over the batch's frames)."""
+        # Show detailed frame information for this batch
+        frame_times = [f"{frame.timestamp:.2f}s" for frame in batch_frames]
+        print(f"🔄 Processing batch {batch_num + 1}/{total_batches} ({len(batch_frames)} frames)")
+        print(f"   Frame times: {', '.join(frame_times)}")
+        
+        request, token_plan = await self._prepare_single_call(
+            batch_frames, audio_extraction, original_url, content_description, image_token_budget,
+            batch={
+                'number': batch_num + 1,
+                'total': total_batches,
+                'previous_context': previous_context,
+                'entities': accumulated_entities
+            }
+        )
+        response = await self.openai_client.chat.completions.create(**request)
+        
+        response_text = response.choices[0].message.content.strip()
+        return self._finish_single_call(response_text, getattr(response, 'usage', None), original_url, audio_extraction, token_plan)
+    
+    @staticmethod
+    def _combined_token_usage(batch_results: List[Dict]) -> Dict:
+        """Sum the token usage of the batch requests (actual counts stay None unless some batch reported them)."""
+        token_usage = {'requests': 0}
+        for batch_result in batch_results:
+            usage = batch_result.get('token_usage')
+            if not usage:
+                continue
+            token_usage['requests'] += 1
+            for key, value in usage.items():
+                if key == 'image_token_budget':
+                    # The budget applies to each batch request
+                    token_usage[key] = value
+                elif value is not None:
+                    token_usage[key] = token_usage.get(key, 0) + value
+                else:
+                    token_usage.setdefault(key, None)
+        return token_usage
+    
+    @staticmethod
+    def _merge_entities(accumulated_entities: Dict, batch_entities: Dict) -> Dict:
+        """Add batch entities to accumulated_entities in place, skipping IDs already present (first definition wins)."""
+        if not isinstance(batch_entities, dict):
+            return accumulated_entities
+        for entity_type, entities in batch_entities.items():
+            if not isinstance(entities, list):
+                continue
+            if entity_type not in accumulated_entities:
+                accumulated_entities[entity_type] = []
+            # Add new entities, avoiding duplicates by ID
+            existing_ids = {e.get('id') for e in accumulated_entities[entity_type]}
+            new_entities_added = 0
+            for entity in entities:
+                if not isinstance(entity, dict):
+                    continue
+                if entity.get('id') is None or entity.get('id') not in existing_ids:
+                    accumulated_entities[entity_type].append(entity)
+                    existing_ids.add(entity.get('id'))
+                    new_entities_added += 1
+            print(f"  {entity_type}: {new_entities_added} new (total: {len(accumulated_entities[entity_type])})")
+        return accumulated_entities
+    
+    def _reduce_batch_results(self, batch_results: List[Dict], original_url: str, duration: float) -> Dict:
+        """
+        Merge batch results (in batch order) into one analysis.
+        
+        Entities are deduplicated by ID with earlier batches winning, chunks are
+        concatenated in timeline order and renumbered because every batch numbers
+        its own chunks from 1, and the summary fields come from the final batch.
+        The output depends only on the batch results, not on completion order.
+        """
+        entities = {}
+        chunks = []
+        for batch_result in batch_results:
+            self._merge_entities(entities, batch_result.get('entities', {}))
+            chunks.extend(chunk for chunk in batch_result.get('chunks', []) if isinstance(chunk, dict))
+        
+        # Stable sort keeps batch order for chunks without (or with equal) start times
+        chunks.sort(key=lambda chunk: chunk.get('startTime') if isinstance(chunk.get('startTime'), (int, float)) else float('inf'))
+        for i, chunk in enumerate(chunks):
+            chunk['id'] = f"chunk_{str(i + 1).zfill(3)}"
+        
+        final_result = batch_results[-1]
+        final_analysis = {
+            "id": final_result.get('id', f"ad_multipass_{int(time.time())}"),
+            "url": original_url,
+            "summary": final_result.get('summary', 'Multi-pass analysis completed'),
+            "visualStyle": final_result.get('visualStyle', 'Multiple visual styles across shots'),
+            "audioStyle": final_result.get('audioStyle', 'Varied audio elements throughout'),
+            "duration": duration,
+            "entities": entities,
+            "chunks": chunks,
+            "token_usage": self._combined_token_usage(batch_results)
+        }
+        return self._validate_analysis_structure(final_analysis, original_url, duration)
+    
     def _build_analysis_content(
         self, 
         jump_cut_frames: List[FrameData], 
@@ -620,7 +1019,7 @@ class AdAnalyzer:
             "text": f"\nJUMP CUT FRAMES ({len(jump_cut_frames)} frames):"
         })
         
-        for i, frame in enumerate(frames):
+        for i, frame in enumerate(jump_cut_frames):
             content.append({
                 "type": "text",
                 "text": f"\n=== JUMP CUT {i+1} at {frame.timestamp:.2f}s ==="
@@ -631,7 +1030,7 @@ class AdAnalyzer:
                 base64_image = frame.to_base64()
                 
                 # Validate base64 string
-                if not base64_image.startswith("data:image/jpeg;base64,"):
+                if not base64_image.startswith("data:image/"):
                     error_msg = f"Invalid base64 format for frame at {frame.timestamp:.2f}s"
                     logger.error(error_msg)
                     raise ValueError(error_msg)
@@ -0,0 +1,116 @@
+"""
+Analysis result cache for Marketing App Backend
+Finished analyses are stored under the canonical video URL and the video's
+content hash, both scoped to the prompt config version and model
+"""
+
+import sys
+import json
+import time
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+# Import settings
+sys.path.append(str(Path(__file__).parent.parent))
+from config.settings import settings
+
+from .frame_cache import DiskLRUCache
+from .video_urls import canonicalize_video_url
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+def analysis_config_version(prompts_file: str = None, model: str = None) -> str:
+    """
+    Short digest of what determines an analysis besides the video: the
+    video_analysis prompts from prompts.json and the OpenAI model.
+    """
+    with open(prompts_file or settings.PROMPTS_FILE, 'r') as f:
+        prompts = json.load(f).get('video_analysis', {})
+    source = json.dumps({'prompts': prompts, 'model': model or settings.OPENAI_MODEL}, sort_keys=True)
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()[:16]
+
+class AnalysisResultCache:
+    """
+    Disk LRU cache of analysis JSON with a time-to-live.
+
+    Each analysis is stored under a URL key (checked before downloading) and a
+    content key (checked after downloading, so different URLs of the same video
+    also hit). Changing the prompts or model changes both keys.
+    """
+
+    def __init__(self, cache_dir: str = None, ttl_seconds: float = None, max_bytes: int = None, config_version: str = None):
+        """
+        Args:
+            cache_dir: Directory for cached analyses (uses ANALYSIS_CACHE_DIR if None)
+            ttl_seconds: Age after which entries are ignored and removed (uses ANALYSIS_CACHE_TTL_HOURS if None)
+            max_bytes: Total size budget (uses ANALYSIS_CACHE_MAX_MB if None)
+            config_version: Prompt/model version for keys (computed from the config if None)
+        """
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.ANALYSIS_CACHE_TTL_HOURS * 3600
+        self.config_version = config_version or analysis_config_version()
+        self.store = DiskLRUCache(
+            cache_dir or settings.ANALYSIS_CACHE_DIR,
+            max_bytes if max_bytes is not None else int(settings.ANALYSIS_CACHE_MAX_MB * 1024 * 1024)
+        )
+
+    def _key(self, kind: str, value: str, content_description: Optional[str]) -> str:
+        # The optional content description is part of the prompt, so it scopes the key too
+        source = f"{kind}:{value}:{self.config_version}:{content_description or ''}"
+        return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+    def url_key(self, url: str, content_description: Optional[str] = None) -> str:
+        return self._key('url', canonicalize_video_url(url), content_description)
+
+    def content_key(self, video_hash: str, content_description: Optional[str] = None) -> str:
+        return self._key('content', video_hash, content_description)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Cached analysis for key, or None if missing or expired."""
+        data = self.store.get(key)
+        if data is None:
+            return None
+        try:
+            entry = json.loads(data)
+        except ValueError:
+            self.store.delete(key)
+            return None
+
+        if self.ttl_seconds and time.time() - entry.get('created_at', 0) > self.ttl_seconds:
+            self.store.delete(key)
+            return None
+        return entry['analysis']
+
+    def put(self, keys: Iterable[str], analysis: Dict, canonical_url: str = None):
+        """Store analysis under every key in keys."""
+        data = json.dumps({
+            'created_at': time.time(),
+            'canonical_url': canonical_url,
+            'config_version': self.config_version,
+            'analysis': analysis
+        }).encode('utf-8')
+        for key in keys:
+            self.store.put(key, data)
+
+    def clear(self):
+        self.store.clear()
+
+_analysis_cache: Optional[AnalysisResultCache] = None
+_analysis_cache_lock = threading.Lock()
+
+def get_analysis_cache() -> Optional[AnalysisResultCache]:
+    """Shared analysis result cache, or None when caching is disabled."""
+    global _analysis_cache
+    if not settings.ANALYSIS_CACHE_ENABLED:
+        return None
+    with _analysis_cache_lock:
+        if _analysis_cache is None:
+            try:
+                _analysis_cache = AnalysisResultCache()
+            except OSError as e:
+                logger.warning(f"Analysis cache unavailable: {e}")
+                return None
+        return _analysis_cache
@@ -11,12 +11,13 @@ from typing import List, Optional, Dict, Any
 from dataclasses import dataclass
 from pathlib import Path
 import logging
-from openai import OpenAI
 
 # Import settings
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
 from config.settings import settings
+from .video_info import VideoInfo
+from .openai_clients import get_openai_client
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -119,7 +120,7 @@ class AudioExtractor:
         if not self.openai_api_key:
             raise ValueError("OpenAI API key required. Set OPENAI_API_KEY env var or pass openai_api_key parameter.")
         
-        self.client = OpenAI(api_key=self.openai_api_key)
+        self.client = get_openai_client(self.openai_api_key)
         
         # Auto-detect ffmpeg path if not provided
         if ffmpeg_path is None:
@@ -182,10 +183,14 @@ class AudioExtractor:
                 os.remove(temp_audio_path)
             raise
     
-    def transcribe_audio(self, audio_path: str) -> List[TranscriptSegment]:
+    def transcribe_audio(self, audio_path: str, duration: Optional[float] = None) -> List[TranscriptSegment]:
         """
         Transcribe audio using OpenAI Whisper API with timestamps.
         
+        Args:
+            audio_path: Path to extracted audio file
+            duration: Known audio duration (probed from audio_path if None)
+        
         Returns:
             List of transcript segments with timing information
         """
@@ -251,15 +256,16 @@ class AudioExtractor:
             if not segments:
                 logger.warning("No speech segments detected in audio - might be music only or silent")
                 # Return a single segment indicating no speech
-                duration = 0.0
-                try:
-                    # audio_path is the parameter passed to transcribe_audio
-                    import os
-                    if os.path.exists(audio_path):
-                        duration = self.get_audio_duration(audio_path)
-                except Exception as e:
-                    logger.warning(f"Could not get audio duration: {e}")
-                    duration = 10.0  # Default duration
+                if duration is None:
+                    duration = 0.0
+                    try:
+                        # audio_path is the parameter passed to transcribe_audio
+                        import os
+                        if os.path.exists(audio_path):
+                            duration = self.get_audio_duration(audio_path)
+                    except Exception as e:
+                        logger.warning(f"Could not get audio duration: {e}")
+                        duration = 10.0  # Default duration
                 
                 segments.append(TranscriptSegment(
                     start=0.0,
@@ -294,7 +300,7 @@ class AudioExtractor:
             return 0.0
     
     
-    def extract_audio(self, video_path: str) -> AudioExtraction:
+    def extract_audio(self, video_path: str, video_info: Optional[VideoInfo] = None) -> AudioExtraction:
         """
         Extract audio transcript with timestamps.
         
@@ -302,6 +308,7 @@ class AudioExtractor:
         
         Args:
             video_path: Path to video file
+            video_info: Already probed video metadata (avoids another ffprobe call)
             
         Returns:
             AudioExtraction object with transcript segments
@@ -311,15 +318,28 @@ class AudioExtractor:
         
         temp_audio_path = None
         
+        # Skip ffmpeg and Whisper entirely when the probe found no audio stream
+        if video_info is not None and not video_info.has_audio:
+            logger.warning(f"No audio stream in {video_path}, skipping transcription")
+            return AudioExtraction(
+                duration=video_info.duration,
+                transcript_segments=[],
+                full_transcript="",
+                error="Video has no audio stream"
+            )
+        
         try:
             # Step 1: Extract audio from video
             temp_audio_path = self.extract_audio_from_video(video_path)
             
-            # Step 2: Get audio duration
-            duration = self.get_audio_duration(temp_audio_path)
+            # Step 2: Get audio duration (reuse probed metadata when available)
+            if video_info is not None:
+                duration = video_info.duration
+            else:
+                duration = self.get_audio_duration(temp_audio_path)
             
             # Step 3: Transcribe audio with Whisper
-            transcript_segments = self.transcribe_audio(temp_audio_path)
+            transcript_segments = self.transcribe_audio(temp_audio_path, duration)
             
             # Step 4: Build full transcript
             full_transcript = " ".join(segment.text for segment in transcript_segments)
@@ -0,0 +1,154 @@
+"""
+Downloaded video cache for Marketing App Backend
+Keeps recent downloads by canonical URL and yt-dlp video ID, and lets
+concurrent requests for the same video share a single download
+"""
+
+import sys
+import hashlib
+import logging
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+# Import settings
+sys.path.append(str(Path(__file__).parent.parent))
+from config.settings import settings
+
+from .frame_cache import DiskLRUCache, link_or_copy
+from .video_urls import canonicalize_video_url
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+def ytdlp_media_id(info: Optional[Dict]) -> Optional[str]:
+    """
+    Extractor-qualified ID from a yt-dlp info dict, e.g. 'tiktok:7312345678901234567'.
+
+    For Instagram, TikTok and YouTube this matches canonical_video_id, so a
+    full URL finds a video that was first downloaded through a short link.
+    """
+    if not info or not info.get('id'):
+        return None
+    extractor = (info.get('extractor_key') or info.get('extractor') or 'generic').lower()
+    return f"{extractor}:{info['id']}"
+
+class VideoDownloadCache:
+    """
+    Disk LRU cache of downloaded video files with single-flight downloads.
+
+    Files are stored under the yt-dlp video ID when known, with the canonical
+    URL as an alias, so different URL shapes of one video share an entry.
+    claim()/resolve() coalesce concurrent downloads of the same canonical URL:
+    the first caller downloads and every other caller waits on its future.
+    """
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = None):
+        """
+        Args:
+            cache_dir: Directory for cached videos (uses DOWNLOAD_CACHE_DIR if None)
+            max_bytes: Total size budget (uses DOWNLOAD_CACHE_MAX_MB if None)
+        """
+        self.store = DiskLRUCache(
+            cache_dir or settings.DOWNLOAD_CACHE_DIR,
+            max_bytes if max_bytes is not None else int(settings.DOWNLOAD_CACHE_MAX_MB * 1024 * 1024)
+        )
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(kind: str, value: str) -> str:
+        return hashlib.sha256(f"{kind}:{value}".encode('utf-8')).hexdigest()
+
+    def lookup(self, url: str) -> Optional[Path]:
+        """Cached file for url, or None on a miss."""
+        canonical = canonicalize_video_url(url)
+        path = self.store.get_path(self._key('video', canonical))
+        if path is not None:
+            return path
+
+        alias = self.store.get(self._key('alias', canonical))
+        if alias is None:
+            return None
+        return self.store.get_path(self._key('video', alias.decode('utf-8')))
+
+    def store_file(self, url: str, file_path: str, info: Optional[Dict] = None) -> Optional[Path]:
+        """
+        Cache the downloaded file for url. info is the yt-dlp info dict, whose
+        video ID becomes the primary key. Returns the cached path, or None if
+        the file is empty or too large to cache.
+        """
+        if not Path(file_path).exists() or Path(file_path).stat().st_size == 0:
+            return None
+
+        canonical = canonicalize_video_url(url)
+        media_id = ytdlp_media_id(info) or canonical
+        cached_path = self.store.put_file(self._key('video', media_id), file_path)
+        if cached_path is not None and media_id != canonical:
+            self.store.put(self._key('alias', canonical), media_id.encode('utf-8'))
+        return cached_path
+
+    def checkout(self, cached_path: Path, dest_path: str) -> bool:
+        """
+        Give a request its own link (or copy) of a cached file at dest_path, so
+        later eviction cannot remove it mid-processing. False if it is gone.
+        """
+        try:
+            link_or_copy(str(cached_path), dest_path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def claim(self, url: str) -> Tuple[Future, bool]:
+        """
+        Join or start the download of url.
+
+        Returns the shared future and whether the caller is the leader. The
+        leader must download and then call resolve(); followers wait on the
+        future, which yields the cached path (None if the leader could not
+        cache the file) or raises the leader's download error.
+        """
+        canonical = canonicalize_video_url(url)
+        with self._lock:
+            future = self._inflight.get(canonical)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._inflight[canonical] = future
+            return future, True
+
+    def resolve(self, url: str, future: Future, cached_path: Optional[Path] = None, error: Optional[BaseException] = None):
+        """Finish a claimed download and wake every follower."""
+        canonical = canonicalize_video_url(url)
+        with self._lock:
+            if self._inflight.get(canonical) is future:
+                del self._inflight[canonical]
+
+        if future.done():
+            return
+        if isinstance(error, Exception):
+            future.set_exception(error)
+        else:
+            # Success, or the leader was cancelled: followers fall back to their own download
+            future.set_result(cached_path)
+
+    def clear(self):
+        self.store.clear()
+
+_download_cache: Optional[VideoDownloadCache] = None
+_download_cache_lock = threading.Lock()
+
+def get_download_cache() -> Optional[VideoDownloadCache]:
+    """Shared download cache, or None when caching is disabled."""
+    global _download_cache
+    if not settings.DOWNLOAD_CACHE_ENABLED:
+        return None
+    with _download_cache_lock:
+        if _download_cache is None:
+            try:
+                _download_cache = VideoDownloadCache()
+            except OSError as e:
+                logger.warning(f"Download cache unavailable: {e}")
+                return None
+        return _download_cache
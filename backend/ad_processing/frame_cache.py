@@ -0,0 +1,275 @@
+"""
+On-disk caches for Marketing App Backend
+Encoded frames are content-addressed by video hash, pixel digest and encode parameters
+"""
+
+import os
+import sys
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+# Import settings
+sys.path.append(str(Path(__file__).parent.parent))
+from config.settings import settings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+def file_content_hash(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def image_digest(image: np.ndarray) -> str:
+    """Digest of an image's pixels, shape and dtype."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{image.dtype.str}:{'x'.join(map(str, image.shape))}:".encode('ascii'))
+    digest.update(np.ascontiguousarray(image).data)
+    return digest.hexdigest()
+
+def link_or_copy(source_path: str, dest_path: str):
+    """Hard-link source_path to dest_path, copying when linking is not possible."""
+    try:
+        os.link(source_path, dest_path)
+    except OSError:
+        shutil.copyfile(source_path, dest_path)
+
+class DiskLRUCache:
+    """
+    Least-recently-used cache of bytes stored as one file per hex key.
+
+    The in-memory index is rebuilt from the directory on startup and ordered
+    by file modification time, which is bumped on every hit.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        """
+        Args:
+            cache_dir: Directory for cache entries
+            max_bytes: Total size budget; least recently used entries are evicted beyond it
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._index: 'OrderedDict[str, int]' = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._load_index()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.bin"
+
+    def _load_index(self):
+        """Index existing entries, oldest first."""
+        entries = []
+        for path in self.cache_dir.glob('*/*.bin'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self.total_bytes += size
+
+        if entries:
+            logger.debug(f"Cache {self.cache_dir} loaded {len(entries)} entries ({self.total_bytes / 1024 / 1024:.1f} MB)")
+        self._evict()
+
+    def _forget(self, key: str):
+        with self._lock:
+            size = self._index.pop(key, None)
+            if size is not None:
+                self.total_bytes -= size
+
+    def _touch(self, key: str, path: Path, size: int):
+        """Mark key as most recently used."""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        with self._lock:
+            # Entries written by another process are adopted on first hit
+            if key not in self._index:
+                self._index[key] = size
+                self.total_bytes += size
+            self._index.move_to_end(key)
+
+    def _register(self, key: str, size: int):
+        with self._lock:
+            previous = self._index.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous
+            self._index[key] = size
+            self.total_bytes += size
+            self._evict()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return cached bytes for key, or None on a miss."""
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            self._forget(key)
+            return None
+
+        self._touch(key, path, len(data))
+        return data
+
+    def get_path(self, key: str) -> Optional[Path]:
+        """
+        Path of the cached file for key, or None on a miss.
+
+        The file may be evicted at any time, so callers should link or copy it
+        (see link_or_copy) before using it.
+        """
+        path = self._path(key)
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            self._forget(key)
+            return None
+
+        self._touch(key, path, size)
+        return path
+
+    def put(self, key: str, data: bytes):
+        """Store bytes under key, evicting least recently used entries if over budget."""
+        if len(data) > self.max_bytes:
+            return
+
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temp file and rename so readers never see partial entries
+            fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write cache entry {key}: {e}")
+            return
+
+        self._register(key, len(data))
+
+    def put_file(self, key: str, source_path: str) -> Optional[Path]:
+        """
+        Store a copy of the file at source_path under key (hard-linked when it
+        is on the same filesystem). Returns the cached path, or None if the
+        file does not fit the budget or could not be stored.
+        """
+        try:
+            size = os.path.getsize(source_path)
+        except OSError:
+            return None
+        if size > self.max_bytes:
+            return None
+
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                # A hard link appears atomically, so it can go straight to the entry path
+                os.link(source_path, path)
+            except OSError:
+                # Existing entry or another filesystem: copy to a temp file and rename over it
+                fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+                try:
+                    with os.fdopen(fd, 'wb') as dest, open(source_path, 'rb') as source:
+                        shutil.copyfileobj(source, dest)
+                    os.replace(temp_path, path)
+                except BaseException:
+                    os.unlink(temp_path)
+                    raise
+        except OSError as e:
+            logger.warning(f"Failed to write cache entry {key}: {e}")
+            return None
+
+        self._register(key, size)
+        return path
+
+    def delete(self, key: str):
+        """Remove one entry if present."""
+        self._forget(key)
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        """Delete least recently used entries until the cache fits its budget."""
+        while self.total_bytes > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                self._path(key).unlink()
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        """Remove every cached entry."""
+        with self._lock:
+            for key in list(self._index):
+                try:
+                    self._path(key).unlink()
+                except FileNotFoundError:
+                    pass
+            self._index.clear()
+            self.total_bytes = 0
+
+class EncodedFrameCache(DiskLRUCache):
+    """Disk LRU cache of encoded frame bytes"""
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = None):
+        """
+        Args:
+            cache_dir: Directory for cached frames (uses FRAME_CACHE_DIR if None)
+            max_bytes: Total size budget (uses FRAME_CACHE_MAX_MB if None)
+        """
+        super().__init__(
+            cache_dir or settings.FRAME_CACHE_DIR,
+            max_bytes if max_bytes is not None else int(settings.FRAME_CACHE_MAX_MB * 1024 * 1024)
+        )
+
+    @staticmethod
+    def make_key(video_hash: str, pixels_digest: str, max_size: int, quality: int, encoder: str) -> str:
+        """
+        Content address for one encoded frame.
+        
+        The pixel digest (see image_digest) makes the key depend on the frame
+        itself, so frames that share a timestamp but were decoded differently
+        (reused detection sample, re-decode, another frame size) never collide.
+        """
+        source = f"{video_hash}:{pixels_digest}:{max_size}:{quality}:{encoder}"
+        return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+_frame_cache: Optional[EncodedFrameCache] = None
+_frame_cache_lock = threading.Lock()
+
+def get_frame_cache() -> Optional[EncodedFrameCache]:
+    """Shared encoded frame cache, or None when caching is disabled."""
+    global _frame_cache
+    if not settings.FRAME_CACHE_ENABLED:
+        return None
+    with _frame_cache_lock:
+        if _frame_cache is None:
+            try:
+                _frame_cache = EncodedFrameCache()
+            except OSError as e:
+                logger.warning(f"Frame cache unavailable: {e}")
+                return None
+        return _frame_cache
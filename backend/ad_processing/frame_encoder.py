@@ -0,0 +1,182 @@
+"""
+Frame encoding engine for Marketing App Backend
+One resize + encode path shared by every consumer, driven by named profiles
+"""
+
+import sys
+import base64
+import logging
+import threading
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Import settings
+sys.path.append(str(Path(__file__).parent.parent))
+from config.settings import settings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+_RESAMPLE_FILTERS = {
+    'area': cv2.INTER_AREA,
+    'linear': cv2.INTER_LINEAR,
+    'cubic': cv2.INTER_CUBIC,
+    'lanczos': cv2.INTER_LANCZOS4,
+}
+
+_FORMATS = {
+    # format: (file extension, mime type, quality flag)
+    'jpeg': ('.jpg', 'image/jpeg', cv2.IMWRITE_JPEG_QUALITY),
+    'webp': ('.webp', 'image/webp', cv2.IMWRITE_WEBP_QUALITY),
+}
+
+@dataclass(frozen=True)
+class EncodeProfile:
+    """
+    Size, format, quality and resampling used to encode a frame.
+
+    Profiles only ever downscale, and extracted frames are decoded at
+    api.frame_image_max_size, so a max_size above that only takes effect for
+    frames from an extractor built with a matching frame_max_size.
+    """
+    name: str
+    max_size: int               # Longest side in pixels (0 = keep original size)
+    format: str = 'jpeg'        # 'jpeg' or 'webp'
+    quality: int = 85           # Codec quality (1-100)
+    resample: str = 'area'      # 'area', 'linear', 'cubic' or 'lanczos'
+
+    def __post_init__(self):
+        if self.format not in _FORMATS:
+            raise ValueError(f"Unsupported encode format '{self.format}' in profile '{self.name}'")
+        if self.resample not in _RESAMPLE_FILTERS:
+            raise ValueError(f"Unsupported resample filter '{self.resample}' in profile '{self.name}'")
+
+    @property
+    def mime_type(self) -> str:
+        return _FORMATS[self.format][1]
+
+    @property
+    def cache_tag(self) -> str:
+        """Identifies the pipeline (not size/quality) for encoded frame cache keys."""
+        return f"{self.name}:{self.format}:{self.resample}"
+
+    def output_size(self, width: int, height: int) -> Tuple[int, int]:
+        """(width, height) of a width x height frame after this profile's resize."""
+        if self.max_size and max(width, height) > self.max_size:
+            scale = self.max_size / max(width, height)
+            return max(1, int(width * scale)), max(1, int(height * scale))
+        return width, height
+
+    def with_overrides(self, max_size: Optional[int] = None, quality: Optional[int] = None) -> 'EncodeProfile':
+        """Copy of this profile with max_size and/or quality replaced."""
+        changes = {}
+        if max_size is not None:
+            changes['max_size'] = max_size
+        if quality is not None:
+            changes['quality'] = quality
+        return replace(self, **changes) if changes else self
+
+@dataclass
+class EncodedFrame:
+    """Encoded image bytes with their format and final dimensions"""
+    data: bytes
+    mime_type: str
+    width: int
+    height: int
+
+    def to_data_url(self) -> str:
+        return f"data:{self.mime_type};base64,{base64.b64encode(self.data).decode('ascii')}"
+
+def load_profiles() -> Dict[str, EncodeProfile]:
+    """
+    Build encode profiles from the frame_encoding section of the app config.
+
+    The api profile takes its size and quality from api.frame_image_max_size
+    and api.frame_image_quality unless the profile sets them itself.
+    """
+    defaults = {
+        'api': {'max_size': settings.FRAME_IMAGE_MAX_SIZE, 'quality': settings.FRAME_IMAGE_QUALITY}
+    }
+    return {
+        name: EncodeProfile(name=name, **{**defaults.get(name, {}), **options})
+        for name, options in settings.FRAME_ENCODE_PROFILES.items()
+    }
+
+class FrameEncoder:
+    """
+    Resizes and encodes BGR frames according to named profiles.
+
+    Keeps running totals of frames and bytes per profile so payload size can be
+    tuned against the API.
+    """
+
+    def __init__(self, profiles: Optional[Dict[str, EncodeProfile]] = None):
+        """
+        Args:
+            profiles: Encode profiles by name (loads the app config profiles if None)
+        """
+        self.profiles = profiles if profiles is not None else load_profiles()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def profile(self, name: str) -> EncodeProfile:
+        try:
+            return self.profiles[name]
+        except KeyError:
+            raise ValueError(f"Unknown encode profile '{name}' (available: {', '.join(self.profiles)})")
+
+    def encode(self, image: np.ndarray, profile: EncodeProfile) -> EncodedFrame:
+        """Resize a BGR (or grayscale) frame and encode it in a single pass."""
+        original_size = (image.shape[1], image.shape[0])
+        width, height = profile.output_size(*original_size)
+        if (width, height) != original_size:
+            image = cv2.resize(image, (width, height), interpolation=_RESAMPLE_FILTERS[profile.resample])
+
+        extension, mime_type, quality_flag = _FORMATS[profile.format]
+        params = [quality_flag, int(profile.quality)]
+        if profile.format == 'jpeg':
+            params += [cv2.IMWRITE_JPEG_OPTIMIZE, 1]
+
+        # OpenCV encodes BGR directly, so no color conversion or PIL round trip is needed
+        success, encoded = cv2.imencode(extension, image, params)
+        if not success or encoded.size == 0:
+            raise ValueError("Generated empty image data")
+        return EncodedFrame(data=encoded.tobytes(), mime_type=mime_type, width=width, height=height)
+
+    def record(self, profile: EncodeProfile, size: int):
+        """Count one delivered frame of size bytes (including cache hits)."""
+        with self._lock:
+            stats = self._stats.setdefault(profile.name, {'frames': 0, 'bytes': 0})
+            stats['frames'] += 1
+            stats['bytes'] += size
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Frames, total bytes and bytes per frame for each profile used so far."""
+        with self._lock:
+            return {
+                name: {
+                    'frames': stats['frames'],
+                    'bytes': stats['bytes'],
+                    'bytes_per_frame': stats['bytes'] / stats['frames'] if stats['frames'] else 0.0
+                }
+                for name, stats in self._stats.items()
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.clear()
+
+_frame_encoder: Optional[FrameEncoder] = None
+_frame_encoder_lock = threading.Lock()
+
+def get_frame_encoder() -> FrameEncoder:
+    """Shared frame encoder built from the app config profiles."""
+    global _frame_encoder
+    with _frame_encoder_lock:
+        if _frame_encoder is None:
+            _frame_encoder = FrameEncoder()
+        return _frame_encoder
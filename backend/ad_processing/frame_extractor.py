@@ -6,41 +6,132 @@ Copied and adapted from viral-content-analyzer
 import cv2
 import numpy as np
 import subprocess
-import tempfile
 import os
-import io
 from pathlib import Path
-from typing import List, Tuple, Dict, Optional, Callable, Union
+from typing import List, Tuple, Dict, Optional, Callable, Union, Iterator
 from dataclasses import dataclass
 from PIL import Image
 import logging
 import time
 import hashlib
 import base64
+import bisect
+import re
+import queue
+import threading
+import multiprocessing
+import concurrent.futures
+from concurrent.futures import ProcessPoolExecutor
 
 # Import settings
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
 from config.settings import settings
+from .video_info import VideoInfo, probe_video
+from .frame_cache import get_frame_cache, image_digest
+from .frame_encoder import get_frame_encoder
+from .progressive_download import STREAMABLE_LAYOUTS, ProgressiveDownload
+from .frame_hashes import (
+    PHASH_BITS, DHASH_BITS, perceptual_hash, difference_hash,
+    hash_similarity, adjacent_similarities
+)
 
 # Configure logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
-def _histogram_comparison(frame1: np.ndarray, frame2: np.ndarray) -> float:
-    """Fast histogram-based similarity comparison"""
+def _hsv_histograms(image: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """H, S and V channel histograms of a frame"""
     # Convert to HSV for better color representation
-    hsv1 = cv2.cvtColor(frame1, cv2.COLOR_RGB2HSV)
-    hsv2 = cv2.cvtColor(frame2, cv2.COLOR_RGB2HSV)
+    hsv = cv2.cvtColor(image, cv2.COLOR_RGB2HSV)
+    
+    hist_h = cv2.calcHist([hsv], [0], None, [50], [0, 180])
+    hist_s = cv2.calcHist([hsv], [1], None, [60], [0, 256])
+    hist_v = cv2.calcHist([hsv], [2], None, [60], [0, 256])
+    return hist_h, hist_s, hist_v
+
+def _gray_mean(image: np.ndarray) -> float:
+    """Mean grayscale intensity of a frame"""
+    # Convert to grayscale if needed
+    if len(image.shape) == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    return np.mean(image)
+
+@dataclass
+class FrameFeatures:
+    """Similarity features of one frame, computed once when it is decoded"""
+    hist_h: np.ndarray          # Hue histogram (50 bins)
+    hist_s: np.ndarray          # Saturation histogram (60 bins)
+    hist_v: np.ndarray          # Value histogram (60 bins)
+    gray_mean: float            # Mean grayscale intensity
+    phash: np.ndarray           # Packed perceptual hash
+    dhash: np.ndarray           # Packed difference hash
+    
+    @classmethod
+    def from_image(cls, image: np.ndarray) -> 'FrameFeatures':
+        hist_h, hist_s, hist_v = _hsv_histograms(image)
+        return cls(
+            hist_h=hist_h,
+            hist_s=hist_s,
+            hist_v=hist_v,
+            gray_mean=_gray_mean(image),
+            phash=perceptual_hash(image),
+            dhash=difference_hash(image)
+        )
+
+def _histogram_similarity(features1: FrameFeatures, features2: FrameFeatures) -> float:
+    """Histogram correlation between two frames' features"""
+    corr_h = cv2.compareHist(features1.hist_h, features2.hist_h, cv2.HISTCMP_CORREL)
+    corr_s = cv2.compareHist(features1.hist_s, features2.hist_s, cv2.HISTCMP_CORREL)
+    corr_v = cv2.compareHist(features1.hist_v, features2.hist_v, cv2.HISTCMP_CORREL)
+    
+    # Weighted average (luminance is most important for duplicates)
+    similarity = (corr_h * 0.2 + corr_s * 0.3 + corr_v * 0.5)
+    return similarity
+
+def _intensity_similarity(mean1, mean2):
+    """Map mean intensity change to 0-1 where 1 is identical (works elementwise on arrays)"""
+    # Max possible difference is 255; exponential decay makes small changes more significant
+    return np.exp(-np.abs(mean1 - mean2) / 30.0)  # 30 is a tuning parameter
+
+def _feature_similarity(features1: FrameFeatures, features2: FrameFeatures) -> float:
+    """Combined histogram + perceptual hash similarity between two frames' features"""
+    hist_sim = _histogram_similarity(features1, features2)
+    hash_sim = hash_similarity(features1.phash, features2.phash, PHASH_BITS)
     
-    # Calculate histograms for each channel
-    hist1_h = cv2.calcHist([hsv1], [0], None, [50], [0, 180])
-    hist1_s = cv2.calcHist([hsv1], [1], None, [60], [0, 256])
-    hist1_v = cv2.calcHist([hsv1], [2], None, [60], [0, 256])
+    # Weighted combination (75% perceptual hash, 25% histogram)
+    return hist_sim * 0.25 + hash_sim * 0.75
+
+def _adjacent_frame_metrics(features: List[FrameFeatures]) -> Dict[str, np.ndarray]:
+    """
+    Similarity metrics for every adjacent pair of frames.
+    
+    Returns arrays of len(features) - 1 values where element i compares
+    frames i and i + 1.
+    """
+    if len(features) < 2:
+        empty = np.zeros(0, dtype=np.float64)
+        return {'histogram_similarity': empty, 'delta_intensity': empty, 'hash_similarity': empty, 'combined_similarity': empty}
     
-    hist2_h = cv2.calcHist([hsv2], [0], None, [50], [0, 180])
-    hist2_s = cv2.calcHist([hsv2], [1], None, [60], [0, 256])
-    hist2_v = cv2.calcHist([hsv2], [2], None, [60], [0, 256])
+    hist_sims = np.array([
+        _histogram_similarity(previous, current)
+        for previous, current in zip(features, features[1:])
+    ])
+    gray_means = np.array([f.gray_mean for f in features], dtype=np.float64)
+    hash_sims = adjacent_similarities(np.stack([f.phash for f in features]), PHASH_BITS)
+    
+    return {
+        'histogram_similarity': hist_sims,
+        'delta_intensity': _intensity_similarity(gray_means[:-1], gray_means[1:]),
+        'hash_similarity': hash_sims,
+        # Weighted combination (75% perceptual hash, 25% histogram)
+        'combined_similarity': hist_sims * 0.25 + hash_sims * 0.75
+    }
+
+def _histogram_comparison(frame1: np.ndarray, frame2: np.ndarray) -> float:
+    """Fast histogram-based similarity comparison"""
+    hist1_h, hist1_s, hist1_v = _hsv_histograms(frame1)
+    hist2_h, hist2_s, hist2_v = _hsv_histograms(frame2)
     
     # Compare histograms using correlation
     corr_h = cv2.compareHist(hist1_h, hist2_h, cv2.HISTCMP_CORREL)
@@ -53,100 +144,19 @@ def _histogram_comparison(frame1: np.ndarray, frame2: np.ndarray) -> float:
 
 def _perceptual_hash(frame1: np.ndarray, frame2: np.ndarray) -> float:
     """Perceptual hash-based similarity comparison"""
-    def phash(image: np.ndarray, hash_size: int = 16) -> str:
-        # Resize to 32x32 then crop to hash_size x hash_size
-        resized = cv2.resize(image, (32, 32))
-        
-        # Convert to grayscale if needed
-        if len(resized.shape) == 3:
-            resized = cv2.cvtColor(resized, cv2.COLOR_RGB2GRAY)
-        
-        # Apply DCT (Discrete Cosine Transform)
-        dct = cv2.dct(np.float32(resized))
-        
-        # Extract top-left hash_size x hash_size
-        dct_low_freq = dct[:hash_size, :hash_size]
-        
-        # Calculate median
-        median = np.median(dct_low_freq)
-        
-        # Generate hash based on median
-        hash_bits = dct_low_freq > median
-        return ''.join(['1' if bit else '0' for bit in hash_bits.flatten()])
-    
-    hash1 = phash(frame1)
-    hash2 = phash(frame2)
-    
-    # Calculate Hamming distance
-    hamming_distance = sum(c1 != c2 for c1, c2 in zip(hash1, hash2))
-    max_distance = len(hash1)
-    
-    # Convert to similarity (0-1, where 1 is identical)
-    similarity = 1 - (hamming_distance / max_distance)
-    return similarity
+    return hash_similarity(perceptual_hash(frame1), perceptual_hash(frame2), PHASH_BITS)
 
 def _difference_hash(frame1: np.ndarray, frame2: np.ndarray) -> float:
     """Difference hash (d-hash) based similarity comparison - good for texture variations"""
-    def dhash(image: np.ndarray, hash_size: int = 8) -> str:
-        # Resize to (hash_size + 1) x hash_size to allow for difference calculation
-        resized = cv2.resize(image, (hash_size + 1, hash_size))
-        
-        # Convert to grayscale if needed
-        if len(resized.shape) == 3:
-            resized = cv2.cvtColor(resized, cv2.COLOR_RGB2GRAY)
-        
-        # Calculate horizontal gradient (difference between adjacent pixels)
-        diff = resized[:, 1:] > resized[:, :-1]
-        
-        # Convert to binary string
-        return ''.join(['1' if bit else '0' for bit in diff.flatten()])
-    
-    hash1 = dhash(frame1)
-    hash2 = dhash(frame2)
-    
-    # Calculate Hamming distance
-    hamming_distance = sum(c1 != c2 for c1, c2 in zip(hash1, hash2))
-    max_distance = len(hash1)
-    
-    # Convert to similarity (0-1, where 1 is identical)
-    similarity = 1 - (hamming_distance / max_distance)
-    return similarity
+    return hash_similarity(difference_hash(frame1), difference_hash(frame2), DHASH_BITS)
 
 def _delta_intensity(frame1: np.ndarray, frame2: np.ndarray) -> float:
     """Delta intensity - measures brightness/luminance change between frames"""
-    # Convert to grayscale if needed
-    if len(frame1.shape) == 3:
-        gray1 = cv2.cvtColor(frame1, cv2.COLOR_RGB2GRAY)
-    else:
-        gray1 = frame1
-        
-    if len(frame2.shape) == 3:
-        gray2 = cv2.cvtColor(frame2, cv2.COLOR_RGB2GRAY)
-    else:
-        gray2 = frame2
-    
-    # Calculate mean intensity for each frame
-    mean1 = np.mean(gray1)
-    mean2 = np.mean(gray2)
-    
-    # Calculate the absolute difference in mean intensity
-    intensity_diff = abs(mean1 - mean2)
-    
-    # Normalize to 0-1 range where 1 is identical (no change)
-    # Max possible difference is 255, so we normalize by that
-    # We use an exponential decay to make small changes more significant
-    similarity = np.exp(-intensity_diff / 30.0)  # 30 is a tuning parameter
-    
-    return similarity
+    return _intensity_similarity(_gray_mean(frame1), _gray_mean(frame2))
 
 def _combined_similarity(frame1: np.ndarray, frame2: np.ndarray) -> float:
     """Combined similarity method using histogram + perceptual hash"""
-    hist_sim = _histogram_comparison(frame1, frame2)
-    hash_sim = _perceptual_hash(frame1, frame2)
-    
-    # Weighted combination (75% perceptual hash, 25% histogram)
-    combined_similarity = (hist_sim * 0.25 + hash_sim * 0.75)
-    return combined_similarity
+    return _feature_similarity(FrameFeatures.from_image(frame1), FrameFeatures.from_image(frame2))
 
 def _is_jump_cut(frame1: np.ndarray, frame2: np.ndarray, threshold: float = None) -> tuple[bool, dict]:
     """
@@ -181,103 +191,191 @@ def _is_jump_cut(frame1: np.ndarray, frame2: np.ndarray, threshold: float = None
     
     return is_jump_cut, metrics
 
-@dataclass
+def _scaled_size(width: int, height: int, max_size: Optional[int]) -> Tuple[int, int]:
+    """(width, height) bounded so the longest side is at most max_size (0/None = unchanged)."""
+    if not max_size or max(width, height) <= max_size:
+        return width, height
+    scale = max_size / max(width, height)
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+def _scale_filter(width: int, height: int, max_size: Optional[int]) -> Optional[str]:
+    """ffmpeg scale filter that downscales to max_size in the decoder, or None if not needed."""
+    scaled_width, scaled_height = _scaled_size(width, height, max_size)
+    if (scaled_width, scaled_height) == (width, height):
+        return None
+    return f'scale={scaled_width}:{scaled_height}:flags=area'
+
+def _read_into(stream, buffer) -> bool:
+    """Fill a writable buffer (e.g. an arena slot) from a pipe; False if the pipe ends first."""
+    view = memoryview(buffer).cast('B')
+    received = 0
+    while received < len(view):
+        count = stream.readinto(view[received:])
+        if not count:
+            return False
+        received += count
+    return True
+
+def _read_exact(stream, size: int) -> Optional[bytearray]:
+    """Read exactly size bytes from a pipe, or None if it ends early."""
+    buffer = bytearray(size)
+    return buffer if _read_into(stream, buffer) else None
+
+def _queue_pipe_frames(stream, frame_size: int, frames: queue.Queue):
+    """Read fixed-size frames from a pipe into a queue, ending with None."""
+    try:
+        while True:
+            buffer = _read_exact(stream, frame_size)
+            if buffer is None:
+                break
+            frames.put(buffer)
+    except (ValueError, OSError):
+        pass
+    finally:
+        frames.put(None)
+        stream.close()
+
+# Splitting the decode into several rawvideo pipes needs fd passing (POSIX only)
+_SPLIT_OUTPUTS = os.name == 'posix'
+
+def _pipe_stream(source, sink, chunk_size: int = 256 * 1024):
+    """Copy a readable stream into a subprocess pipe until either side ends."""
+    try:
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            sink.write(chunk)
+    except (BrokenPipeError, ValueError, OSError):
+        # The decoder exited or was killed before consuming everything
+        pass
+    finally:
+        try:
+            sink.close()
+        except OSError:
+            pass
+
+class ExtractionCancelled(Exception):
+    """Raised inside a frame extraction once its cancel event is set"""
+
+def _check_cancelled(cancel_event: Optional[threading.Event]):
+    """Raise ExtractionCancelled if cancel_event is set."""
+    if cancel_event is not None and cancel_event.is_set():
+        raise ExtractionCancelled("Frame extraction cancelled")
+
+def _decode_into_arena(cmd: List[str], arena: 'FrameArena', cancel_event: Optional[threading.Event] = None, poll_interval: float = 0.1) -> Tuple[List[np.ndarray], bytes]:
+    """
+    Run an ffmpeg command writing raw frames to stdout, reading each frame
+    straight into the next arena slot. Returns the frames (arena views) and
+    stderr. Kills the process and raises ExtractionCancelled once cancel_event is set.
+    """
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    frames = []
+    errors = []
+    stderr_chunks = []
+    
+    def read_frames():
+        try:
+            while True:
+                frame = arena.read_frame(process.stdout)
+                if frame is None:
+                    break
+                frames.append(frame)
+        except Exception as e:
+            errors.append(e)
+    
+    readers = [
+        threading.Thread(target=read_frames, name='decode-frames', daemon=True),
+        threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), name='decode-stderr', daemon=True)
+    ]
+    for reader in readers:
+        reader.start()
+    try:
+        while True:
+            try:
+                process.wait(timeout=poll_interval)
+                break
+            except subprocess.TimeoutExpired:
+                _check_cancelled(cancel_event)
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        for reader in readers:
+            reader.join()
+        process.stdout.close()
+        process.stderr.close()
+    stderr = b''.join(stderr_chunks)
+    if errors:
+        raise errors[0]
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, cmd, None, stderr)
+    return frames, stderr
+
+# Slotted dataclasses need Python 3.10+; older interpreters get a regular dataclass
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(**_DATACLASS_SLOTS)
 class FrameData:
     """Container for frame data with metadata"""
-    image: np.ndarray  # Raw image data
+    image: np.ndarray  # Raw BGR (or grayscale) image data, usually a view into the job's FrameArena
     timestamp: float   # Time in video (seconds)
     frame_type: str    # 'interval', 'jump_cut', or 'scene_interval'
     similarity_score: Optional[float] = None  # Similarity to previous frame (lower = bigger jump cut)
     duration: Optional[float] = None  # Duration this frame represents
     scene_id: Optional[int] = None  # Scene number this frame belongs to
+    source_hash: Optional[str] = None  # Content hash of the source video, set by the caller (enables the encoded frame cache)
     
-    def to_pil(self) -> Image.Image:
-        """Convert numpy array to PIL Image"""
-        # Convert BGR to RGB for PIL
+    @property
+    def bgr(self) -> np.ndarray:
+        """BGR pixels (no copy)"""
+        return self.image
+    
+    @property
+    def rgb(self) -> np.ndarray:
+        """RGB view of the pixels (no copy, channel order reversed by striding)"""
         if len(self.image.shape) == 3:
-            rgb_image = cv2.cvtColor(self.image, cv2.COLOR_BGR2RGB)
-        else:
-            rgb_image = self.image
-        return Image.fromarray(rgb_image)
+            return self.image[..., ::-1]
+        return self.image
     
-    def to_base64(self, max_size: int = None, quality: int = None) -> str:
-        """Convert frame to base64 for API submission with configurable compression.
+    def to_pil(self) -> Image.Image:
+        """
+        Convert to a PIL Image. PIL stores RGB, so this makes one copy: the
+        BGR to RGB swap happens while PIL unpacks the buffer, without an
+        intermediate numpy array.
+        """
+        image = np.ascontiguousarray(self.image)
+        height, width = image.shape[:2]
+        if len(image.shape) == 3:
+            return Image.frombuffer('RGB', (width, height), image, 'raw', 'BGR', 0, 1)
+        return Image.frombuffer('L', (width, height), image, 'raw', 'L', 0, 1)
+    
+    def encode(self, profile: str = 'api', max_size: int = None, quality: int = None) -> Tuple[bytes, str]:
+        """
+        Encode the frame with a named encode profile, optionally overriding its
+        max_size and quality. Returns (encoded bytes, mime type).
         
-        This method now saves frames to temporary JPEG files first, then loads them back.
-        This mimics the successful test script approach and should fix image encoding issues.
+        Results are served from the encoded frame cache when possible.
         """
+        encoder = get_frame_encoder()
+        encode_profile = encoder.profile(profile).with_overrides(max_size, quality)
+        image_data = self.encode_cached(
+            encode_profile.cache_tag, encode_profile.max_size, encode_profile.quality,
+            lambda: encoder.encode(self.image, encode_profile).data
+        )
+        encoder.record(encode_profile, len(image_data))
+        return image_data, encode_profile.mime_type
+    
+    def to_base64(self, max_size: int = None, quality: int = None, profile: str = 'api') -> str:
+        """Convert frame to a base64 data URL for API submission using an encode profile."""
         try:
-            # Use settings defaults if not specified
-            if max_size is None:
-                max_size = getattr(settings, 'FRAME_IMAGE_MAX_SIZE', 512)
-            if quality is None:
-                quality = getattr(settings, 'FRAME_IMAGE_QUALITY', 70)
-            
-            pil_img = self.to_pil()
-            logger.debug(f"Original image mode: {pil_img.mode}, size: {pil_img.size}")
-            
-            # Always convert to RGB mode for JPEG compatibility
-            if pil_img.mode != 'RGB':
-                pil_img = pil_img.convert('RGB')
-                logger.debug(f"Converted to RGB mode")
-            
-            # Create temporary file path
-            timestamp_str = f"{self.timestamp:.2f}".replace('.', '_')
-            temp_filename = f"temp_frame_{timestamp_str}_{int(time.time())}.jpg"
-            temp_path = os.path.join(tempfile.gettempdir(), temp_filename)
+            image_data, mime_type = self.encode(profile, max_size, quality)
+            logger.debug(f"Final {mime_type} data size: {len(image_data)} bytes")
             
-            try:
-                # Step 1: Save to temporary JPEG file (like test scripts do)
-                pil_img.save(temp_path, format='JPEG', quality=quality, optimize=True)
-                logger.debug(f"Saved temporary frame to: {temp_path}")
-                
-                # Step 2: Load the JPEG file back (this normalizes the image data)
-                saved_img = Image.open(temp_path)
-                saved_img.load()  # Ensure image data is loaded into memory
-                logger.debug(f"Loaded saved image - mode: {saved_img.mode}, size: {saved_img.size}")
-                
-                # Step 3: Apply compression/resizing to the normalized image
-                width, height = saved_img.size
-                if max(width, height) > max_size:
-                    scale = max_size / max(width, height)
-                    new_width = max(1, int(width * scale))  # Ensure at least 1 pixel
-                    new_height = max(1, int(height * scale))  # Ensure at least 1 pixel
-                    saved_img = saved_img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                    logger.debug(f"Resized to: {saved_img.size}")
-                
-                # Step 4: Convert to base64 with final compression
-                buffer = io.BytesIO()
-                saved_img.save(buffer, format='JPEG', quality=quality, optimize=True)
-                buffer.seek(0)
-                
-                image_data = buffer.read()
-                if len(image_data) == 0:
-                    raise ValueError("Generated empty image data")
-                
-                logger.debug(f"Final JPEG data size: {len(image_data)} bytes")
-                
-                # Step 5: Validate the JPEG data by trying to reopen it
-                test_buffer = io.BytesIO(image_data)
-                try:
-                    test_img = Image.open(test_buffer)
-                    test_img.verify()
-                    logger.debug(f"Final JPEG validation passed")
-                except Exception as verify_error:
-                    raise ValueError(f"Generated invalid JPEG data: {verify_error}")
-                
-                base64_str = base64.b64encode(image_data).decode('utf-8')
-                logger.debug(f"Base64 length: {len(base64_str)}")
-                
-                return f"data:image/jpeg;base64,{base64_str}"
+            base64_str = base64.b64encode(image_data).decode('ascii')
+            logger.debug(f"Base64 length: {len(base64_str)}")
             
-            finally:
-                # Clean up temporary file
-                if os.path.exists(temp_path):
-                    try:
-                        os.remove(temp_path)
-                        logger.debug(f"Cleaned up temporary file: {temp_path}")
-                    except Exception as cleanup_error:
-                        logger.warning(f"Failed to cleanup temp file {temp_path}: {cleanup_error}")
+            return f"data:{mime_type};base64,{base64_str}"
             
         except Exception as e:
             logger.error(f"Error converting frame to base64: {e}")
@@ -285,12 +383,187 @@ class FrameData:
             logger.error(f"Original image shape: {self.image.shape if hasattr(self.image, 'shape') else 'N/A'}")
             raise
     
-    def to_bytes(self, format='JPEG', quality=85) -> bytes:
-        """Convert to compressed bytes for API calls"""
-        pil_img = self.to_pil()
-        buffer = io.BytesIO()
-        pil_img.save(buffer, format=format, quality=quality, optimize=True)
-        return buffer.getvalue()
+    def encode_cached(self, encoder: str, max_size: int, quality: int, encode: Callable[[], bytes]) -> bytes:
+        """
+        Return encoded bytes for this frame from the encoded frame cache,
+        calling encode() and storing the result on a miss.
+        
+        Frames without a source_hash are always encoded.
+        """
+        cache = get_frame_cache() if self.source_hash else None
+        if cache is None:
+            return encode()
+        
+        key = cache.make_key(self.source_hash, image_digest(self.image), max_size, quality, encoder)
+        image_data = cache.get(key)
+        if image_data is None:
+            image_data = encode()
+            cache.put(key, image_data)
+        else:
+            logger.debug(f"Encoded frame cache hit at {self.timestamp:.2f}s ({encoder})")
+        return image_data
+    
+    def to_bytes(self, profile: str = 'api', max_size: int = None, quality: int = None) -> bytes:
+        """Encoded bytes for API calls (see encode)"""
+        return self.encode(profile, max_size, quality)[0]
+
+class FrameArena:
+    """
+    One contiguous pixel buffer holding the frames of a job, allocated before
+    they are decoded.
+
+    The decoder reads each frame straight into the next free slot (read_frame)
+    and FrameData.image is a view of that slot, so frames never get a buffer
+    of their own. Slots that are never written are never touched, so the
+    operating system does not back them with memory.
+    """
+    
+    def __init__(self, count: int, shape: Tuple[int, ...]):
+        self.shape = shape
+        self.buffer = np.empty((count,) + shape, dtype=np.uint8)
+        self.used = 0
+    
+    @property
+    def nbytes(self) -> int:
+        return self.buffer.nbytes
+    
+    def _next_slot(self) -> np.ndarray:
+        """The next free slot, or a standalone array once the arena is full."""
+        if self.used < len(self.buffer):
+            return self.buffer[self.used]
+        logger.debug(f"Frame arena full ({len(self.buffer)} slots), allocating a separate frame")
+        return np.empty(self.shape, dtype=np.uint8)
+    
+    def _commit(self, slot: np.ndarray):
+        if slot.base is self.buffer:
+            self.used += 1
+    
+    def read_frame(self, stream) -> Optional[np.ndarray]:
+        """Read one raw frame from a pipe into the next slot; None at end of stream."""
+        slot = self._next_slot()
+        if not _read_into(stream, slot):
+            return None
+        self._commit(slot)
+        return slot
+    
+    def adopt(self, image: np.ndarray) -> np.ndarray:
+        """
+        Copy a frame decoded elsewhere (e.g. a detection sample) into the next
+        slot. Frames of another shape or dtype are returned unchanged.
+        """
+        if image.shape != self.shape or image.dtype != np.uint8:
+            return image
+        slot = self._next_slot()
+        slot[...] = image
+        self._commit(slot)
+        return slot
+
+class DetectionFrameStore:
+    """
+    Bounded store of frames decoded during jump cut detection.
+    
+    Frames are downscaled to max_size on insert and keyed by sample index.
+    When the byte budget is exceeded, every other stored sample is dropped so
+    the remaining samples still cover the whole video evenly.
+    """
+    
+    def __init__(self, interval: float, max_bytes: int, max_size: int = None, max_offset: float = 0.5):
+        """
+        Args:
+            interval: Seconds between detection samples
+            max_bytes: Memory budget for stored frames
+            max_size: Longest side of stored frames (uses FRAME_IMAGE_MAX_SIZE if None, 0 keeps full size)
+            max_offset: Maximum distance (seconds) between a request and the sample served
+        """
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self.max_size = max_size if max_size is not None else settings.FRAME_IMAGE_MAX_SIZE
+        self.max_offset = max_offset
+        self.stride = 1
+        self.total_bytes = 0
+        self._indices: List[int] = []
+        self._images: Dict[int, np.ndarray] = {}
+    
+    def __len__(self) -> int:
+        return len(self._indices)
+    
+    def add(self, timestamp: float, image: np.ndarray):
+        """Store a detection sample, downscaling it and decimating if over budget."""
+        index = int(round(timestamp / self.interval))
+        if index % self.stride:
+            return
+        
+        height, width = image.shape[:2]
+        new_size = _scaled_size(width, height, self.max_size)
+        if new_size != (width, height):
+            image = cv2.resize(image, new_size, interpolation=cv2.INTER_AREA)
+        
+        self._indices.append(index)
+        self._images[index] = image
+        self.total_bytes += image.nbytes
+        
+        while self.total_bytes > self.max_bytes and len(self._indices) > 1:
+            self._decimate()
+    
+    def _decimate(self):
+        """Double the sample stride, dropping samples that no longer fit it."""
+        self.stride *= 2
+        kept = []
+        for index in self._indices:
+            if index % self.stride:
+                self.total_bytes -= self._images.pop(index).nbytes
+            else:
+                kept.append(index)
+        self._indices = kept
+        logger.debug(f"Frame store over budget, stride now {self.stride} ({len(kept)} samples kept)")
+    
+    def nearest(self, timestamp: float, lower: Optional[float] = None, upper: Optional[float] = None) -> Optional[Tuple[float, np.ndarray]]:
+        """
+        Return (sample_timestamp, image) for the stored sample nearest to timestamp,
+        restricted to lower <= sample < upper, or None if none is within max_offset.
+        """
+        position = bisect.bisect_left(self._indices, timestamp / self.interval)
+        best = None
+        for index in self._indices[max(0, position - 2):position + 2]:
+            sample_time = index * self.interval
+            if lower is not None and sample_time < lower - 1e-6:
+                continue
+            if upper is not None and sample_time >= upper - 1e-6:
+                continue
+            offset = abs(sample_time - timestamp)
+            if offset <= self.max_offset and (best is None or offset < best[0]):
+                best = (offset, index)
+        
+        if best is None:
+            return None
+        return best[1] * self.interval, self._images[best[1]]
+    
+    def merge(self, other: 'DetectionFrameStore'):
+        """Add the samples of another store (e.g. from a detection worker) in index order."""
+        for index in other._indices:
+            self.add(index * other.interval, other._images[index])
+    
+    def clear(self):
+        """Release all stored frames."""
+        self._indices = []
+        self._images = {}
+        self.total_bytes = 0
+
+# Process pool for parallel jump cut detection, created on first use and reused
+_detection_pool: Optional[ProcessPoolExecutor] = None
+_detection_pool_lock = threading.Lock()
+
+def _get_detection_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Return the shared detection pool, sized with workers processes when it is
+    first created. Later callers share it as is; extra chunks queue.
+    """
+    global _detection_pool
+    with _detection_pool_lock:
+        if _detection_pool is None:
+            # spawn avoids forking a parent that already runs server threads
+            _detection_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        return _detection_pool
 
 class ViralFrameExtractor:
     """
@@ -304,7 +577,13 @@ class ViralFrameExtractor:
                  jump_cut_threshold: float = None,
                  max_frames_per_video: int = 30,
                  target_frames_per_video: int = None,
-                 max_video_duration: float = None):
+                 max_video_duration: float = None,
+                 reuse_detection_frames: bool = None,
+                 frame_store_max_mb: float = None,
+                 frame_max_size: int = None,
+                 analysis_frame_size: int = None,
+                 detection_workers: int = None,
+                 detection_min_chunk_seconds: float = None):
         """
         Initialize the frame extractor.
         
@@ -315,6 +594,16 @@ class ViralFrameExtractor:
             max_frames_per_video: Maximum frames to extract per video
             target_frames_per_video: Target number of frames to aim for (uses config default if None)
             max_video_duration: Maximum video duration in seconds (uses config default if None)
+            reuse_detection_frames: Serve scene frames from detection samples instead of
+                re-decoding at full resolution (uses config default if None)
+            frame_store_max_mb: Memory budget for reused detection frames (uses config default if None)
+            frame_max_size: Longest side of extracted frames, scaled by ffmpeg while decoding
+                (uses FRAME_IMAGE_MAX_SIZE if None, 0 decodes at full resolution)
+            analysis_frame_size: Longest side of the frames similarity metrics run on, scaled by ffmpeg
+                whether or not detection frames are reused (uses config default if None).
+                jump_cut_threshold is compared against metrics computed at this size
+            detection_workers: Processes used for jump cut detection (uses config default if None, 0 uses every core, 1 runs sequentially)
+            detection_min_chunk_seconds: Shortest stretch of video given to one detection worker (uses config default if None)
         """
         self.ffmpeg_path = ffmpeg_path
         self.ffprobe_path = ffprobe_path
@@ -322,17 +611,24 @@ class ViralFrameExtractor:
         self.max_frames_per_video = max_frames_per_video
         self.target_frames_per_video = target_frames_per_video if target_frames_per_video is not None else settings.TARGET_FRAMES_PER_VIDEO
         self.max_video_duration = max_video_duration if max_video_duration is not None else settings.MAX_VIDEO_DURATION
-        
-    def get_video_length(self, video_path: str) -> float:
-        """Get video duration using ffprobe."""
+        self.reuse_detection_frames = reuse_detection_frames if reuse_detection_frames is not None else settings.REUSE_DETECTION_FRAMES
+        self.frame_store_max_mb = frame_store_max_mb if frame_store_max_mb is not None else settings.FRAME_STORE_MAX_MB
+        self.frame_max_size = frame_max_size if frame_max_size is not None else settings.FRAME_IMAGE_MAX_SIZE
+        self.analysis_frame_size = analysis_frame_size if analysis_frame_size is not None else settings.ANALYSIS_FRAME_SIZE
+        self.detection_workers = detection_workers if detection_workers is not None else settings.DETECTION_WORKERS
+        self.detection_min_chunk_seconds = detection_min_chunk_seconds if detection_min_chunk_seconds is not None else settings.DETECTION_MIN_CHUNK_SECONDS
+        
+    def probe_video(self, video_path: str) -> VideoInfo:
+        """Probe video metadata once so it can be shared across pipeline stages."""
+        return probe_video(video_path, self.ffprobe_path)
+    
+    def get_video_length(self, video_path: str, video_info: Optional[VideoInfo] = None) -> float:
+        """Get video duration from probed metadata."""
         try:
-            result = subprocess.run([
-                self.ffprobe_path, "-v", "error", "-show_entries",
-                "format=duration", "-of", "default=noprint_wrappers=1:nokey=1", 
-                video_path
-            ], capture_output=True, text=True, check=True)
+            if video_info is None:
+                video_info = self.probe_video(video_path)
             
-            duration = float(result.stdout.strip())
+            duration = video_info.duration
             
             # Enforce 90-second limit
             if duration > self.max_video_duration:
@@ -343,56 +639,158 @@ class ViralFrameExtractor:
             logger.error(f"Failed to get video length for {video_path}: {e}")
             raise ValueError(f"Could not determine video length: {e}")
     
-    def extract_frames(self, video_path: str) -> List[FrameData]:
+    def extract_frames(self, video_path: str, video_info: Optional[VideoInfo] = None, cancel_event: Optional[threading.Event] = None) -> List[FrameData]:
         """
         Main extraction pipeline for marketing app.
         Uses jump cut detection + gap filling approach.
+        Pass video_info to reuse metadata that was already probed.
+        
+        Setting cancel_event stops the extraction between frames: running
+        ffmpeg processes are killed and ExtractionCancelled is raised.
         """
         start_time = time.time()
         logger.info(f"Starting frame extraction for {video_path}")
         
+        # Detection samples kept for reuse during frame selection (lives for this call only)
+        frame_store = None
+        if self.reuse_detection_frames:
+            frame_store = DetectionFrameStore(1.0 / 6.0, int(self.frame_store_max_mb * 1024 * 1024), self.frame_max_size)
+        
         try:
-            # Get video metadata
-            video_length = self.get_video_length(video_path)
+            # Get video metadata (probed once for the whole job)
+            if video_info is None:
+                video_info = self.probe_video(video_path)
+            video_length = self.get_video_length(video_path, video_info)
             logger.info(f"Video duration: {video_length:.2f}s (limit: {self.max_video_duration}s)")
             
             # Step 1: Jump cut detection → timestamps only
-            jump_cut_timestamps = self.detect_jump_cut_timestamps(video_path, video_length)
-            print(f"🎬 JUMP CUT DETECTION RESULTS:", flush=True)
-            print(f"   Total jump cuts detected: {len(jump_cut_timestamps)}", flush=True)
-            print(f"   Max frames allowed: {self.max_frames_per_video}", flush=True)
-            print(f"   Target frames to aim for: {self.target_frames_per_video}", flush=True)
-            
-            logger.info(f"🎬 JUMP CUT DETECTION RESULTS:")
-            logger.info(f"   Total jump cuts detected: {len(jump_cut_timestamps)}")
-            logger.info(f"   Max frames allowed: {self.max_frames_per_video}")
-            logger.info(f"   Target frames to aim for: {self.target_frames_per_video}")
-            
-            # Step 2: Timestamp-based frame extraction
-            frames = self.extract_frames_from_timestamps(jump_cut_timestamps, video_path, video_length, self.max_frames_per_video)
-            logger.info(f"🎬 FINAL EXTRACTION: {len(frames)} total frames from timestamp-based approach")
-            
-            # Calculate frame durations
-            frames = self.calculate_frame_durations(frames, video_length)
-            
-            extraction_time = time.time() - start_time
-            logger.info(f"Frame extraction completed in {extraction_time:.2f}s: {len(frames)} final frames")
-            
-            return frames
+            jump_cut_timestamps = self.detect_jump_cut_timestamps(video_path, video_length, video_info, frame_store, cancel_event=cancel_event)
+            return self._frames_from_jump_cuts(jump_cut_timestamps, video_path, video_length, video_info, frame_store, start_time, cancel_event)
                 
         except Exception as e:
             logger.error(f"Frame extraction failed for {video_path}: {e}")
             raise
+        finally:
+            if frame_store is not None:
+                frame_store.clear()
+    
+    def extract_frames_progressive(self, download: ProgressiveDownload, header_timeout: float = None, cancel_event: Optional[threading.Event] = None) -> List[FrameData]:
+        """
+        Extraction pipeline that starts while the video is still downloading.
+        
+        When the partial file is streamable (moov atom first, fragmented MP4 or
+        Matroska), jump cut detection decodes the bytes received so far through
+        a pipe and keeps up with the download. Frame selection runs once the
+        download completes, on exact metadata from the finished file. Other
+        layouts wait for the download and use extract_frames.
+        
+        Args:
+            download: Download in progress
+            header_timeout: Seconds to wait for the container header (uses config default if None)
+            cancel_event: Stops the extraction when set (see extract_frames)
+        """
+        if header_timeout is None:
+            header_timeout = settings.PROGRESSIVE_HEADER_TIMEOUT
+        
+        layout = download.wait_for_layout(header_timeout)
+        partial_info = None
+        if layout in STREAMABLE_LAYOUTS and not download.finished.is_set():
+            try:
+                partial_info = self.probe_video(download.current_path())
+            except (ValueError, TypeError) as e:
+                logger.info(f"Partial download not probeable yet, waiting for full file: {e}")
+        
+        if partial_info is None:
+            logger.info(f"Progressive decode not possible (layout: {layout}), waiting for download")
+            self._wait_for_download(download, cancel_event)
+            return self.extract_frames(download.path, cancel_event=cancel_event)
+        
+        start_time = time.time()
+        logger.info(f"Starting progressive frame extraction ({layout}) for {download.path}")
+        
+        frame_store = None
+        if self.reuse_detection_frames:
+            frame_store = DetectionFrameStore(1.0 / 6.0, int(self.frame_store_max_mb * 1024 * 1024), self.frame_max_size)
+        
+        try:
+            # Detect on the growing file; the decode ends when the download does
+            with download.open_stream() as stream:
+                jump_cut_timestamps = self.detect_jump_cut_timestamps(
+                    download.path, self.max_video_duration, partial_info, frame_store, input_stream=stream, cancel_event=cancel_event
+                )
+            download_wait_start = time.time()
+            self._wait_for_download(download, cancel_event)
+            logger.info(f"Detection finished {time.time() - start_time:.2f}s after start, download done {time.time() - download_wait_start:.2f}s later")
+            
+            # Exact metadata (duration, limits) from the finished file
+            video_info = self.probe_video(download.path)
+            video_length = self.get_video_length(download.path, video_info)
+            jump_cut_timestamps = [(t, metrics) for t, metrics in jump_cut_timestamps if t < video_length]
+            
+            return self._frames_from_jump_cuts(jump_cut_timestamps, download.path, video_length, video_info, frame_store, start_time, cancel_event)
+        
+        except Exception as e:
+            logger.error(f"Progressive frame extraction failed for {download.path}: {e}")
+            raise
+        finally:
+            if frame_store is not None:
+                frame_store.clear()
+    
+    def _frame_arena(self, video_info: VideoInfo, count: int) -> FrameArena:
+        """Arena for count frames at the size extracted frames are decoded at."""
+        width, height = _scaled_size(*video_info.display_size, self.frame_max_size)
+        return FrameArena(count, (height, width, 3))
+    
+    def _wait_for_download(self, download: ProgressiveDownload, cancel_event: Optional[threading.Event] = None, poll_interval: float = 0.1):
+        """download.wait() that gives up with ExtractionCancelled once cancel_event is set."""
+        while not download.finished.wait(poll_interval):
+            _check_cancelled(cancel_event)
+        download.wait()
     
-    def detect_jump_cut_timestamps(self, video_path: str, video_length: float) -> List[Tuple[float, Dict]]:
+    def _frames_from_jump_cuts(self, jump_cut_timestamps: List[Tuple[float, Dict]], video_path: str, video_length: float, video_info: VideoInfo, frame_store: Optional[DetectionFrameStore], start_time: float, cancel_event: Optional[threading.Event] = None) -> List[FrameData]:
+        """Select, time and pack the final frames once jump cuts are known."""
+        _check_cancelled(cancel_event)
+        print(f"🎬 JUMP CUT DETECTION RESULTS:", flush=True)
+        print(f"   Total jump cuts detected: {len(jump_cut_timestamps)}", flush=True)
+        print(f"   Max frames allowed: {self.max_frames_per_video}", flush=True)
+        print(f"   Target frames to aim for: {self.target_frames_per_video}", flush=True)
+        
+        logger.info(f"🎬 JUMP CUT DETECTION RESULTS:")
+        logger.info(f"   Total jump cuts detected: {len(jump_cut_timestamps)}")
+        logger.info(f"   Max frames allowed: {self.max_frames_per_video}")
+        logger.info(f"   Target frames to aim for: {self.target_frames_per_video}")
+        
+        # Step 2: Timestamp-based frame extraction, decoded straight into the job's frame arena
+        arena = self._frame_arena(video_info, self.max_frames_per_video)
+        frames = self.extract_frames_from_timestamps(jump_cut_timestamps, video_path, video_length, self.max_frames_per_video, video_info, frame_store, cancel_event, arena)
+        logger.info(f"🎬 FINAL EXTRACTION: {len(frames)} total frames from timestamp-based approach")
+        
+        # Calculate frame durations
+        frames = self.calculate_frame_durations(frames, video_length)
+        
+        logger.debug(f"Frame arena: {arena.used}/{len(arena.buffer)} slots used ({arena.nbytes / 1024 / 1024:.1f} MB reserved)")
+        
+        extraction_time = time.time() - start_time
+        logger.info(f"Frame extraction completed in {extraction_time:.2f}s: {len(frames)} final frames")
+        
+        return frames
+    
+    def detect_jump_cut_timestamps(self, video_path: str, video_length: float, video_info: Optional[VideoInfo] = None, frame_store: Optional[DetectionFrameStore] = None, input_stream=None, cancel_event: Optional[threading.Event] = None) -> List[Tuple[float, Dict]]:
         """
         Detect jump cuts and return timestamps with full metrics.
         Returns list of (timestamp, metrics_dict) tuples.
+        
+        Metrics are computed on frames scaled by ffmpeg to analysis_frame_size.
+        When frame_store is given, samples are also decoded at frame_max_size
+        (a second output of the same decode) and added to the store.
+        
+        With input_stream the video is decoded from that file object (e.g. a
+        download in progress) in a single pass instead of from video_path.
+        cancel_event is checked after every decoded sample.
         """
         logger.info(f"Detecting jump cuts at 6 FPS for {video_length:.2f}s video")
         
         fps = 6.0
-        interval = 1.0 / fps  # 1/6 second = ~0.167s
         
         jump_cut_timestamps = []
         
@@ -406,49 +804,261 @@ class ViralFrameExtractor:
         jump_cut_timestamps.append((0.0, first_metrics))
         logger.debug(f"First frame at 0.0s marked as jump cut")
         
-        # Extract and compare frames at 6 FPS
-        current_time = interval
-        previous_frame = None
+        # Stream frames at 6 FPS, scaled by ffmpeg, and compute features once per frame
+        decode_size = self.frame_max_size if frame_store is not None else self.analysis_frame_size
+        chunk_bounds = self._detection_chunks(video_length, fps) if input_stream is None else [(0, None)]
+        if len(chunk_bounds) > 1:
+            if video_info is None:
+                video_info = self.probe_video(video_path)
+            sample_times, frame_features = self._featurize_parallel(video_path, fps, video_length, video_info, decode_size, chunk_bounds, frame_store, cancel_event)
+        else:
+            sample_times, frame_features = self._featurize_samples(video_path, fps, video_length, video_info, decode_size, frame_store, input_stream=input_stream, cancel_event=cancel_event)
         
-        # Extract first frame for comparison
-        previous_frame = self.extract_single_frame(video_path, 0.0)
-        if not previous_frame:
+        if not sample_times:
             logger.warning("Could not extract first frame")
             return jump_cut_timestamps
         
-        while current_time < video_length:
-            current_frame = self.extract_single_frame(video_path, current_time)
-            if not current_frame:
-                current_time += interval
-                continue
-            
-            # Calculate all similarity metrics
-            hist_sim = _histogram_comparison(previous_frame.image, current_frame.image)
-            delta_int = _delta_intensity(previous_frame.image, current_frame.image)
-            combined_sim = _combined_similarity(previous_frame.image, current_frame.image)
+        # Adjacent pairs are scored together once every frame has its features
+        jump_cut_timestamps.extend(self._jump_cuts_from_features(sample_times, frame_features))
+        
+        logger.info(f"Jump cut detection complete: {len(jump_cut_timestamps)} jump cuts detected")
+        return jump_cut_timestamps
+    
+    def _featurize_samples(self, video_path: str, fps: float, video_length: float, video_info: Optional[VideoInfo], decode_size: Optional[int], frame_store: Optional[DetectionFrameStore] = None, start_index: int = 0, end_index: Optional[int] = None, input_stream=None, cancel_event: Optional[threading.Event] = None) -> Tuple[List[float], List[FrameFeatures]]:
+        """Decode detection samples in [start_index, end_index) and compute their features."""
+        sample_times = []
+        frame_features = []
+        for current_time, decoded_image, analysis_image in self.iter_sampled_frames(video_path, fps, video_length, video_info, decode_size, start_index, end_index, input_stream, self.analysis_frame_size):
+            _check_cancelled(cancel_event)
+            if frame_store is not None:
+                frame_store.add(current_time, decoded_image)
+            sample_times.append(current_time)
+            frame_features.append(FrameFeatures.from_image(self._analysis_image(analysis_image)))
+        return sample_times, frame_features
+    
+    def _worker_options(self) -> Dict:
+        """Constructor arguments a detection worker needs to decode and featurize like this extractor."""
+        return {
+            'ffmpeg_path': self.ffmpeg_path,
+            'ffprobe_path': self.ffprobe_path,
+            'frame_max_size': self.frame_max_size,
+            'analysis_frame_size': self.analysis_frame_size,
+            'detection_workers': 1
+        }
+    
+    def _detection_pool_size(self) -> int:
+        return self.detection_workers or os.cpu_count() or 1
+    
+    def _detection_chunks(self, video_length: float, fps: float) -> List[Tuple[int, Optional[int]]]:
+        """Split the detection sample range into (start_index, end_index) chunks, one per worker."""
+        workers = self._detection_pool_size()
+        chunk_count = min(workers, int(video_length // self.detection_min_chunk_seconds))
+        if chunk_count <= 1:
+            return [(0, None)]
+        
+        total_samples = int(np.ceil(video_length * fps))
+        starts = [round(i * total_samples / chunk_count) for i in range(chunk_count)]
+        return [(start, end) for start, end in zip(starts, starts[1:])] + [(starts[-1], None)]
+    
+    def _featurize_parallel(self, video_path: str, fps: float, video_length: float, video_info: VideoInfo, decode_size: Optional[int], chunk_bounds: List[Tuple[int, Optional[int]]], frame_store: Optional[DetectionFrameStore] = None, cancel_event: Optional[threading.Event] = None) -> Tuple[List[float], List[FrameFeatures]]:
+        """
+        Featurize timeline chunks in the detection process pool and stitch them in order.
+        
+        Each chunk decodes one extra sample before its range, so stitched
+        results match a sequential decode exactly. Falls back to a sequential
+        decode if the pool fails.
+        
+        cancel_event is checked between chunks: queued chunks are cancelled and
+        chunks already running are allowed to finish before ExtractionCancelled
+        is raised, so no worker is left reading the video.
+        """
+        store_max_bytes = frame_store.max_bytes // len(chunk_bounds) if frame_store is not None else None
+        logger.info(f"Featurizing {len(chunk_bounds)} chunks in parallel")
+        
+        try:
+            pool = _get_detection_pool(self._detection_pool_size())
+            worker_options = self._worker_options()
+            futures = [
+                pool.submit(_featurize_chunk, worker_options, video_path, fps, video_length, video_info, decode_size, start, end, store_max_bytes)
+                for start, end in chunk_bounds
+            ]
+            pending = set(futures)
+            while pending:
+                _, pending = concurrent.futures.wait(pending, timeout=0.1)
+                if pending and cancel_event is not None and cancel_event.is_set():
+                    for future in pending:
+                        future.cancel()
+                    concurrent.futures.wait(pending)
+                    _check_cancelled(cancel_event)
+            results = [future.result() for future in futures]
+        except ExtractionCancelled:
+            raise
+        except Exception as e:
+            logger.warning(f"Parallel detection failed, falling back to sequential decode: {e}")
+            return self._featurize_samples(video_path, fps, video_length, video_info, decode_size, frame_store, cancel_event=cancel_event)
+        
+        sample_times = []
+        frame_features = []
+        for (start, end), (chunk_times, chunk_features, chunk_store) in zip(chunk_bounds, results):
+            sample_times.extend(chunk_times)
+            frame_features.extend(chunk_features)
+            if frame_store is not None and chunk_store is not None:
+                frame_store.merge(chunk_store)
+            # A short chunk means the decode hit the end of the stream
+            if end is not None and len(chunk_times) < end - start:
+                break
+        
+        return sample_times, frame_features
+    
+    def _jump_cuts_from_features(self, sample_times: List[float], frame_features: List[FrameFeatures]) -> List[Tuple[float, Dict]]:
+        """Score adjacent sample pairs and return (timestamp, metrics) for each jump cut."""
+        pair_metrics = _adjacent_frame_metrics(frame_features)
+        jump_cuts = []
+        
+        for i, current_time in enumerate(sample_times[1:]):
+            combined_sim = float(pair_metrics['combined_similarity'][i])
+            hist_sim = float(pair_metrics['histogram_similarity'][i])
+            delta_int = float(pair_metrics['delta_intensity'][i])
             
             # Use combined similarity for jump cut detection threshold
-            is_jump_cut = combined_sim < self.jump_cut_threshold
-            
-            if is_jump_cut:
+            if combined_sim < self.jump_cut_threshold:
                 metrics = {
                     'combined_similarity': combined_sim,
                     'histogram_similarity': hist_sim,
                     'delta_intensity': delta_int,
                     'combined_score': (hist_sim + delta_int) / 2  # Average of histogram and delta for ranking
                 }
-                jump_cut_timestamps.append((current_time, metrics))
+                jump_cuts.append((current_time, metrics))
                 logger.debug(f"Jump cut detected at {current_time:.3f}s (combined: {combined_sim:.3f}, hist: {hist_sim:.3f}, delta: {delta_int:.3f}, score: {metrics['combined_score']:.3f})")
             else:
                 logger.debug(f"No jump cut at {current_time:.3f}s (combined: {combined_sim:.3f})")
-            
-            previous_frame = current_frame
-            current_time += interval
         
-        logger.info(f"Jump cut detection complete: {len(jump_cut_timestamps)} jump cuts detected")
-        return jump_cut_timestamps
+        return jump_cuts
+    
+    def _analysis_image(self, image: np.ndarray) -> np.ndarray:
+        """Downscale a frame to the size similarity metrics run on (no-op for decoder-scaled analysis frames)."""
+        height, width = image.shape[:2]
+        new_size = _scaled_size(width, height, self.analysis_frame_size)
+        if new_size == (width, height):
+            return image
+        return cv2.resize(image, new_size, interpolation=cv2.INTER_AREA)
     
-    def extract_frames_from_timestamps(self, jump_cut_timestamps: List[Tuple[float, Dict]], video_path: str, video_length: float, max_frames: int) -> List[FrameData]:
+    def iter_sampled_frames(self, video_path: str, fps: float, video_length: float, video_info: Optional[VideoInfo] = None, max_size: Optional[int] = None, start_index: int = 0, end_index: Optional[int] = None, input_stream=None, analysis_size: Optional[int] = None) -> Iterator[Tuple[float, np.ndarray, np.ndarray]]:
+        """
+        Stream frames sampled at a fixed rate from a single ffmpeg process.
+        
+        Decodes the video once through an `fps` filter into a rawvideo pipe
+        instead of seeking per frame. Yields (timestamp, BGR image, analysis
+        image) tuples with fixed shapes, stopping at video_length. Frames are
+        scaled by ffmpeg so the longest side is at most max_size (None = full size).
+        
+        With analysis_size, the decoder splits every sample into a second,
+        smaller output scaled to analysis_size and streamed through its own
+        pipe, so similarity metrics never need a resize in Python. Otherwise
+        the analysis image is the frame itself.
+        
+        start_index/end_index restrict the output to samples in that range.
+        Decoding seeks to the sample before start_index and discards it, so
+        every yielded sample is identical to the same sample of a full decode.
+        
+        input_stream, if given, is piped into ffmpeg instead of reading
+        video_path (video_info must then describe the stream, and start_index
+        must be 0 since a pipe cannot seek).
+        """
+        if video_info is None:
+            video_info = self.probe_video(video_path)
+        source_width, source_height = video_info.display_size
+        interval = 1.0 / fps
+        
+        # Sample grid is anchored on the original timestamps (-copyts) so a
+        # decode that seeks into the middle of the video lands on the same grid
+        first_decoded = max(0, start_index - 1)
+        grid_start = video_info.start_time + first_decoded * interval
+        sample_filter = f'fps={fps}:start_time={grid_start:.6f}'
+        width, height = _scaled_size(source_width, source_height, max_size)
+        frame_size = width * height * 3
+        
+        analysis_width, analysis_height = _scaled_size(width, height, analysis_size)
+        split_analysis = _SPLIT_OUTPUTS and (analysis_width, analysis_height) != (width, height)
+        
+        cmd = [self.ffmpeg_path, '-v', 'error', '-copyts']
+        if first_decoded > 0:
+            cmd += ['-ss', f'{grid_start:.6f}']
+        cmd += ['-i', video_path if input_stream is None else 'pipe:0', '-an']
+        
+        analysis_read = analysis_write = None
+        if split_analysis:
+            # Second rawvideo output on an extra pipe, scaled from the same decoded sample
+            analysis_read, analysis_write = os.pipe()
+            frame_scale = _scale_filter(source_width, source_height, max_size) or 'null'
+            analysis_scale = _scale_filter(source_width, source_height, analysis_size) or 'null'
+            cmd += [
+                '-filter_complex', f'[0:v]{sample_filter},split=2[frame_in][analysis_in];[frame_in]{frame_scale}[frame];[analysis_in]{analysis_scale}[analysis]',
+                '-map', '[frame]', '-f', 'rawvideo', '-pix_fmt', 'bgr24', 'pipe:1',
+                '-map', '[analysis]', '-f', 'rawvideo', '-pix_fmt', 'bgr24', f'pipe:{analysis_write}'
+            ]
+        else:
+            filters = [sample_filter]
+            scale_filter = _scale_filter(source_width, source_height, max_size)
+            if scale_filter:
+                filters.append(scale_filter)
+            cmd += ['-vf', ','.join(filters), '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-']
+        
+        process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE if input_stream is not None else None,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            pass_fds=(analysis_write,) if split_analysis else ()
+        )
+        analysis_frames = None
+        if split_analysis:
+            os.close(analysis_write)
+            # Drained on a thread so neither output can stall ffmpeg while the other is read
+            analysis_frames = queue.Queue()
+            threading.Thread(
+                target=_queue_pipe_frames,
+                args=(os.fdopen(analysis_read, 'rb', buffering=0), analysis_width * analysis_height * 3, analysis_frames),
+                name='decode-analysis', daemon=True
+            ).start()
+        if input_stream is not None:
+            # Feed the decoder from a thread; it ends with the stream or when ffmpeg exits
+            threading.Thread(target=_pipe_stream, args=(input_stream, process.stdin), name='decode-feed', daemon=True).start()
+        frame_index = first_decoded
+        try:
+            while end_index is None or frame_index < end_index:
+                timestamp = frame_index * interval
+                if timestamp >= video_length:
+                    break
+                
+                buffer = _read_exact(process.stdout, frame_size)
+                if buffer is None:
+                    break
+                image = np.frombuffer(buffer, dtype=np.uint8).reshape((height, width, 3))
+                
+                analysis_image = image
+                if analysis_frames is not None:
+                    analysis_buffer = analysis_frames.get()
+                    if analysis_buffer is None:
+                        break
+                    analysis_image = np.frombuffer(analysis_buffer, dtype=np.uint8).reshape((analysis_height, analysis_width, 3))
+                
+                if frame_index >= start_index:
+                    yield timestamp, image, analysis_image
+                frame_index += 1
+        finally:
+            process.stdout.close()
+            if process.poll() is None:
+                process.kill()
+            stderr = process.stderr.read().decode(errors='replace').strip()
+            process.stderr.close()
+            process.wait()
+            if frame_index == first_decoded and stderr:
+                logger.error(f"Streaming decode failed for {video_path}: {stderr}")
+        
+        logger.debug(f"Streamed {frame_index - first_decoded} frames at {fps} FPS from {video_path}")
+    
+    def extract_frames_from_timestamps(self, jump_cut_timestamps: List[Tuple[float, Dict]], video_path: str, video_length: float, max_frames: int, video_info: Optional[VideoInfo] = None, frame_store: Optional[DetectionFrameStore] = None, cancel_event: Optional[threading.Event] = None, arena: Optional[FrameArena] = None) -> List[FrameData]:
         """
         Complete timestamp-first frame extraction pipeline.
         1. Select most significant jump cuts (if > max_frames)
@@ -456,7 +1066,7 @@ class ViralFrameExtractor:
         3. Allocate and extract frames using positioning strategy
         """
         if not jump_cut_timestamps:
-            return self.extract_interval_frames_to_target(video_path, video_length, max_frames)
+            return self.extract_interval_frames_to_target(video_path, video_length, max_frames, video_info, frame_store, cancel_event, arena)
         
         # Step 1: Filter jump cut timestamps if needed
         if len(jump_cut_timestamps) > max_frames:
@@ -471,7 +1081,7 @@ class ViralFrameExtractor:
         logger.info(f"🎬 SCENES: Defined {len(scenes)} scenes from {len(selected_timestamps)} jump cuts")
         
         # Step 3: Allocate frames to scenes and extract
-        frames = self.extract_frames_from_scenes(scenes, video_path, max_frames)
+        frames = self.extract_frames_from_scenes(scenes, video_path, max_frames, video_info, frame_store, cancel_event, arena)
         
         return frames
     
@@ -505,7 +1115,8 @@ class ViralFrameExtractor:
     def define_scenes_from_timestamps(self, timestamps: List[Tuple[float, Dict]], video_length: float) -> List[Dict]:
         """
         Define scenes based on jump cut timestamps.
-        Returns list of scene dictionaries with start, end, duration.
+        Returns list of scene dictionaries with start, end, duration and the
+        combined similarity of the jump cut that opens the scene.
         """
         if not timestamps:
             return []
@@ -517,6 +1128,7 @@ class ViralFrameExtractor:
         
         # Extract just the timestamp values
         timestamp_values = [t[0] for t in timestamps]
+        similarities = [t[1].get('combined_similarity') for t in timestamps]
         
         # Create scenes between consecutive timestamps
         for i in range(len(timestamp_values)):
@@ -537,14 +1149,17 @@ class ViralFrameExtractor:
                     'start': start_time,
                     'end': end_time,
                     'duration': duration,
-                    'jump_cut_timestamp': start_time
+                    'jump_cut_timestamp': start_time,
+                    'similarity': similarities[i]
                 })
         
         return scenes
     
-    def extract_frames_from_scenes(self, scenes: List[Dict], video_path: str, max_frames: int) -> List[FrameData]:
+    def extract_frames_from_scenes(self, scenes: List[Dict], video_path: str, max_frames: int, video_info: Optional[VideoInfo] = None, frame_store: Optional[DetectionFrameStore] = None, cancel_event: Optional[threading.Event] = None, arena: Optional[FrameArena] = None) -> List[FrameData]:
         """
         Extract frames from scenes using intelligent positioning strategy.
+        Frames are served from frame_store when given, decoding only what it can't cover.
+        Pixels are placed in arena when given.
         """
         if not scenes:
             return []
@@ -552,12 +1167,29 @@ class ViralFrameExtractor:
         # Allocate frames to scenes
         frame_allocation = self._allocate_frames_to_scenes(scenes, max_frames)
         
+        # Plan every scene's timestamps first so all frames come from one decode pass
+        scene_timestamps = [
+            self._scene_frame_timestamps(scene, frames_for_scene, i + 1)
+            for i, (scene, frames_for_scene) in enumerate(zip(scenes, frame_allocation))
+        ]
+        decoded_frames = self._extract_frames_reusing_store(
+            video_path,
+            [t for timestamps in scene_timestamps for t in timestamps],
+            video_info,
+            frame_store,
+            bounds=[(scene['start'], scene['end']) for scene, timestamps in zip(scenes, scene_timestamps) for _ in timestamps],
+            cancel_event=cancel_event,
+            arena=arena
+        )
+        
         all_frames = []
+        offset = 0
         
-        # Extract frames for each scene
-        for i, (scene, frames_for_scene) in enumerate(zip(scenes, frame_allocation)):
+        # Assign decoded frames to each scene
+        for i, (scene, timestamps) in enumerate(zip(scenes, scene_timestamps)):
             scene_id = i + 1
-            scene_frames = self._extract_scene_frames(scene, frames_for_scene, scene_id, video_path)
+            scene_frames = self._label_scene_frames(decoded_frames[offset:offset + len(timestamps)], scene_id, scene.get('similarity'))
+            offset += len(timestamps)
             all_frames.extend(scene_frames)
             
             # Stop if we've reached the max frame limit
@@ -578,11 +1210,18 @@ class ViralFrameExtractor:
         logger.info(f"🎬 Frame extraction complete: {len(scenes)} scenes processed, {len(all_frames)} total frames")
         return all_frames
     
-    def _extract_scene_frames(self, scene: Dict, frame_count: int, scene_id: int, video_path: str) -> List[FrameData]:
+    def _extract_scene_frames(self, scene: Dict, frame_count: int, scene_id: int, video_path: str, video_info: Optional[VideoInfo] = None) -> List[FrameData]:
         """
         Extract frames within a scene using positioning strategy.
         Same logic as before but with cleaner separation.
         """
+        timestamps = self._scene_frame_timestamps(scene, frame_count, scene_id)
+        return self._label_scene_frames(self.extract_frames_at(video_path, timestamps, video_info), scene_id, scene.get('similarity'))
+    
+    def _scene_frame_timestamps(self, scene: Dict, frame_count: int, scene_id: int) -> List[float]:
+        """
+        Calculate frame timestamps within a scene using positioning strategy.
+        """
         if frame_count <= 0:
             return []
         
@@ -613,8 +1252,8 @@ class ViralFrameExtractor:
             
             positions.append(1.0)  # End
         
-        # Extract frames at calculated positions
-        scene_frames = []
+        # Convert positions to timestamps
+        timestamps = []
         for i, position in enumerate(positions):
             # Calculate timestamp (avoid exact end to prevent edge cases)
             if position >= 1.0:
@@ -624,18 +1263,29 @@ class ViralFrameExtractor:
             
             # Ensure timestamp is within bounds
             timestamp = max(start_time, min(timestamp, end_time - 0.1))
-            
-            frame = self.extract_single_frame(video_path, timestamp)
+            timestamps.append(timestamp)
+            logger.debug(f"  Scene {scene_id} frame {i+1}/{frame_count} at {timestamp:.3f}s (position: {position:.2f})")
+        
+        return timestamps
+    
+    def _label_scene_frames(self, frames: List[Optional[FrameData]], scene_id: int, similarity: Optional[float] = None) -> List[FrameData]:
+        """
+        Tag decoded scene frames with frame types and scene id, dropping failed decodes.
+        The scene's jump cut frame gets the jump cut's similarity as its similarity_score.
+        """
+        scene_frames = []
+        for i, frame in enumerate(frames):
             if frame:
                 # Use proper frame types for analyzer
                 frame.frame_type = 'jump_cut' if i == 0 else 'scene_interval'
                 frame.scene_id = scene_id
+                if i == 0:
+                    frame.similarity_score = similarity
                 scene_frames.append(frame)
-                logger.debug(f"  Scene {scene_id} frame {i+1}/{frame_count} at {timestamp:.3f}s (position: {position:.2f})")
         
         return scene_frames
     
-    def detect_jump_cuts(self, video_path: str, video_length: float) -> List[FrameData]:
+    def detect_jump_cuts(self, video_path: str, video_length: float, video_info: Optional[VideoInfo] = None) -> List[FrameData]:
         """
 LEGACY METHOD: Detect jump cuts by sampling at 6 FPS and comparing consecutive frames.
         This method is replaced by detect_jump_cut_timestamps() but kept for compatibility.
@@ -648,10 +1298,13 @@ LEGACY METHOD: Detect jump cuts by sampling at 6 FPS and comparing consecutive f
         frames = []
         jump_cut_frames = []
         
+        if video_info is None:
+            video_info = self.probe_video(video_path)
+        
         # Extract all frames at 6 FPS
         current_time = 0.0
         while current_time < video_length:
-            frame = self.extract_single_frame(video_path, current_time)
+            frame = self.extract_single_frame(video_path, current_time, video_info)
             if frame:
                 frame.frame_type = 'candidate'
                 frames.append(frame)
@@ -732,14 +1385,17 @@ LEGACY METHOD: Detect jump cuts by sampling at 6 FPS and comparing consecutive f
         
         return allocation
     
-    def fill_gaps_between_jump_cuts(self, jump_cut_frames: List[FrameData], video_path: str, video_length: float, target_count: int) -> List[FrameData]:
+    def fill_gaps_between_jump_cuts(self, jump_cut_frames: List[FrameData], video_path: str, video_length: float, target_count: int, video_info: Optional[VideoInfo] = None) -> List[FrameData]:
         """
 LEGACY METHOD: Fill scenes (gaps between jump cuts) with frames to capture movement within each scene.
         This method is replaced by sample_scenes_intelligently() but kept for compatibility.
         """
         if not jump_cut_frames:
             # No jump cuts, fall back to regular interval extraction
-            return self.extract_interval_frames_to_target(video_path, video_length, target_count)
+            return self.extract_interval_frames_to_target(video_path, video_length, target_count, video_info)
+        
+        if video_info is None:
+            video_info = self.probe_video(video_path)
         
         # Sort jump cuts by timestamp
         jump_cut_frames.sort(key=lambda f: f.timestamp)
@@ -796,18 +1452,12 @@ LEGACY METHOD: Fill scenes (gaps between jump cuts) with frames to capture movem
         if frames_available <= 0:
             return jump_cut_frames
         
-        all_frames = []
-        
-        # Add frames for each scene
+        # Plan interval frame timestamps for each scene
+        scene_timestamps = []
         for i, scene in enumerate(scenes):
-            scene_frames = []
+            timestamps = []
             scene_id = i + 1
             
-            # Add the jump cut frame that starts this scene (if exists)
-            if scene['jump_cut_frame']:
-                scene['jump_cut_frame'].scene_id = scene_id
-                scene_frames.append(scene['jump_cut_frame'])
-            
             # Calculate frames for this scene (proportional to duration, min 1, max 6)
             scene_proportion = scene['duration'] / total_scene_duration
             frames_for_scene = max(1, min(6, int(scene_proportion * frames_available)))
@@ -828,12 +1478,35 @@ LEGACY METHOD: Fill scenes (gaps between jump cuts) with frames to capture movem
                     
                     # Make sure we don't exceed scene boundaries
                     if scene['start'] < timestamp < scene['end'] and timestamp < video_length:
-                        frame = self.extract_single_frame(video_path, timestamp)
-                        if frame:
-                            frame.frame_type = 'scene_interval'
-                            frame.scene_id = scene_id
-                            scene_frames.append(frame)
-                            logger.debug(f"  Added scene frame at {timestamp:.3f}s (position: {position_fraction:.2f})")
+                        timestamps.append(timestamp)
+            
+            scene_timestamps.append(timestamps)
+        
+        # Decode all scene frames in one pass
+        decoded_frames = self.extract_frames_at(
+            video_path, [t for timestamps in scene_timestamps for t in timestamps], video_info
+        )
+        
+        all_frames = []
+        offset = 0
+        
+        # Add frames for each scene
+        for i, (scene, timestamps) in enumerate(zip(scenes, scene_timestamps)):
+            scene_frames = []
+            scene_id = i + 1
+            
+            # Add the jump cut frame that starts this scene (if exists)
+            if scene['jump_cut_frame']:
+                scene['jump_cut_frame'].scene_id = scene_id
+                scene_frames.append(scene['jump_cut_frame'])
+            
+            for frame in decoded_frames[offset:offset + len(timestamps)]:
+                if frame:
+                    frame.frame_type = 'scene_interval'
+                    frame.scene_id = scene_id
+                    scene_frames.append(frame)
+                    logger.debug(f"  Added scene frame at {frame.timestamp:.3f}s")
+            offset += len(timestamps)
             
             all_frames.extend(scene_frames)
         
@@ -877,7 +1550,7 @@ LEGACY METHOD: Fill scenes (gaps between jump cuts) with frames to capture movem
         
         return selected_frames
 
-    def extract_interval_frames_to_target(self, video_path: str, video_length: float, target_count: int) -> List[FrameData]:
+    def extract_interval_frames_to_target(self, video_path: str, video_length: float, target_count: int, video_info: Optional[VideoInfo] = None, frame_store: Optional[DetectionFrameStore] = None, cancel_event: Optional[threading.Event] = None, arena: Optional[FrameArena] = None) -> List[FrameData]:
         """Extract frames at regular intervals to reach target frame count."""
         frames = []
         
@@ -886,6 +1559,7 @@ LEGACY METHOD: Fill scenes (gaps between jump cuts) with frames to capture movem
         
         logger.info(f"Extracting {target_count} frames with {interval:.2f}s intervals")
         
+        timestamps = []
         for i in range(target_count):
             # Start after first interval to avoid very beginning
             timestamp = (i + 1) * interval
@@ -894,49 +1568,175 @@ LEGACY METHOD: Fill scenes (gaps between jump cuts) with frames to capture movem
             if timestamp >= video_length:
                 break
             
-            frame = self.extract_single_frame(video_path, timestamp)
-            
+            timestamps.append(timestamp)
+        
+        for i, frame in enumerate(self._extract_frames_reusing_store(video_path, timestamps, video_info, frame_store, cancel_event=cancel_event, arena=arena)):
             if frame:
                 frame.frame_type = 'interval'
                 frames.append(frame)
-                logger.debug(f"Frame {i+1}/{target_count} at {timestamp:.2f}s extracted")
+                logger.debug(f"Frame {i+1}/{target_count} at {frame.timestamp:.2f}s extracted")
         
         logger.info(f"Successfully extracted {len(frames)} interval frames")
         return frames
 
-    def extract_single_frame(self, video_path: str, timestamp: float) -> Optional[FrameData]:
-        """Extract a single frame at a specific timestamp."""
+    def extract_frames_at(self, video_path: str, timestamps: List[float], video_info: Optional[VideoInfo] = None, max_size: Optional[int] = None, cancel_event: Optional[threading.Event] = None, arena: Optional[FrameArena] = None) -> List[Optional[FrameData]]:
+        """
+        Extract frames at many timestamps with a single decode pass.
+        
+        The sorted timestamps become one ffmpeg `select` filter that keeps the
+        first frame at or after each timestamp (the frame a per-timestamp seek
+        would return), and `showinfo` reports which frames were kept.
+        Frames are scaled by ffmpeg to max_size (uses frame_max_size if None).
+        Returns FrameData in input order, with None where no frame was decoded.
+        Frames are read straight into arena slots (a new arena sized for the
+        request if none is given or its frame shape differs).
+        Setting cancel_event kills the decode and raises ExtractionCancelled.
+        """
+        if not timestamps:
+            return []
+        
+        try:
+            if video_info is None:
+                video_info = self.probe_video(video_path)
+            if max_size is None:
+                max_size = self.frame_max_size
+            width, height = video_info.display_size
+            scale_filter = _scale_filter(width, height, max_size)
+            width, height = _scaled_size(width, height, max_size)
+            
+            # Timestamps are absolute (-copyts), so shift targets by the container start
+            targets = sorted({round(t + video_info.start_time, 6) for t in timestamps})
+            select_expr = '+'.join(
+                f'lte({t:.6f},t)*not(gte(prev_pts*TB,{t:.6f}))' for t in targets
+            )
+            filters = [f"select='{select_expr}'", 'showinfo']
+            if scale_filter:
+                filters.append(scale_filter)
+            
+            cmd = [
+                self.ffmpeg_path,
+                '-hide_banner', '-nostats',
+                '-loglevel', 'info',  # showinfo logs at info level
+                '-copyts',
+                '-ss', f'{max(0.0, targets[0] - video_info.start_time):.6f}',
+                '-i', video_path,
+                '-an',
+                '-vf', ','.join(filters),
+                '-fps_mode', 'passthrough',
+                '-frames:v', str(len(targets)),
+                '-f', 'rawvideo',
+                '-pix_fmt', 'bgr24',
+                '-'
+            ]
+            
+            if arena is None or arena.shape != (height, width, 3):
+                arena = FrameArena(len(targets), (height, width, 3))
+            decoded, stderr = _decode_into_arena(cmd, arena, cancel_event)
+            decoded_times = [float(t) for t in re.findall(rb'pts_time:\s*(-?[0-9.]+)', stderr)]
+            
+            if len(decoded_times) != len(decoded):
+                logger.warning(f"Decoded {len(decoded)} frames but got {len(decoded_times)} timestamps from {video_path}")
+                decoded_times = decoded_times[:len(decoded)]
+        except ExtractionCancelled:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to extract {len(timestamps)} frames from {video_path}: {e}")
+            return [None] * len(timestamps)
+        
+        frames = []
+        for timestamp in timestamps:
+            # First decoded frame at or after the target (pts_time has 6 decimals)
+            target = round(timestamp + video_info.start_time, 6)
+            index = bisect.bisect_left(decoded_times, target - 1e-6)
+            if index >= len(decoded_times):
+                logger.error(f"Failed to extract frame at {timestamp}s: no frame decoded")
+                frames.append(None)
+                continue
+            
+            frames.append(FrameData(
+                image=decoded[index],
+                timestamp=timestamp,
+                frame_type='interval',
+                duration=None
+            ))
+        
+        logger.debug(f"Extracted {len(decoded)} frames for {len(timestamps)} timestamps in one pass")
+        return frames
+    
+    def _extract_frames_reusing_store(self, video_path: str, timestamps: List[float], video_info: Optional[VideoInfo] = None, frame_store: Optional[DetectionFrameStore] = None, bounds: Optional[List[Tuple[float, float]]] = None, cancel_event: Optional[threading.Event] = None, arena: Optional[FrameArena] = None) -> List[Optional[FrameData]]:
+        """
+        Serve frames from the detection frame store where a nearby sample exists,
+        decoding only the remaining timestamps with extract_frames_at.
+        
+        bounds optionally gives a (start, end) window per timestamp that a reused
+        sample must fall in, so scene frames never come from a neighbouring scene.
+        Reused frames carry the timestamp of the sample they came from. With an
+        arena, reused samples are copied into it and decoded frames are read into it.
+        """
+        frames: List[Optional[FrameData]] = [None] * len(timestamps)
+        missing = []
+        used_samples = set()
+        
+        for i, timestamp in enumerate(timestamps):
+            sample = None
+            if frame_store is not None:
+                lower, upper = bounds[i] if bounds else (None, None)
+                sample = frame_store.nearest(timestamp, lower, upper)
+            
+            # Decode when no sample is close enough or it was already handed out
+            if sample is None or sample[0] in used_samples:
+                missing.append(i)
+                continue
+            
+            sample_time, image = sample
+            used_samples.add(sample_time)
+            frames[i] = FrameData(
+                image=arena.adopt(image) if arena is not None else image,
+                timestamp=sample_time,
+                frame_type='interval',
+                duration=None
+            )
+        
+        if missing:
+            decoded = self.extract_frames_at(video_path, [timestamps[i] for i in missing], video_info, cancel_event=cancel_event, arena=arena)
+            for i, frame in zip(missing, decoded):
+                frames[i] = frame
+        
+        if frame_store is not None:
+            logger.info(f"Reused {len(timestamps) - len(missing)} detection frames, decoded {len(missing)}")
+        return frames
+    
+    def extract_single_frame(self, video_path: str, timestamp: float, video_info: Optional[VideoInfo] = None, max_size: Optional[int] = None) -> Optional[FrameData]:
+        """Extract a single frame at a specific timestamp (scaled to max_size, full size if None)."""
         try:
+            # Get video dimensions (probe only if metadata wasn't passed in)
+            if video_info is None:
+                video_info = self.probe_video(video_path)
+            width, height = video_info.display_size
+            scale_filter = _scale_filter(width, height, max_size)
+            width, height = _scaled_size(width, height, max_size)
+            
             cmd = [
                 self.ffmpeg_path,
                 '-ss', str(timestamp),
                 '-i', video_path,
-                '-frames:v', '1',
+                '-frames:v', '1'
+            ]
+            if scale_filter:
+                cmd += ['-vf', scale_filter]
+            # Decode straight to BGR for OpenCV compatibility
+            cmd += [
                 '-f', 'image2pipe',
-                '-pix_fmt', 'rgb24',
+                '-pix_fmt', 'bgr24',
                 '-vcodec', 'rawvideo',
                 '-'
             ]
             
-            # Get video dimensions
-            probe_cmd = [
-                self.ffprobe_path, '-v', 'error', '-select_streams', 'v:0',
-                '-show_entries', 'stream=width,height', '-of', 'csv=s=x:p=0',
-                video_path
-            ]
-            
-            probe_result = subprocess.run(probe_cmd, capture_output=True, text=True, check=True)
-            dimensions = probe_result.stdout.strip().rstrip('x').split('x')
-            width, height = map(int, dimensions)
-            
             result = subprocess.run(cmd, capture_output=True, check=True)
             
             if result.stdout:
-                frame_array = np.frombuffer(result.stdout, dtype=np.uint8)
-                frame_array = frame_array.reshape((height, width, 3))
-                
-                # Convert RGB to BGR for OpenCV compatibility
-                frame_bgr = cv2.cvtColor(frame_array, cv2.COLOR_RGB2BGR)
+                frame_array = np.frombuffer(bytearray(result.stdout), dtype=np.uint8)
+                frame_bgr = frame_array.reshape((height, width, 3))
                 
                 return FrameData(
                     image=frame_bgr,
@@ -983,4 +1783,11 @@ LEGACY METHOD: Fill scenes (gaps between jump cuts) with frames to capture movem
             scenes[scene_id].sort(key=lambda f: f.timestamp)
         
         logger.info(f"Grouped {len(frames)} frames into {len(scenes)} scenes")
-        return scenes
\ No newline at end of file
+        return scenes
+
+def _featurize_chunk(extractor_options: Dict, video_path: str, fps: float, video_length: float, video_info: VideoInfo, decode_size: Optional[int], start_index: int, end_index: Optional[int], store_max_bytes: Optional[int]) -> Tuple[List[float], List[FrameFeatures], Optional[DetectionFrameStore]]:
+    """Detection worker entry point: featurize one chunk of the timeline with its own frame store."""
+    extractor = ViralFrameExtractor(**extractor_options)
+    chunk_store = DetectionFrameStore(1.0 / fps, store_max_bytes, extractor.frame_max_size) if store_max_bytes else None
+    sample_times, frame_features = extractor._featurize_samples(video_path, fps, video_length, video_info, decode_size, chunk_store, start_index, end_index)
+    return sample_times, frame_features, chunk_store
@@ -0,0 +1,72 @@
+"""
+Perceptual hashing for frame similarity
+Hashes are packed into uint64 words so Hamming distance is XOR + popcount
+"""
+
+import cv2
+import numpy as np
+
+PHASH_SIZE = 16
+PHASH_BITS = PHASH_SIZE * PHASH_SIZE
+DHASH_SIZE = 8
+DHASH_BITS = DHASH_SIZE * DHASH_SIZE
+
+def _pack_bits(bits: np.ndarray) -> np.ndarray:
+    """Pack a boolean array into uint64 words (zero padded to a whole word)."""
+    packed = np.packbits(bits.flatten())
+    padding = (-len(packed)) % 8
+    if padding:
+        packed = np.concatenate([packed, np.zeros(padding, dtype=np.uint8)])
+    return packed.view(np.uint64)
+
+def _popcount(words: np.ndarray) -> np.ndarray:
+    """Count set bits per row of uint64 words (last axis)."""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+    # numpy < 2.0 has no popcount ufunc, count bits over a byte view instead
+    as_bytes = np.ascontiguousarray(words).view(np.uint8)
+    return np.unpackbits(as_bytes, axis=-1).sum(axis=-1, dtype=np.int64)
+
+def perceptual_hash(image: np.ndarray, hash_size: int = PHASH_SIZE) -> np.ndarray:
+    """DCT-based perceptual hash packed into uint64 words."""
+    # Resize to 32x32 then crop to hash_size x hash_size
+    resized = cv2.resize(image, (32, 32))
+
+    # Convert to grayscale if needed
+    if len(resized.shape) == 3:
+        resized = cv2.cvtColor(resized, cv2.COLOR_RGB2GRAY)
+
+    # Keep the low frequencies of the DCT and threshold at their median
+    dct_low_freq = cv2.dct(np.float32(resized))[:hash_size, :hash_size]
+    return _pack_bits(dct_low_freq > np.median(dct_low_freq))
+
+def difference_hash(image: np.ndarray, hash_size: int = DHASH_SIZE) -> np.ndarray:
+    """Horizontal gradient hash packed into uint64 words."""
+    # Resize to (hash_size + 1) x hash_size to allow for difference calculation
+    resized = cv2.resize(image, (hash_size + 1, hash_size))
+
+    # Convert to grayscale if needed
+    if len(resized.shape) == 3:
+        resized = cv2.cvtColor(resized, cv2.COLOR_RGB2GRAY)
+
+    return _pack_bits(resized[:, 1:] > resized[:, :-1])
+
+def hamming_distance(hash1: np.ndarray, hash2: np.ndarray) -> int:
+    """Number of differing bits between two packed hashes."""
+    return int(_popcount(np.bitwise_xor(hash1, hash2)))
+
+def hash_similarity(hash1: np.ndarray, hash2: np.ndarray, n_bits: int) -> float:
+    """Similarity of two packed hashes (0-1, where 1 is identical)."""
+    return 1 - (hamming_distance(hash1, hash2) / n_bits)
+
+def adjacent_similarities(hashes: np.ndarray, n_bits: int) -> np.ndarray:
+    """
+    Similarity of every adjacent pair in an (N, words) array of packed hashes.
+
+    Returns an array of N-1 similarities where element i compares hashes i and i+1.
+    """
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    if len(hashes) < 2:
+        return np.zeros(0, dtype=np.float64)
+    distances = _popcount(np.bitwise_xor(hashes[1:], hashes[:-1]))
+    return 1 - (distances / n_bits)
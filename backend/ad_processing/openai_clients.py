@@ -0,0 +1,387 @@
+"""
+Shared OpenAI clients for Marketing App Backend
+One pooled HTTP client per process with keep-alive, optional HTTP/2 and
+client-side rate limiting driven by the API's x-ratelimit-* response headers
+"""
+
+import io
+import re
+import sys
+import json
+import time
+import base64
+import asyncio
+import logging
+import threading
+import importlib.util
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import httpx
+import openai
+from PIL import Image
+
+# Import settings
+sys.path.append(str(Path(__file__).parent.parent))
+from config.settings import settings
+
+from .token_budget import estimate_image_tokens
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_DURATION_UNITS = {'ms': 0.001, 's': 1.0, 'm': 60.0, 'h': 3600.0}
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """Seconds in an x-ratelimit-reset-* value such as '20ms', '1s' or '6m0s'."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+def retry_after_seconds(headers) -> Optional[float]:
+    """Server-requested wait from retry-after-ms or retry-after (seconds form only)."""
+    for name, scale in (('retry-after-ms', 0.001), ('retry-after', 1.0)):
+        value = headers.get(name)
+        if value:
+            try:
+                return float(value) * scale
+            except ValueError:
+                continue
+    return None
+
+CHARS_PER_TOKEN = 4             # Rough text tokenization rate for estimates
+UNKNOWN_IMAGE_TOKENS = 765      # detail=high cost of a 768x768 image, used when an image's size is unknown
+_RATE_LIMIT_COST = 'rate_limit_cost'  # Request extension holding the reserved token cost
+
+def _image_size(url: str) -> Optional[Tuple[int, int]]:
+    """(width, height) of a base64 data URL image, read from its header only."""
+    if not url.startswith('data:'):
+        return None
+    try:
+        payload = url.split(',', 1)[1][:4096]
+        header = base64.b64decode(payload[:len(payload) // 4 * 4])
+        return Image.open(io.BytesIO(header)).size
+    except Exception:
+        return None
+
+def _content_tokens(content) -> float:
+    """Estimated tokens of a message content value (string or list of parts)."""
+    if isinstance(content, str):
+        return len(content) / CHARS_PER_TOKEN
+    if not isinstance(content, list):
+        return 0.0
+    total = 0.0
+    for part in content:
+        if not isinstance(part, dict):
+            continue
+        if part.get('type') == 'image_url':
+            image = part.get('image_url') or {}
+            detail = image.get('detail', 'auto')
+            size = _image_size(image.get('url', ''))
+            if detail == 'low' or size is not None:
+                total += estimate_image_tokens(*(size or (0, 0)), detail)
+            else:
+                total += UNKNOWN_IMAGE_TOKENS
+        elif isinstance(part.get('text'), str):
+            total += len(part['text']) / CHARS_PER_TOKEN
+    return total
+
+def estimate_request_tokens(request: httpx.Request) -> int:
+    """
+    Tokens a request counts against the tokens-per-minute limit: the prompt
+    (text at ~4 characters per token plus images by the tile model) and the
+    completion allowance (max_tokens). Requests without a JSON body cost 0.
+    """
+    if not request.headers.get('content-type', '').startswith('application/json'):
+        return 0
+    try:
+        body = json.loads(request.content)
+    except Exception:
+        # Streamed bodies (e.g. multipart uploads) can't be read here
+        return 0
+    if not isinstance(body, dict):
+        return 0
+
+    prompt = sum(_content_tokens(message.get('content')) for message in body.get('messages', []) if isinstance(message, dict))
+    prompt += _content_tokens(body.get('input')) if 'input' in body else 0.0
+    completion = body.get('max_completion_tokens') or body.get('max_tokens') or body.get('max_output_tokens') or 0
+    return int(prompt) + int(completion)
+
+def _response_usage(response: httpx.Response) -> Optional[int]:
+    """Total tokens reported in a read JSON response body, if any."""
+    try:
+        usage = response.json().get('usage') or {}
+    except (ValueError, AttributeError):
+        return None
+    total = usage.get('total_tokens')
+    return int(total) if isinstance(total, (int, float)) else None
+
+def _settles_from_body(response: httpx.Response) -> bool:
+    """Whether the response body holds usage for a request that reserved tokens (not streamed)."""
+    return bool(response.request.extensions.get(_RATE_LIMIT_COST)) and response.status_code < 400 \
+        and response.headers.get('content-type', '').startswith('application/json')
+
+class TokenBucket:
+    """
+    Token bucket whose capacity and refill rate are learned from rate limit headers.
+
+    Until the first update it never blocks. Reservations are deducted up front,
+    so concurrent callers queue behind each other instead of all waking at once.
+    """
+
+    def __init__(self):
+        self.capacity: Optional[float] = None
+        self.tokens = 0.0
+        self.refill_per_second = 0.0
+        self.blocked_until = 0.0
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        if self.capacity is not None and self.refill_per_second > 0:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    def reserve(self, cost: float, now: float) -> float:
+        """Take cost tokens and return how many seconds to wait before using them."""
+        self._refill(now)
+        blocked = max(0.0, self.blocked_until - now)
+        if self.capacity is None:
+            return blocked
+        self.tokens -= cost
+        if self.tokens >= 0:
+            return blocked
+        if self.refill_per_second <= 0:
+            return max(blocked, 1.0)
+        return max(blocked, -self.tokens / self.refill_per_second)
+
+    def update(self, limit: float, remaining: float, reset_seconds: Optional[float], now: float):
+        """Resync with the server's view of the bucket."""
+        self._refill(now)
+        if self.capacity is None:
+            self.tokens = remaining
+        else:
+            # Keep local reservations still in flight that the server has not seen yet
+            self.tokens = min(self.tokens, remaining)
+        self.capacity = limit
+        if reset_seconds:
+            # reset is the time until the bucket is full again
+            self.refill_per_second = max(limit - remaining, 1.0) / reset_seconds
+        elif self.refill_per_second <= 0:
+            self.refill_per_second = limit / 60.0
+
+    def refund(self, amount: float, now: float):
+        """Return amount reserved tokens that turned out not to be used (negative takes more)."""
+        self._refill(now)
+        if self.capacity is not None:
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+    def block(self, seconds: float, now: float):
+        """Hold all reservations for seconds (after a 429)."""
+        self._refill(now)
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        if self.capacity is not None:
+            self.tokens = min(self.tokens, 0.0)
+
+class RateLimiter:
+    """
+    Client-side request and token buckets per API endpoint.
+
+    Every request reserves one request token plus its estimated token cost and
+    waits while either bucket is exhausted. Responses settle the reservation
+    against the usage they report, then resync both buckets from their
+    x-ratelimit-* headers, and a 429 pauses the endpoint for the server's retry-after.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._buckets: Dict[str, Tuple[TokenBucket, TokenBucket]] = {}
+        self._lock = threading.Lock()
+
+    def _endpoint_buckets(self, endpoint: str) -> Tuple[TokenBucket, TokenBucket]:
+        if endpoint not in self._buckets:
+            self._buckets[endpoint] = (TokenBucket(), TokenBucket())
+        return self._buckets[endpoint]
+
+    def reserve(self, endpoint: str, cost: float = 0) -> float:
+        """Seconds the next request to endpoint, estimated at cost tokens, should wait."""
+        if not self.enabled:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            requests, tokens = self._endpoint_buckets(endpoint)
+            return max(requests.reserve(1, now), tokens.reserve(cost, now))
+
+    def settle(self, endpoint: str, reserved: float, used: Optional[float]):
+        """Adjust the token bucket once a request's actual usage is known (None = keep the estimate)."""
+        if not self.enabled or used is None:
+            return
+        with self._lock:
+            _, tokens = self._endpoint_buckets(endpoint)
+            tokens.refund(reserved - used, time.monotonic())
+
+    def update(self, endpoint: str, headers, status_code: int, reserved: float = 0):
+        """Resync endpoint buckets from a response to a request that reserved tokens."""
+        if not self.enabled:
+            return
+        with self._lock:
+            now = time.monotonic()
+            requests, tokens = self._endpoint_buckets(endpoint)
+            if status_code >= 400:
+                # Rejected requests consume no tokens
+                tokens.refund(reserved, now)
+            for bucket, kind in ((requests, 'requests'), (tokens, 'tokens')):
+                try:
+                    limit = float(headers[f'x-ratelimit-limit-{kind}'])
+                    remaining = float(headers[f'x-ratelimit-remaining-{kind}'])
+                except (KeyError, ValueError):
+                    continue
+                bucket.update(limit, remaining, parse_reset_duration(headers.get(f'x-ratelimit-reset-{kind}')), now)
+
+            if status_code == 429:
+                wait = retry_after_seconds(headers)
+                if wait is None:
+                    wait = parse_reset_duration(headers.get('x-ratelimit-reset-requests')) or 1.0
+                requests.block(wait, now)
+                tokens.block(wait, now)
+                logger.warning(f"Rate limited on {endpoint}, pausing requests for {wait:.2f}s")
+
+    def wait(self, endpoint: str, cost: float = 0):
+        delay = self.reserve(endpoint, cost)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self, endpoint: str, cost: float = 0):
+        delay = self.reserve(endpoint, cost)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+_rate_limiter = RateLimiter(enabled=settings.OPENAI_RATE_LIMIT_ENABLED)
+
+def get_rate_limiter() -> RateLimiter:
+    """Process-wide rate limiter shared by the sync and async clients."""
+    return _rate_limiter
+
+def _http_client_options() -> dict:
+    """Connection pool, protocol and timeout options shared by both clients."""
+    http2 = settings.OPENAI_HTTP2
+    if http2 and importlib.util.find_spec('h2') is None:
+        logger.warning("HTTP/2 requested for OpenAI but the 'h2' package is not installed, using HTTP/1.1")
+        http2 = False
+
+    return {
+        'http2': http2,
+        'timeout': httpx.Timeout(settings.OPENAI_TIMEOUT, connect=10.0),
+        'limits': httpx.Limits(
+            max_connections=settings.OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY
+        ),
+    }
+
+def _build_async_http_client(limiter: Optional[RateLimiter] = None, transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    """Pooled async client whose requests pass through limiter (the shared one if None)."""
+    limiter = limiter or get_rate_limiter()
+
+    async def on_request(request):
+        cost = estimate_request_tokens(request) if limiter.enabled else 0
+        request.extensions[_RATE_LIMIT_COST] = cost
+        await limiter.wait_async(request.url.path, cost)
+
+    async def on_response(response):
+        endpoint = response.request.url.path
+        reserved = response.request.extensions.get(_RATE_LIMIT_COST, 0)
+        if _settles_from_body(response):
+            await response.aread()
+            limiter.settle(endpoint, reserved, _response_usage(response))
+        limiter.update(endpoint, response.headers, response.status_code, reserved)
+
+    options = _http_client_options()
+    if transport is not None:
+        options['transport'] = transport
+    return openai.DefaultAsyncHttpxClient(
+        event_hooks={'request': [on_request], 'response': [on_response]},
+        **options
+    )
+
+def _build_http_client(limiter: Optional[RateLimiter] = None, transport: Optional[httpx.BaseTransport] = None) -> httpx.Client:
+    """Pooled sync client whose requests pass through limiter (the shared one if None)."""
+    limiter = limiter or get_rate_limiter()
+
+    def on_request(request):
+        cost = estimate_request_tokens(request) if limiter.enabled else 0
+        request.extensions[_RATE_LIMIT_COST] = cost
+        limiter.wait(request.url.path, cost)
+
+    def on_response(response):
+        endpoint = response.request.url.path
+        reserved = response.request.extensions.get(_RATE_LIMIT_COST, 0)
+        if _settles_from_body(response):
+            response.read()
+            limiter.settle(endpoint, reserved, _response_usage(response))
+        limiter.update(endpoint, response.headers, response.status_code, reserved)
+
+    options = _http_client_options()
+    if transport is not None:
+        options['transport'] = transport
+    return openai.DefaultHttpxClient(
+        event_hooks={'request': [on_request], 'response': [on_response]},
+        **options
+    )
+
+_async_clients: Dict[str, openai.AsyncOpenAI] = {}
+_sync_clients: Dict[str, openai.OpenAI] = {}
+_clients_lock = threading.Lock()
+
+def get_async_openai_client(api_key: str = None) -> openai.AsyncOpenAI:
+    """
+    Shared AsyncOpenAI client for api_key (uses OPENAI_API_KEY if None).
+
+    Retries use the SDK's exponential backoff with jitter, and every attempt
+    passes through the shared rate limiter. Point OPENAI_BASE_URL at a local
+    mock server to exercise it offline.
+    """
+    api_key = api_key or settings.OPENAI_API_KEY
+    with _clients_lock:
+        if api_key not in _async_clients:
+            _async_clients[api_key] = openai.AsyncOpenAI(
+                api_key=api_key,
+                base_url=settings.OPENAI_BASE_URL,
+                max_retries=settings.OPENAI_MAX_RETRIES,
+                timeout=settings.OPENAI_TIMEOUT,
+                http_client=_build_async_http_client()
+            )
+        return _async_clients[api_key]
+
+def get_openai_client(api_key: str = None) -> openai.OpenAI:
+    """Shared synchronous OpenAI client for api_key (uses OPENAI_API_KEY if None)."""
+    api_key = api_key or settings.OPENAI_API_KEY
+    with _clients_lock:
+        if api_key not in _sync_clients:
+            _sync_clients[api_key] = openai.OpenAI(
+                api_key=api_key,
+                base_url=settings.OPENAI_BASE_URL,
+                max_retries=settings.OPENAI_MAX_RETRIES,
+                timeout=settings.OPENAI_TIMEOUT,
+                http_client=_build_http_client()
+            )
+        return _sync_clients[api_key]
+
+async def close_openai_clients():
+    """Close pooled connections of every shared client (server shutdown)."""
+    with _clients_lock:
+        async_clients = list(_async_clients.values())
+        sync_clients = list(_sync_clients.values())
+        _async_clients.clear()
+        _sync_clients.clear()
+    for client in async_clients:
+        await client.close()
+    for client in sync_clients:
+        client.close()
@@ -0,0 +1,194 @@
+"""
+Progressive downloads for Marketing App Backend
+Lets decoding follow a video file while the downloader is still writing it
+"""
+
+import os
+import time
+import struct
+import logging
+import threading
+from concurrent.futures import Executor, Future
+from typing import Callable, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Layouts ffmpeg can decode from a non-seekable pipe as bytes arrive
+STREAMABLE_LAYOUTS = ('faststart', 'fragmented', 'matroska')
+
+_MATROSKA_MAGIC = b'\x1a\x45\xdf\xa3'
+
+def container_layout(path: str) -> Optional[str]:
+    """
+    Classify a (possibly partial) video file by its top-level box order.
+
+    Returns:
+        'faststart' (moov before mdat), 'fragmented' (moof fragments),
+        'moov_at_end' (mdat first, needs the whole file), 'matroska',
+        'unknown' (not an MP4/Matroska file), or None if not enough bytes
+        have arrived to tell yet.
+    """
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return None
+
+    with f:
+        file_size = os.fstat(f.fileno()).st_size
+        if file_size < 8:
+            return None
+        if f.read(4) == _MATROSKA_MAGIC:
+            return 'matroska'
+
+        offset = 0
+        seen_moov = False
+        while offset + 8 <= file_size:
+            f.seek(offset)
+            header = f.read(16)
+            size, box_type = struct.unpack('>I4s', header[:8])
+            if size == 1:
+                if len(header) < 16:
+                    return None
+                size = struct.unpack('>Q', header[8:16])[0]
+            elif size == 0:
+                size = file_size - offset  # Box runs to the end of the file
+
+            if offset == 0 and box_type not in (b'ftyp', b'styp', b'moov', b'free', b'skip', b'wide'):
+                return 'unknown'
+            if size < 8:
+                return 'unknown'
+
+            if box_type == b'moof':
+                return 'fragmented'
+            if box_type == b'mdat':
+                return 'faststart' if seen_moov else 'moov_at_end'
+            if box_type == b'moov':
+                seen_moov = True
+            offset += size
+
+    return None
+
+class GrowingFileReader:
+    """
+    Read-only file object that follows a file while it is being written.
+
+    read() blocks until more bytes arrive and only returns b'' once the
+    writer has signalled completion and everything has been read.
+    """
+
+    def __init__(self, path: str, finished: threading.Event, poll_interval: float = 0.05):
+        self._file = open(path, 'rb')
+        self._finished = finished
+        self.poll_interval = poll_interval
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        while True:
+            # Check completion before reading so the final bytes are never missed
+            finished = self._finished.is_set()
+            data = self._file.read(size)
+            if data or finished:
+                self.bytes_read += len(data)
+                return data
+            time.sleep(self.poll_interval)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class ProgressiveDownload:
+    """
+    Runs a blocking download into path and exposes the file while it grows.
+
+    The downloader may write path directly or write path + '.part' and rename
+    it when done (as yt-dlp does). Readers opened on the .part file keep
+    following it through the rename.
+    """
+
+    def __init__(self, download: Callable[[], None], path: str, executor: Optional[Executor] = None, poll_interval: float = 0.05):
+        """
+        Args:
+            download: Blocking callable that writes the video to path; its return
+                value becomes the result of future
+            path: Final path of the downloaded file
+            executor: Pool to run the download on (a dedicated thread if None)
+            poll_interval: Seconds between checks for new bytes
+        """
+        self.path = path
+        self.part_path = path + '.part'
+        self.poll_interval = poll_interval
+        self.finished = threading.Event()
+        self.error: Optional[BaseException] = None
+        self._download = download
+
+        if executor is not None:
+            self.future = executor.submit(self._run)
+        else:
+            self.future = Future()
+            threading.Thread(target=self._run_into_future, name='progressive-download', daemon=True).start()
+
+    def _run(self):
+        try:
+            return self._download()
+        except BaseException as e:
+            self.error = e
+            raise
+        finally:
+            self.finished.set()
+
+    def _run_into_future(self):
+        try:
+            self.future.set_result(self._run())
+        except BaseException as e:
+            self.future.set_exception(e)
+
+    def wait(self, timeout: Optional[float] = None):
+        """Block until the download finishes, re-raising its error."""
+        if not self.finished.wait(timeout):
+            raise TimeoutError(f"Download of {self.path} did not finish within {timeout}s")
+        if self.error is not None:
+            raise self.error
+
+    def current_path(self) -> Optional[str]:
+        """Path holding the bytes downloaded so far, or None if nothing exists yet."""
+        if self.finished.is_set() or os.path.exists(self.path):
+            return self.path if os.path.exists(self.path) else None
+        return self.part_path if os.path.exists(self.part_path) else None
+
+    def wait_for_layout(self, timeout: float) -> Optional[str]:
+        """
+        Wait until enough of the file has arrived to classify its layout.
+
+        Returns the container_layout result, or None if the download finished
+        without a file or the timeout passed first.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            finished = self.finished.is_set()
+            path = self.current_path()
+            layout = container_layout(path) if path else None
+            if layout is not None or finished:
+                return layout
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+    def open_stream(self) -> GrowingFileReader:
+        """Reader over the whole file that follows it until the download finishes."""
+        while True:
+            path = self.current_path()
+            if path is not None:
+                try:
+                    return GrowingFileReader(path, self.finished, self.poll_interval)
+                except FileNotFoundError:
+                    # .part was renamed between the check and the open
+                    continue
+            if self.finished.is_set():
+                raise FileNotFoundError(f"Download produced no file at {self.path}")
+            time.sleep(self.poll_interval)
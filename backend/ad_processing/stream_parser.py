@@ -0,0 +1,107 @@
+"""
+Incremental JSON parsing for streamed analysis responses
+Emits each element of the top-level "chunks" array as soon as it is complete
+"""
+
+import json
+import logging
+from typing import Dict, List, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class ChunkStreamParser:
+    """
+    Scans a JSON object as it arrives in text deltas and returns the elements
+    of its top-level array under array_key the moment each one closes.
+
+    The full text is kept so the complete document can be parsed at the end.
+    """
+
+    def __init__(self, array_key: str = 'chunks'):
+        """
+        Args:
+            array_key: Key of the top-level array whose elements are emitted
+        """
+        self.array_key = array_key
+        self._parts: List[str] = []
+        self._element: List[str] = []      # Text of the array element being collected
+        self._stack: List[str] = []        # Open containers: '{' or '['
+        self._in_string = False
+        self._escaped = False
+        self._string: List[str] = []       # Current top-level string (possible key)
+        self._last_string: Optional[str] = None
+        self._current_key: Optional[str] = None
+        self._array_depth: Optional[int] = None  # Stack depth inside the target array
+        self.emitted = 0
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        return ''.join(self._parts)
+
+    def _collecting(self) -> bool:
+        return self._array_depth is not None and len(self._stack) > self._array_depth
+
+    def feed(self, delta: str) -> List[Dict]:
+        """Consume a text delta and return the array elements completed by it."""
+        self._parts.append(delta)
+        completed = []
+
+        for char in delta:
+            collecting = self._collecting()
+
+            if self._in_string:
+                if collecting:
+                    self._element.append(char)
+                elif len(self._stack) == 1:
+                    self._string.append(char)
+
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if not collecting and len(self._stack) == 1:
+                        # Drop the closing quote; escapes in keys are not expected
+                        self._last_string = ''.join(self._string[:-1])
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string = []
+            elif char == ':' and len(self._stack) == 1:
+                self._current_key = self._last_string
+            elif char in '{[':
+                self._stack.append(char)
+                if char == '[' and len(self._stack) == 2 and self._current_key == self.array_key:
+                    self._array_depth = 2
+                    continue
+            elif char in '}]':
+                if self._stack:
+                    self._stack.pop()
+                if self._array_depth is not None and len(self._stack) < self._array_depth:
+                    # Target array closed
+                    self._array_depth = None
+                    self._current_key = None
+
+            if collecting or self._collecting():
+                self._element.append(char)
+                if char in '}]' and self._array_depth is not None and len(self._stack) == self._array_depth:
+                    element = self._finish_element()
+                    if element is not None:
+                        completed.append(element)
+
+        return completed
+
+    def _finish_element(self) -> Optional[Dict]:
+        text = ''.join(self._element).strip()
+        self._element = []
+        try:
+            element = json.loads(text)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Could not parse streamed {self.array_key} element: {e}")
+            return None
+        self.emitted += 1
+        return element
@@ -0,0 +1,106 @@
+"""
+Vision token budgeting for Marketing App Backend
+Estimates image token cost with the tile model from debug/estimate_tokens.py
+and picks each frame's detail level to fit a per-request budget
+"""
+
+import math
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from .frame_extractor import FrameData
+from .frame_encoder import EncodeProfile
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+LOW_DETAIL_TOKENS = 85      # Flat cost of a detail=low image (also the base cost of high)
+TILE_TOKENS = 170           # Cost per 512x512 tile at detail=high
+TILE_SIZE = 512
+
+def estimate_image_tokens(width: int, height: int, detail: str = 'high') -> int:
+    """
+    Estimate vision tokens for one image.
+
+    detail=low is a flat 85 tokens. For high (and auto) the image is fit
+    within 2048x2048, its shortest side scaled down to 768, and then costs
+    85 + 170 per 512x512 tile.
+    """
+    if detail == 'low':
+        return LOW_DETAIL_TOKENS
+
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+
+    tiles = math.ceil(width / TILE_SIZE) * math.ceil(height / TILE_SIZE)
+    return LOW_DETAIL_TOKENS + TILE_TOKENS * tiles
+
+@dataclass
+class FramePlan:
+    """How one frame is sent to the vision model"""
+    detail: str                 # 'low' or 'high'
+    profile: str                # Encode profile name
+    estimated_tokens: int
+
+def _frame_plan(frame: FrameData, detail: str, profiles: Dict[str, EncodeProfile], detail_profiles: Dict[str, str]) -> FramePlan:
+    profile_name = detail_profiles[detail]
+    height, width = frame.image.shape[:2]
+    width, height = profiles[profile_name].output_size(width, height)
+    return FramePlan(detail=detail, profile=profile_name, estimated_tokens=estimate_image_tokens(width, height, detail))
+
+def plan_frame_details(
+    frames: List[FrameData],
+    token_budget: int,
+    frame_details: Dict[str, str],
+    detail_profiles: Dict[str, str],
+    profiles: Dict[str, EncodeProfile]
+) -> Tuple[List[FramePlan], int]:
+    """
+    Choose detail level and encode profile per frame so image tokens stay within token_budget.
+
+    Frames start at the detail configured for their frame_type. If that is over
+    budget, high detail frames are downgraded to low starting with the least
+    distinct ones (highest similarity_score, then latest). Every frame is kept
+    because the analysis returns one chunk per frame, so the budget can still be
+    exceeded when all frames are low detail.
+
+    Args:
+        frames: Frames in the order they will be sent
+        token_budget: Maximum image tokens (0 = no limit)
+        frame_details: Detail level by frame_type (unknown types use 'high')
+        detail_profiles: Encode profile name by detail level
+        profiles: Encode profiles by name
+
+    Returns:
+        tuple: (plans in frame order, estimated image tokens)
+    """
+    plans = [
+        _frame_plan(frame, frame_details.get(frame.frame_type, 'high'), profiles, detail_profiles)
+        for frame in frames
+    ]
+    total = sum(plan.estimated_tokens for plan in plans)
+
+    if token_budget and total > token_budget:
+        high_detail = [i for i, plan in enumerate(plans) if plan.detail == 'high']
+        # Frames with similarity_score of None count as 1.0 (least distinct)
+        high_detail.sort(
+            key=lambda i: (frames[i].similarity_score if frames[i].similarity_score is not None else 1.0, frames[i].timestamp),
+            reverse=True
+        )
+        downgraded = 0
+        for i in high_detail:
+            if total <= token_budget:
+                break
+            low_plan = _frame_plan(frames[i], 'low', profiles, detail_profiles)
+            total -= plans[i].estimated_tokens - low_plan.estimated_tokens
+            plans[i] = low_plan
+            downgraded += 1
+
+        logger.info(f"Downgraded {downgraded} frames to low detail to fit {token_budget} image token budget")
+        if total > token_budget:
+            logger.warning(f"Image tokens ({total}) exceed budget ({token_budget}) even at low detail")
+
+    return plans, total
@@ -1,50 +1,121 @@
 import os
-import base64
+import binascii
 import tempfile
 import subprocess
+from contextlib import contextmanager
 from pathlib import Path
-import yt_dlp
+from typing import BinaryIO, Iterator, Optional, Tuple
 
 # Import settings
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
 from config.settings import settings
+from .video_info import VideoInfo, probe_video
+from .ytdlp_service import YtDlpDownloader, get_ytdlp_downloader
+
+# Codecs an MP4 under the size limit can keep without re-encoding
+REMUXABLE_VIDEO_CODECS = ('h264',)
+# Share of the size budget given to the streams (the rest covers MP4 overhead)
+SIZE_SAFETY_MARGIN = 0.95
+# Sanity floor only; the size limit wins over picture quality
+MIN_VIDEO_BITRATE = 20000
+# Below this video bitrate the encode also drops to 480p and 20 fps
+LOW_BITRATE_THRESHOLD = 300000
+
+VIDEO_DATA_URL_PREFIX = 'data:video/mp4;base64,'
+# Raw bytes per base64 chunk; a multiple of 3 so chunks concatenate without padding
+BASE64_CHUNK_SIZE = 3 * 64 * 1024
+
+def base64_length(size: int) -> int:
+    """Length of the padded base64 encoding of size bytes"""
+    return (size + 2) // 3 * 4
+
+def _read_fully(f: BinaryIO, view: memoryview) -> int:
+    """Fill view from f, stopping early only at end of file"""
+    filled = 0
+    while filled < len(view):
+        n = f.readinto(view[filled:])
+        if not n:
+            break
+        filled += n
+    return filled
+
+def iter_file_base64(path: str, chunk_size: int = BASE64_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Yield the base64 encoding of a file as ASCII bytes, reading chunk_size
+    bytes at a time into one reused buffer.
+    """
+    if chunk_size % 3:
+        raise ValueError(f"chunk_size must be a multiple of 3, got {chunk_size}")
+    buffer = memoryview(bytearray(chunk_size))
+    with open(path, 'rb') as f:
+        while True:
+            n = _read_fully(f, buffer)
+            if not n:
+                break
+            yield binascii.b2a_base64(buffer[:n], newline=False)
 
 
 class VideoCompressor:
-    def __init__(self, max_size_mb=None):
+    def __init__(self, max_size_mb=None, downloader: Optional[YtDlpDownloader] = None):
         self.max_size_mb = max_size_mb if max_size_mb is not None else settings.MAX_VIDEO_SIZE_MB
         self.max_size_bytes = self.max_size_mb * 1024 * 1024
+        self.downloader = downloader or get_ytdlp_downloader()
         
     def download_and_compress_video(self, url: str) -> str:
         """
         Download video from URL and compress to base64 (max 5MB)
         Returns base64 encoded video string
         """
+        with self._compressed_video(url) as compressed_path:
+            return self._video_to_base64(compressed_path)
+    
+    def download_and_compress_video_bytes(self, url: str) -> memoryview:
+        """
+        Download video from URL and compress it, returning the raw MP4 bytes
+        for callers that don't need base64 (one copy of the file in memory)
+        """
+        with self._compressed_video(url) as compressed_path:
+            return self._video_to_bytes(compressed_path)
+    
+    def iter_compressed_video_base64(self, url: str, data_url: bool = True, chunk_size: int = BASE64_CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        Download and compress video from URL, then yield its base64 encoding
+        in ASCII chunks with constant memory use.
+        
+        The chunks concatenate into the same text download_and_compress_video
+        returns (with data_url), so they can be passed straight to an HTTP
+        response body such as FastAPI's StreamingResponse.
+        """
+        with self._compressed_video(url) as compressed_path:
+            if data_url:
+                yield VIDEO_DATA_URL_PREFIX.encode('ascii')
+            yield from iter_file_base64(compressed_path, chunk_size)
+    
+    def write_compressed_video_base64(self, url: str, sink: BinaryIO, data_url: bool = True) -> int:
+        """Stream the base64 encoding into a binary file-like sink; returns the number of bytes written"""
+        written = 0
+        for chunk in self.iter_compressed_video_base64(url, data_url):
+            sink.write(chunk)
+            written += len(chunk)
+        return written
+    
+    @contextmanager
+    def _compressed_video(self, url: str) -> Iterator[str]:
+        """Path of the downloaded and compressed video, valid until the context exits"""
         with tempfile.TemporaryDirectory() as temp_dir:
             # Step 1: Download video
             download_path = self._download_video(url, temp_dir)
             
-            # Step 2: Compress video to target size
-            compressed_path = self._compress_video(download_path, temp_dir)
-            
-            # Step 3: Convert to base64
-            base64_video = self._video_to_base64(compressed_path)
-            
-            return base64_video
+            # Step 2: Probe once, then compress video to target size
+            video_info = self._probe_video(download_path)
+            yield self._compress_video(download_path, temp_dir, video_info)
     
     def _download_video(self, url: str, temp_dir: str) -> str:
-        """Download video using yt-dlp"""
+        """Download video using the shared yt-dlp service"""
         output_path = os.path.join(temp_dir, 'downloaded_video.%(ext)s')
         
-        ydl_opts = {
-            'format': 'best[height<=720][ext=mp4]/best[ext=mp4]/best',
-            'outtmpl': output_path,
-            'no_warnings': True,
-        }
-        
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
+        self.downloader.download(url, output_path)
         
         # Find the downloaded file
         for file in os.listdir(temp_dir):
@@ -53,107 +124,150 @@ class VideoCompressor:
         
         raise Exception("Download failed - no file found")
     
-    def _compress_video(self, input_path: str, temp_dir: str) -> str:
-        """Compress video to target size using ffmpeg"""
-        output_path = os.path.join(temp_dir, 'compressed_video.mp4')
+    def _compress_video(self, input_path: str, temp_dir: str, video_info: Optional[VideoInfo] = None) -> str:
+        """
+        Fit the video under max_size_bytes.
         
-        # Get video duration first
-        duration = self._get_video_duration(input_path)
+        An H.264 input that already fits is remuxed without re-encoding;
+        anything else gets one bitrate-targeted encode (two-pass by default)
+        sized from the probed duration.
+        """
+        if video_info is None:
+            video_info = self._probe_video(input_path)
         
-        # Calculate target bitrate for desired file size
-        # Formula: bitrate = (target_size_bits / duration_seconds) * 0.8 (80% for video, 20% for audio)
-        target_bitrate = int((self.max_size_bytes * 8 / duration) * 0.8)
+        # Fast path: already small enough and in a codec the output can carry as-is
+        if video_info is not None and video_info.codec in REMUXABLE_VIDEO_CODECS and os.path.getsize(input_path) <= self.max_size_bytes:
+            remuxed_path = self._remux(input_path, temp_dir)
+            if remuxed_path is not None:
+                return remuxed_path
         
-        # Ensure minimum quality
-        target_bitrate = max(target_bitrate, 200000)  # Min 200k bitrate
+        duration = self._get_video_duration(input_path, video_info)
+        has_audio = video_info.has_audio if video_info is not None else True
+        video_bitrate, audio_bitrate = self._target_bitrates(duration, has_audio)
+        output_path = self._encode_to_bitrate(input_path, temp_dir, video_bitrate, audio_bitrate, video_info)
         
-        # Compress with ffmpeg
+        # Rate control can still overshoot slightly; correct it once with a scaled bitrate
+        file_size = os.path.getsize(output_path)
+        if file_size > self.max_size_bytes:
+            video_bitrate = int(video_bitrate * self.max_size_bytes / file_size * 0.9)
+            output_path = self._encode_to_bitrate(input_path, temp_dir, video_bitrate, audio_bitrate, video_info)
+        
+        return output_path
+    
+    def _remux(self, input_path: str, temp_dir: str) -> Optional[str]:
+        """Copy streams into a faststart MP4 without re-encoding, or None if that fails or grows past the limit"""
+        output_path = os.path.join(temp_dir, 'remuxed_video.mp4')
         cmd = [
             'ffmpeg', '-i', input_path,
-            '-c:v', 'libx264',
-            '-b:v', f'{target_bitrate}',
-            '-c:a', 'aac',
-            '-b:a', '64k',
-            '-preset', 'medium',
-            '-crf', '28',
-            '-maxrate', f'{int(target_bitrate * 1.2)}',
-            '-bufsize', f'{int(target_bitrate * 2)}',
-            '-vf', 'scale=640:360',  # Reduce resolution to help with size
-            '-y',  # Overwrite output
+            '-map', '0:v:0', '-map', '0:a:0?',
+            '-c', 'copy',
+            '-movflags', '+faststart',
+            '-y',
             output_path
         ]
         
         result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            raise Exception(f"FFmpeg compression failed: {result.stderr}")
-        
-        # Check if file size is acceptable
-        file_size = os.path.getsize(output_path)
-        if file_size > self.max_size_bytes:
-            # If still too large, try more aggressive compression
-            return self._aggressive_compress(input_path, temp_dir)
-        
+        if result.returncode != 0 or os.path.getsize(output_path) > self.max_size_bytes:
+            return None
         return output_path
     
-    def _aggressive_compress(self, input_path: str, temp_dir: str) -> str:
-        """More aggressive compression if initial attempt was too large"""
-        output_path = os.path.join(temp_dir, 'compressed_aggressive.mp4')
+    def _target_bitrates(self, duration: float, has_audio: bool) -> Tuple[int, int]:
+        """(video, audio) bits per second that fill max_size_bytes over duration"""
+        # Leave room for container overhead and rate control variance
+        total_bitrate = self.max_size_bytes * 8 * SIZE_SAFETY_MARGIN / duration
+        audio_bitrate = settings.COMPRESSION_AUDIO_BITRATE_KBPS * 1000 if has_audio else 0
+        # Very long videos give audio a smaller share instead of starving the picture
+        audio_bitrate = min(audio_bitrate, int(total_bitrate * 0.25))
+        video_bitrate = max(int(total_bitrate - audio_bitrate), MIN_VIDEO_BITRATE)
+        return video_bitrate, audio_bitrate
+    
+    def _encode_to_bitrate(self, input_path: str, temp_dir: str, video_bitrate: int, audio_bitrate: int, video_info: Optional[VideoInfo] = None) -> str:
+        """
+        libx264 encode at video_bitrate. With COMPRESSION_TWO_PASS a first,
+        video-only analysis pass lets the second land close to the target;
+        otherwise a single ABR pass is run.
+        """
+        output_path = os.path.join(temp_dir, 'compressed_video.mp4')
+        passlog = os.path.join(temp_dir, 'x264_pass')
         
-        duration = self._get_video_duration(input_path)
-        target_bitrate = int((self.max_size_bytes * 8 / duration) * 0.7)  # 70% for video
-        target_bitrate = max(target_bitrate, 100000)  # Min 100k bitrate
+        # Cap the longer side, keeping aspect ratio for portrait and landscape alike
+        max_dimension = settings.COMPRESSION_MAX_DIMENSION
+        if video_bitrate < LOW_BITRATE_THRESHOLD:
+            max_dimension = min(max_dimension, 480)
+        filters = [
+            f"scale='if(gte(iw,ih),min({max_dimension},iw),-2)':'if(gte(iw,ih),-2,min({max_dimension},ih))'"
+        ]
+        if video_bitrate < LOW_BITRATE_THRESHOLD and (video_info is None or video_info.fps > 20):
+            filters.append('fps=20')
         
-        cmd = [
-            'ffmpeg', '-i', input_path,
+        video_args = [
             '-c:v', 'libx264',
-            '-b:v', f'{target_bitrate}',
-            '-c:a', 'aac',
-            '-b:a', '32k',  # Lower audio bitrate
-            '-preset', 'fast',
-            '-crf', '32',   # Higher CRF (lower quality)
-            '-maxrate', f'{target_bitrate}',
-            '-bufsize', f'{int(target_bitrate * 1.5)}',
-            '-vf', 'scale=480:270',  # Even smaller resolution
-            '-r', '20',     # Reduce framerate to 20fps
-            '-y',
-            output_path
+            '-preset', settings.COMPRESSION_PRESET,
+            '-b:v', f'{video_bitrate}',
+            '-maxrate', f'{int(video_bitrate * 1.5)}',
+            '-bufsize', f'{int(video_bitrate * 2)}',
+            '-vf', ','.join(filters),
+            '-pix_fmt', 'yuv420p',
         ]
+        audio_args = ['-c:a', 'aac', '-b:a', f'{audio_bitrate}'] if audio_bitrate else ['-an']
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        if settings.COMPRESSION_TWO_PASS:
+            pass_args = ['-passlogfile', passlog]
+            passes = [
+                ['ffmpeg', '-y', '-i', input_path, *video_args, *pass_args, '-pass', '1', '-an', '-f', 'null', os.devnull],
+                ['ffmpeg', '-y', '-i', input_path, *video_args, *pass_args, '-pass', '2', *audio_args, '-movflags', '+faststart', output_path],
+            ]
+        else:
+            passes = [
+                ['ffmpeg', '-y', '-i', input_path, *video_args, *audio_args, '-movflags', '+faststart', output_path],
+            ]
         
-        if result.returncode != 0:
-            raise Exception(f"Aggressive compression failed: {result.stderr}")
+        for cmd in passes:
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            if result.returncode != 0:
+                raise Exception(f"FFmpeg compression failed: {result.stderr}")
         
         return output_path
     
-    def _get_video_duration(self, video_path: str) -> float:
+    def _probe_video(self, video_path: str) -> Optional[VideoInfo]:
+        """Probe video metadata, returning None if ffprobe fails"""
+        try:
+            return probe_video(video_path)
+        except ValueError:
+            return None
+    
+    def _get_video_duration(self, video_path: str, video_info: Optional[VideoInfo] = None) -> float:
         """Get video duration in seconds"""
-        cmd = [
-            'ffprobe', '-v', 'quiet', '-print_format', 'json',
-            '-show_format', video_path
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        if video_info is None:
+            video_info = self._probe_video(video_path)
         
-        if result.returncode != 0:
+        if video_info is None or video_info.duration <= 0:
+            print(f"⚠️ Could not probe duration of {video_path}, assuming 30s", flush=True)
             return 30.0  # Default fallback
         
-        try:
-            import json
-            data = json.loads(result.stdout)
-            return float(data['format']['duration'])
-        except:
-            return 30.0
+        return video_info.duration
     
     def _video_to_base64(self, video_path: str) -> str:
-        """Convert video file to base64 string"""
+        """Convert video file to a base64 data URL string"""
+        # Encode chunk by chunk into one buffer of the exact final size instead of
+        # holding the raw file, its base64 bytes and the formatted string at once
+        prefix = VIDEO_DATA_URL_PREFIX.encode('ascii')
+        encoded = bytearray(len(prefix) + base64_length(os.path.getsize(video_path)))
+        encoded[:len(prefix)] = prefix
+        offset = len(prefix)
+        for chunk in iter_file_base64(video_path):
+            encoded[offset:offset + len(chunk)] = chunk
+            offset += len(chunk)
+        # Trim in place in case the file shrank while being read
+        del encoded[offset:]
+        return encoded.decode('ascii')
+    
+    def _video_to_bytes(self, video_path: str) -> memoryview:
+        """Read a video file into a single exactly sized buffer"""
+        buffer = bytearray(os.path.getsize(video_path))
         with open(video_path, 'rb') as video_file:
-            video_data = video_file.read()
-            base64_data = base64.b64encode(video_data).decode('utf-8')
-            
-            # Add data URL prefix for video
-            return f"data:video/mp4;base64,{base64_data}"
+            size = _read_fully(video_file, memoryview(buffer))
+        return memoryview(buffer)[:size]
 
 
 # Test function
@@ -0,0 +1,107 @@
+"""
+Video metadata probing for Marketing App Backend
+Runs ffprobe once per file so every pipeline stage can share the result
+"""
+
+import json
+import logging
+import subprocess
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class VideoInfo:
+    """Container for video metadata probed from a file"""
+    path: str
+    duration: float             # Container duration (seconds)
+    width: int                  # Coded width of the first video stream
+    height: int                 # Coded height of the first video stream
+    fps: float                  # Average frame rate
+    codec: Optional[str]        # Video codec name (e.g. 'h264')
+    rotation: int = 0           # Display rotation in degrees
+    has_audio: bool = False     # Whether the file has an audio stream
+    start_time: float = 0.0     # Container start time (seconds)
+
+    @property
+    def display_size(self) -> Tuple[int, int]:
+        """(width, height) of decoded frames after ffmpeg applies rotation"""
+        if self.rotation % 180 == 90:
+            return self.height, self.width
+        return self.width, self.height
+
+def _parse_frame_rate(rate: Optional[str]) -> float:
+    """Parse an ffprobe rational frame rate like '30000/1001'."""
+    if not rate:
+        return 0.0
+    try:
+        if '/' in rate:
+            num, den = rate.split('/', 1)
+            return float(num) / float(den) if float(den) else 0.0
+        return float(rate)
+    except ValueError:
+        return 0.0
+
+def _parse_rotation(stream: Dict) -> int:
+    """Read display rotation from stream tags or display matrix side data."""
+    rotation = stream.get('tags', {}).get('rotate')
+    if rotation is None:
+        for side_data in stream.get('side_data_list', []):
+            if 'rotation' in side_data:
+                rotation = side_data['rotation']
+                break
+    try:
+        return int(float(rotation)) % 360 if rotation is not None else 0
+    except ValueError:
+        return 0
+
+def probe_video(video_path: str, ffprobe_path: str = 'ffprobe') -> VideoInfo:
+    """
+    Probe video metadata with a single ffprobe JSON call.
+
+    Raises:
+        ValueError: If the file cannot be probed or has no video stream
+    """
+    cmd = [
+        ffprobe_path, '-v', 'error',
+        '-print_format', 'json',
+        '-show_format', '-show_streams',
+        video_path
+    ]
+
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        data = json.loads(result.stdout)
+    except (subprocess.CalledProcessError, json.JSONDecodeError) as e:
+        raise ValueError(f"Could not probe video {video_path}: {e}")
+
+    streams = data.get('streams', [])
+    video_stream = next((s for s in streams if s.get('codec_type') == 'video'), None)
+    if video_stream is None:
+        raise ValueError(f"No video stream found in {video_path}")
+
+    format_info = data.get('format', {})
+    duration = format_info.get('duration') or video_stream.get('duration')
+    if duration is None:
+        raise ValueError(f"Could not determine duration of {video_path}")
+
+    fps = _parse_frame_rate(video_stream.get('avg_frame_rate'))
+    if fps <= 0:
+        fps = _parse_frame_rate(video_stream.get('r_frame_rate'))
+
+    info = VideoInfo(
+        path=video_path,
+        duration=float(duration),
+        width=int(video_stream['width']),
+        height=int(video_stream['height']),
+        fps=fps,
+        codec=video_stream.get('codec_name'),
+        rotation=_parse_rotation(video_stream),
+        has_audio=any(s.get('codec_type') == 'audio' for s in streams),
+        start_time=float(format_info.get('start_time') or 0.0)
+    )
+
+    logger.debug(f"Probed {video_path}: {info}")
+    return info
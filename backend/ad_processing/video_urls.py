@@ -0,0 +1,99 @@
+"""
+Video URL canonicalization for Marketing App Backend
+Maps the many URL shapes of one Instagram, TikTok or YouTube video to a single key
+"""
+
+import re
+from typing import Optional
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+# Instagram: /p/, /reel/, /reels/ and /tv/ share shortcodes, optionally behind a username
+_INSTAGRAM_PATH = re.compile(r'^/(?:[A-Za-z0-9_.]+/)?(?:p|reels?|tv)/([A-Za-z0-9_-]+)')
+# TikTok: /@user/video/<id>, /@user/photo/<id>, /v/<id>.html, /embed/v2/<id>
+_TIKTOK_PATH = re.compile(r'^/(?:@[^/]+/(?:video|photo)|v|embed(?:/v2)?)/(\d+)')
+# TikTok short links (vm.tiktok.com/<code>, tiktok.com/t/<code>) can't be resolved offline
+_TIKTOK_SHORT_PATH = re.compile(r'^/(?:t/)?([A-Za-z0-9]+)/?$')
+# YouTube: /shorts/<id>, /embed/<id>, /live/<id>, /v/<id>
+_YOUTUBE_PATH = re.compile(r'^/(?:shorts|embed|live|v)/([A-Za-z0-9_-]{11})')
+_YOUTUBE_ID = re.compile(r'^[A-Za-z0-9_-]{11}$')
+
+# Query parameters that only track the share and never select different content
+_TRACKING_PARAMS = {'igsh', 'igshid', 'utm_source', 'utm_medium', 'utm_campaign', 'utm_content', 'utm_term',
+                    'si', 'feature', 'is_from_webapp', 'sender_device', 'web_id', '_r', '_t', 'fbclid'}
+
+def _host(netloc: str) -> str:
+    host = netloc.lower().split('@')[-1].split(':')[0]
+    for prefix in ('www.', 'm.', 'mobile.', 'music.'):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    return host
+
+def canonical_video_id(url: str) -> Optional[str]:
+    """
+    Platform-qualified video ID such as 'instagram:DNBhZWxyjQS',
+    'tiktok:7312345678901234567' or 'youtube:dQw4w9WgXcQ', or None when the
+    URL is not a recognized Instagram, TikTok or YouTube video.
+    """
+    parts = urlsplit(url.strip())
+    host = _host(parts.netloc)
+    path = parts.path or '/'
+
+    if host in ('instagram.com', 'instagr.am'):
+        match = _INSTAGRAM_PATH.match(path)
+        if match:
+            return f"instagram:{match.group(1)}"
+
+    elif host == 'tiktok.com':
+        match = _TIKTOK_PATH.match(path)
+        if match:
+            return f"tiktok:{match.group(1)}"
+        if path.startswith('/t/'):
+            match = _TIKTOK_SHORT_PATH.match(path)
+            if match:
+                return f"tiktok-short:{match.group(1)}"
+
+    elif host in ('vm.tiktok.com', 'vt.tiktok.com'):
+        match = _TIKTOK_SHORT_PATH.match(path)
+        if match:
+            return f"tiktok-short:{match.group(1)}"
+
+    elif host in ('youtube.com', 'youtube-nocookie.com'):
+        video_id = parse_qs(parts.query).get('v', [None])[0]
+        if video_id and _YOUTUBE_ID.match(video_id):
+            return f"youtube:{video_id}"
+        match = _YOUTUBE_PATH.match(path)
+        if match:
+            return f"youtube:{match.group(1)}"
+
+    elif host == 'youtu.be':
+        video_id = path.strip('/').split('/')[0]
+        if _YOUTUBE_ID.match(video_id):
+            return f"youtube:{video_id}"
+
+    return None
+
+def canonicalize_video_url(url: str) -> str:
+    """
+    Stable cache key for a video URL.
+
+    Recognized Instagram, TikTok and YouTube videos map to their platform ID
+    (see canonical_video_id). Other URLs are normalized: lowercase host
+    without www., no fragment, no tracking parameters, sorted query and no
+    trailing slash.
+    """
+    video_id = canonical_video_id(url)
+    if video_id:
+        return video_id
+
+    parts = urlsplit(url.strip())
+    query = sorted(
+        (key, value)
+        for key, values in parse_qs(parts.query, keep_blank_values=True).items()
+        if key.lower() not in _TRACKING_PARAMS
+        for value in values
+    )
+    path = parts.path.rstrip('/') or '/'
+    canonical = f"{_host(parts.netloc)}{path}"
+    if query:
+        canonical += f"?{urlencode(query)}"
+    return canonical
@@ -0,0 +1,164 @@
+"""
+Shared yt-dlp download service for Marketing App Backend
+Keeps warmed YoutubeDL instances and browser cookies for the life of the
+process and runs every download on one bounded worker pool
+"""
+
+import sys
+import json
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import yt_dlp
+from yt_dlp.cookies import load_cookies
+
+# Import settings
+sys.path.append(str(Path(__file__).parent.parent))
+from config.settings import settings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Options shared by every download; outtmpl is set per download
+DEFAULT_YTDLP_OPTIONS = {
+    'format': 'best[height<=720][ext=mp4]/best[ext=mp4]/best',
+    'no_warnings': True,
+    'http_headers': {
+        'User-Agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 14_7_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.2 Mobile/15E148 Safari/604.1'
+    },
+}
+
+CHROME_COOKIES = ('chrome', None, None, None)
+
+class YtDlpDownloader:
+    """
+    Long-lived yt-dlp downloader.
+
+    Each worker thread keeps one YoutubeDL per option set (YoutubeDL is not
+    thread-safe), so extractor setup and HTTP sessions are reused across
+    downloads. Chrome cookies are read and decrypted once and the jar is shared
+    by every instance.
+    """
+
+    def __init__(self, max_workers: int = None, use_chrome_cookies: bool = None, options: Dict = None):
+        """
+        Args:
+            max_workers: Concurrent downloads (uses DOWNLOAD_WORKERS if None)
+            use_chrome_cookies: Try Chrome cookies first (uses USE_CHROME_COOKIES if None)
+            options: yt-dlp options for every download (DEFAULT_YTDLP_OPTIONS if None)
+        """
+        self.use_chrome_cookies = use_chrome_cookies if use_chrome_cookies is not None else settings.USE_CHROME_COOKIES
+        self.options = dict(options or DEFAULT_YTDLP_OPTIONS)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.DOWNLOAD_WORKERS,
+            thread_name_prefix='ytdlp',
+            initializer=self._init_worker
+        )
+        self._local = threading.local()
+        self._instances: List[yt_dlp.YoutubeDL] = []
+        self._cookie_jar = None
+        self._cookies_loaded = False
+        self._lock = threading.Lock()
+
+        if not self.use_chrome_cookies:
+            print("📥 Skipping Chrome cookies (set USE_CHROME_COOKIES=true to enable)", flush=True)
+
+    def _init_worker(self):
+        self._local.is_worker = True
+        self._local.instances = {}
+
+    def _load_cookie_jar(self, ydl: yt_dlp.YoutubeDL):
+        """Chrome cookie jar, loaded on first use; None if unavailable."""
+        with self._lock:
+            if not self._cookies_loaded:
+                try:
+                    self._cookie_jar = load_cookies(None, CHROME_COOKIES, ydl)
+                    print("📥 Loaded Chrome cookies for downloads", flush=True)
+                except Exception as cookie_err:
+                    print(f"⚠️ Chrome cookies not available: {cookie_err}", flush=True)
+                self._cookies_loaded = True
+            return self._cookie_jar
+
+    def _instance(self, options: Dict, use_cookies: bool) -> Optional[yt_dlp.YoutubeDL]:
+        """This worker's YoutubeDL for options, or None if cookies were requested but are unavailable."""
+        if use_cookies and self._cookies_loaded and self._cookie_jar is None:
+            return None
+        key = (json.dumps(options, sort_keys=True, default=str), use_cookies)
+        ydl = self._local.instances.get(key)
+        if ydl is None:
+            ydl = yt_dlp.YoutubeDL(dict(options))
+            if use_cookies:
+                jar = self._load_cookie_jar(ydl)
+                if jar is None:
+                    ydl.close()
+                    return None
+                # Replaces YoutubeDL's lazily loaded jar before any request is made
+                ydl.cookiejar = jar
+            self._local.instances[key] = ydl
+            with self._lock:
+                self._instances.append(ydl)
+        return ydl
+
+    def _extract(self, ydl: yt_dlp.YoutubeDL, url: str, output_template: str) -> Dict:
+        ydl.params['outtmpl'] = dict(ydl.params['outtmpl'], default=output_template)
+        return ydl.extract_info(url, download=True)
+
+    def _download(self, url: str, output_template: str, options: Dict) -> Dict:
+        if self.use_chrome_cookies:
+            ydl = self._instance(options, use_cookies=True)
+            if ydl is not None:
+                try:
+                    info = self._extract(ydl, url, output_template)
+                    print("✅ Download successful with cookies", flush=True)
+                    return info
+                except Exception as dl_err:
+                    print(f"⚠️ Download failed with cookies: {dl_err}", flush=True)
+                    print("🔄 Retrying download without cookies...", flush=True)
+
+        return self._extract(self._instance(options, use_cookies=False), url, output_template)
+
+    def submit(self, url: str, output_template: str, options: Dict = None) -> Future:
+        """
+        Queue a download on the worker pool.
+
+        Args:
+            url: Video URL
+            output_template: yt-dlp output template (a plain path or one with %(ext)s)
+            options: yt-dlp options overriding the defaults
+
+        Returns:
+            Future of the yt-dlp info dict; raises yt_dlp's DownloadError on failure
+        """
+        return self.executor.submit(self._download, url, output_template, dict(self.options, **(options or {})))
+
+    def download(self, url: str, output_template: str, options: Dict = None) -> Dict:
+        """Blocking download on the worker pool (runs inline when already on it)."""
+        if getattr(self._local, 'is_worker', False):
+            return self._download(url, output_template, dict(self.options, **(options or {})))
+        return self.submit(url, output_template, options).result()
+
+    def close(self):
+        """Stop the worker pool and close every YoutubeDL."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            instances = list(self._instances)
+            self._instances.clear()
+        for ydl in instances:
+            try:
+                ydl.close()
+            except Exception as e:
+                logger.debug(f"Failed to close YoutubeDL: {e}")
+
+_downloader: Optional[YtDlpDownloader] = None
+_downloader_lock = threading.Lock()
+
+def get_ytdlp_downloader() -> YtDlpDownloader:
+    """Process-wide yt-dlp download service."""
+    global _downloader
+    with _downloader_lock:
+        if _downloader is None:
+            _downloader = YtDlpDownloader()
+        return _downloader
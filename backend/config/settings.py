@@ -6,6 +6,7 @@ Loads environment variables for sensitive data and app config for application se
 import os
 import json
 from pathlib import Path
+from typing import Optional
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -63,6 +64,26 @@ class Settings:
     def OUTPUT_DIR(self) -> str:
         return os.getenv('OUTPUT_DIR', './outputs')
     
+    @property
+    def ANALYSIS_CACHE_DIR(self) -> str:
+        return os.getenv('ANALYSIS_CACHE_DIR', os.path.join(self.TEMP_DIR, 'analysis_cache'))
+    
+    @property
+    def USE_CHROME_COOKIES(self) -> bool:
+        return os.getenv('USE_CHROME_COOKIES', 'false').lower() == 'true'
+    
+    @property
+    def DOWNLOAD_CACHE_DIR(self) -> str:
+        return os.getenv('DOWNLOAD_CACHE_DIR', os.path.join(self.TEMP_DIR, 'download_cache'))
+    
+    @property
+    def OPENAI_BASE_URL(self) -> Optional[str]:
+        return os.getenv('OPENAI_BASE_URL') or None
+    
+    @property
+    def FRAME_CACHE_DIR(self) -> str:
+        return os.getenv('FRAME_CACHE_DIR', os.path.join(self.TEMP_DIR, 'frame_cache'))
+    
     # Application Configuration (from JSON)
     @property
     def MAX_VIDEO_DURATION(self) -> float:
@@ -72,6 +93,22 @@ class Settings:
     def MAX_VIDEO_SIZE_MB(self) -> float:
         return self._app_config['video_processing']['max_video_size_mb']
     
+    @property
+    def COMPRESSION_PRESET(self) -> str:
+        return self._app_config['video_processing']['compression_preset']
+    
+    @property
+    def COMPRESSION_TWO_PASS(self) -> bool:
+        return self._app_config['video_processing']['compression_two_pass']
+    
+    @property
+    def COMPRESSION_MAX_DIMENSION(self) -> int:
+        return self._app_config['video_processing']['compression_max_dimension']
+    
+    @property
+    def COMPRESSION_AUDIO_BITRATE_KBPS(self) -> int:
+        return self._app_config['video_processing']['compression_audio_bitrate_kbps']
+    
     @property
     def TARGET_FRAMES_PER_VIDEO(self) -> int:
         return self._app_config['video_processing']['target_frames_per_video']
@@ -92,6 +129,38 @@ class Settings:
     def MAX_CONCURRENT_REQUESTS(self) -> int:
         return self._app_config['api']['max_concurrent_requests']
     
+    @property
+    def DOWNLOAD_WORKERS(self) -> int:
+        return self._app_config['api']['download_workers']
+    
+    @property
+    def EXTRACTION_WORKERS(self) -> int:
+        return self._app_config['api']['extraction_workers']
+    
+    @property
+    def AUDIO_WORKERS(self) -> int:
+        return self._app_config['api']['audio_workers']
+    
+    @property
+    def EXTRACTION_TIMEOUT(self) -> float:
+        return self._app_config['api']['extraction_timeout']
+    
+    @property
+    def FRAME_ENCODE_WORKERS(self) -> int:
+        return self._app_config['api']['frame_encode_workers']
+    
+    @property
+    def IMAGE_TOKEN_BUDGET(self) -> int:
+        return self._app_config['api']['image_token_budget']
+    
+    @property
+    def FRAME_DETAIL_BY_TYPE(self) -> dict:
+        return self._app_config['api']['frame_detail']
+    
+    @property
+    def DETAIL_ENCODE_PROFILES(self) -> dict:
+        return self._app_config['api']['detail_encode_profiles']
+    
     @property
     def OPENAI_MODEL(self) -> str:
         return self._app_config['api']['openai_model']
@@ -100,10 +169,70 @@ class Settings:
     def MAX_TOKENS(self) -> int:
         return self._app_config['api']['max_tokens']
     
+    @property
+    def ANALYSIS_CACHE_ENABLED(self) -> bool:
+        return self._app_config['analysis_cache']['enabled']
+    
+    @property
+    def ANALYSIS_CACHE_TTL_HOURS(self) -> float:
+        return self._app_config['analysis_cache']['ttl_hours']
+    
+    @property
+    def ANALYSIS_CACHE_MAX_MB(self) -> float:
+        return self._app_config['analysis_cache']['max_mb']
+    
+    @property
+    def DOWNLOAD_CACHE_ENABLED(self) -> bool:
+        return self._app_config['download_cache']['enabled']
+    
+    @property
+    def DOWNLOAD_CACHE_MAX_MB(self) -> float:
+        return self._app_config['download_cache']['max_mb']
+    
+    @property
+    def OPENAI_TIMEOUT(self) -> float:
+        return self._app_config['openai_client']['timeout']
+    
+    @property
+    def OPENAI_MAX_RETRIES(self) -> int:
+        return self._app_config['openai_client']['max_retries']
+    
+    @property
+    def OPENAI_HTTP2(self) -> bool:
+        return self._app_config['openai_client']['http2']
+    
+    @property
+    def OPENAI_MAX_CONNECTIONS(self) -> int:
+        return self._app_config['openai_client']['max_connections']
+    
+    @property
+    def OPENAI_MAX_KEEPALIVE_CONNECTIONS(self) -> int:
+        return self._app_config['openai_client']['max_keepalive_connections']
+    
+    @property
+    def OPENAI_KEEPALIVE_EXPIRY(self) -> float:
+        return self._app_config['openai_client']['keepalive_expiry']
+    
+    @property
+    def OPENAI_RATE_LIMIT_ENABLED(self) -> bool:
+        return self._app_config['openai_client']['rate_limit']
+    
     @property
     def MAX_FRAMES_PER_BATCH(self) -> int:
         return self._app_config['api']['max_frames_per_batch']
     
+    @property
+    def MULTI_PASS_ENABLED(self) -> bool:
+        return self._app_config['api']['multi_pass_enabled']
+    
+    @property
+    def MULTI_PASS_PARALLEL(self) -> bool:
+        return self._app_config['api']['multi_pass_parallel']
+    
+    @property
+    def MULTI_PASS_MAX_CONCURRENCY(self) -> int:
+        return self._app_config['api']['multi_pass_max_concurrency']
+    
     @property
     def FRAME_IMAGE_MAX_SIZE(self) -> int:
         return self._app_config['api']['frame_image_max_size']
@@ -112,6 +241,46 @@ class Settings:
     def FRAME_IMAGE_QUALITY(self) -> int:
         return self._app_config['api']['frame_image_quality']
     
+    @property
+    def ANALYSIS_FRAME_SIZE(self) -> int:
+        return self._app_config['frame_extraction']['analysis_frame_size']
+    
+    @property
+    def REUSE_DETECTION_FRAMES(self) -> bool:
+        return self._app_config['frame_extraction']['reuse_detection_frames']
+    
+    @property
+    def FRAME_STORE_MAX_MB(self) -> float:
+        return self._app_config['frame_extraction']['frame_store_max_mb']
+    
+    @property
+    def DETECTION_WORKERS(self) -> int:
+        return self._app_config['frame_extraction']['detection_workers']
+    
+    @property
+    def DETECTION_MIN_CHUNK_SECONDS(self) -> float:
+        return self._app_config['frame_extraction']['detection_min_chunk_seconds']
+    
+    @property
+    def FRAME_CACHE_ENABLED(self) -> bool:
+        return self._app_config['frame_extraction']['encoded_frame_cache']
+    
+    @property
+    def FRAME_CACHE_MAX_MB(self) -> float:
+        return self._app_config['frame_extraction']['encoded_frame_cache_max_mb']
+    
+    @property
+    def PROGRESSIVE_DECODE(self) -> bool:
+        return self._app_config['frame_extraction']['progressive_decode']
+    
+    @property
+    def PROGRESSIVE_HEADER_TIMEOUT(self) -> float:
+        return self._app_config['frame_extraction']['progressive_header_timeout']
+    
+    @property
+    def FRAME_ENCODE_PROFILES(self) -> dict:
+        return self._app_config['frame_encoding']['profiles']
+    
     @property
     def LOG_FORMAT(self) -> str:
         return self._app_config['logging']['format']
@@ -26,6 +26,7 @@ from PIL import Image
 sys.path.insert(0, str(Path(__file__).parent))
 
 from ad_processing import ViralFrameExtractor
+from ad_processing.frame_encoder import get_frame_encoder
 from ad_processing.frame_extractor import _combined_similarity, _histogram_comparison, _perceptual_hash, _difference_hash, _delta_intensity, _is_jump_cut
 
 app = Flask(__name__)
@@ -61,20 +62,9 @@ def kill_port(port):
 
 def frame_to_base64(frame_image):
     """Convert frame image to base64 for web display"""
-    # Convert BGR to RGB
-    rgb_image = cv2.cvtColor(frame_image, cv2.COLOR_BGR2RGB)
-    pil_image = Image.fromarray(rgb_image)
-    
-    # Resize for web display
-    pil_image.thumbnail((400, 300), Image.Resampling.LANCZOS)
-    
-    # Convert to base64
-    buffer = io.BytesIO()
-    pil_image.save(buffer, format='JPEG', quality=85)
-    buffer.seek(0)
-    
-    base64_str = base64.b64encode(buffer.read()).decode('utf-8')
-    return f"data:image/jpeg;base64,{base64_str}"
+    # Encode with the detection preview profile
+    encoder = get_frame_encoder()
+    return encoder.encode(frame_image, encoder.profile('detect')).to_data_url()
 
 @app.route('/')
 def index():
@@ -1053,19 +1043,9 @@ async def download_video_if_url(input_path: str) -> str:
         # Create temp file path
         temp_video_path = tempfile.mktemp(suffix='.mp4')
         
-        # Download using yt-dlp
-        import yt_dlp
-        ydl_opts = {
-            'format': 'best[height<=720][ext=mp4]/best[ext=mp4]/best',
-            'outtmpl': temp_video_path,
-            'no_warnings': True,
-            'http_headers': {
-                'User-Agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 14_7_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.2 Mobile/15E148 Safari/604.1'
-            },
-        }
-        
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([input_path])
+        # Download using the shared yt-dlp service
+        from ad_processing.ytdlp_service import get_ytdlp_downloader
+        await asyncio.wrap_future(get_ytdlp_downloader().submit(input_path, temp_video_path))
         
         print(f"✅ Video downloaded to: {temp_video_path}")
         return temp_video_path
@@ -8,13 +8,16 @@ import sys
 import asyncio
 import tempfile
 import shutil
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, UploadFile, File
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, UploadFile, File, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, HttpUrl, Field
 import uvicorn
 import json
@@ -23,6 +26,13 @@ import json
 sys.path.insert(0, str(Path(__file__).parent))
 
 from ad_processing import ViralFrameExtractor, AudioExtractor, AdAnalyzer, VideoCompressor
+from ad_processing.openai_clients import close_openai_clients
+from ad_processing.analysis_cache import get_analysis_cache
+from ad_processing.download_cache import get_download_cache
+from ad_processing.ytdlp_service import get_ytdlp_downloader
+from ad_processing.frame_cache import file_content_hash, get_frame_cache
+from ad_processing.progressive_download import ProgressiveDownload
+from ad_processing.video_urls import canonicalize_video_url
 from config.settings import settings
 
 app = FastAPI(
@@ -61,6 +71,7 @@ app.add_middleware(
 class AnalyzeAdRequest(BaseModel):
     url: HttpUrl = Field(..., description="YouTube, Instagram, or TikTok video URL")
     content_description: Optional[str] = Field(None, description="Optional description of the video content")
+    refresh: bool = Field(False, description="Ignore any cached analysis and reprocess the video")
 
 class AnalyzeAdResponse(BaseModel):
     id: str
@@ -86,6 +97,30 @@ class ProcessFileResponse(BaseModel):
     page_count: Optional[int] = None
     error: Optional[str] = None
 
+class ExtractionJob:
+    """Frame extraction running on a worker pool that can be stopped between decode steps"""
+    
+    def __init__(self, pool: ThreadPoolExecutor, extract, *args):
+        self.cancel_event = threading.Event()
+        self.future: Future = pool.submit(extract, *args, cancel_event=self.cancel_event)
+    
+    def result(self) -> asyncio.Future:
+        """Awaitable of the extracted frames"""
+        return asyncio.wrap_future(self.future)
+    
+    async def stop(self):
+        """
+        Cancel the extraction (killing its ffmpeg process) and wait until its
+        thread has exited, so the video file can be deleted safely.
+        """
+        self.cancel_event.set()
+        if self.future.cancel():
+            return
+        done = asyncio.wrap_future(self.future)
+        await asyncio.wait([done])
+        if not done.cancelled():
+            done.exception()  # Mark retrieved; errors of a stopped extraction are expected
+
 # Global processor instance
 class VideoProcessor:
     def __init__(self):
@@ -93,78 +128,181 @@ class VideoProcessor:
         self.frame_extractor = ViralFrameExtractor()
         self.audio_extractor = AudioExtractor()
         self.analyzer = AdAnalyzer()
+        # Blocking stages run on bounded pools so the event loop stays responsive
+        self.downloader = get_ytdlp_downloader()
+        self.extraction_pool = ThreadPoolExecutor(max_workers=settings.EXTRACTION_WORKERS, thread_name_prefix='extract')
+        self.audio_pool = ThreadPoolExecutor(max_workers=settings.AUDIO_WORKERS, thread_name_prefix='audio')
+        # Limits how many videos are processed at once; extra requests wait their turn
+        self.request_semaphore = asyncio.Semaphore(settings.MAX_CONCURRENT_REQUESTS)
+        # Finished analyses by canonical URL and video content (None when disabled)
+        self.analysis_cache = get_analysis_cache()
+        # Recent downloads by canonical URL and yt-dlp video ID (None when disabled)
+        self.download_cache = get_download_cache()
         # outputs directory
         self.outputs_dir = Path(__file__).parent / 'video_outputs'
         self.outputs_dir.mkdir(parents=True, exist_ok=True)
     
-    async def process_video_url(self, video_url: str, content_description: Optional[str] = None) -> Dict:
+    def shutdown(self):
+        """Stop the worker pools"""
+        self.downloader.close()
+        for pool in (self.extraction_pool, self.audio_pool):
+            pool.shutdown(wait=False, cancel_futures=True)
+    
+    async def _run_in_pool(self, pool: ThreadPoolExecutor, func, *args):
+        """Run a blocking call on one of the worker pools"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, func, *args)
+    
+    def _download_video(self, video_url: str, temp_video_path: str) -> Optional[Dict]:
+        """Download video with the shared yt-dlp service and return its info dict (blocking)"""
+        try:
+            return self.downloader.download(video_url, temp_video_path)
+        except Exception as dl_err:
+            print(f"❌ Download failed: {dl_err}", flush=True)
+            raise
+    
+    def _download_error(self, video_url: str, error: Exception) -> HTTPException:
+        """
+        HTTP error for a failed download. The leader and every follower of a
+        shared download each get their own copy of the same error.
+        """
+        if isinstance(error, HTTPException):
+            return HTTPException(status_code=error.status_code, detail=error.detail)
+        return err(400, "UNSUPPORTED_URL", f"Unsupported or restricted URL: {video_url}")
+    
+    async def _fetch_video(self, video_url: str, temp_video_path: str) -> Optional[ExtractionJob]:
+        """
+        Put the video at temp_video_path, reusing the download cache when possible.
+        
+        Concurrent requests for the same video share one download. Returns the
+        frame extraction job when frames are decoded progressively during the
+        download, otherwise None.
+        """
+        cache = self.download_cache
+        claimed = None
+        if cache:
+            cached_path = cache.lookup(video_url)
+            if cached_path and await self._run_in_pool(self.extraction_pool, cache.checkout, cached_path, temp_video_path):
+                print(f"⚡ Reusing cached download of {canonicalize_video_url(video_url)}", flush=True)
+                return None
+            
+            future, leader = cache.claim(video_url)
+            if leader:
+                claimed = future
+            else:
+                print("⏳ Same video is already downloading, waiting for it...", flush=True)
+                # Shielded so a disconnecting follower doesn't cancel the shared download
+                try:
+                    cached_path = await asyncio.shield(asyncio.wrap_future(future))
+                except Exception as e:
+                    raise self._download_error(video_url, e) from e
+                if cached_path and await self._run_in_pool(self.extraction_pool, cache.checkout, cached_path, temp_video_path):
+                    print("✅ Shared download finished", flush=True)
+                    return None
+                # Not cacheable (e.g. over the size budget): download our own copy
+        
+        frame_job = None
+        try:
+            if settings.PROGRESSIVE_DECODE:
+                # Frame extraction follows the file while it downloads and finishes right after it
+                download = ProgressiveDownload(
+                    functools.partial(self._download_video, video_url, temp_video_path),
+                    temp_video_path,
+                    self.downloader.executor
+                )
+                frame_job = ExtractionJob(self.extraction_pool, self.frame_extractor.extract_frames_progressive, download)
+                download_result = asyncio.wrap_future(download.future)
+            else:
+                download_result = self._run_in_pool(self.downloader.executor, self._download_video, video_url, temp_video_path)
+            try:
+                info = await download_result
+            except Exception as e:
+                raise self._download_error(video_url, e) from e
+            
+            if claimed is not None:
+                cached_path = await self._run_in_pool(self.extraction_pool, cache.store_file, video_url, temp_video_path, info)
+                cache.resolve(video_url, claimed, cached_path)
+        except BaseException as e:
+            if claimed is not None:
+                cache.resolve(video_url, claimed, error=e)
+            if frame_job is not None:
+                await frame_job.stop()
+            raise
+        return frame_job
+    
+    async def process_video_url(self, video_url: str, content_description: Optional[str] = None, use_cache: bool = True) -> Dict:
         """Process video from URL and return structured analysis"""
+        analysis_json = None
+        async for event in self.process_video_events(video_url, content_description, use_cache=use_cache):
+            if event['type'] == 'result':
+                analysis_json = event['analysis']
+        return analysis_json
+    
+    async def process_video_events(
+        self,
+        video_url: str,
+        content_description: Optional[str] = None,
+        stream_chunks: bool = False,
+        use_cache: bool = True
+    ) -> AsyncIterator[Dict]:
+        """
+        Process video from URL, yielding progress events.
+        
+        Yields {'type': 'status', 'stage': ...} as each step starts, then (with
+        stream_chunks) {'type': 'chunk', 'chunk': ...} as the model writes each
+        chunk, and finally {'type': 'result', 'analysis': ...}.
+        
+        With use_cache, a cached analysis of the same canonical URL is returned
+        without downloading or waiting for a processing slot.
+        """
+        cache = self.analysis_cache if use_cache else None
+        if cache:
+            cached = cache.get(cache.url_key(video_url, content_description))
+            if cached is not None:
+                print(f"⚡ Cached analysis for {canonicalize_video_url(video_url)}", flush=True)
+                for event in self._cached_analysis_events(cached, video_url, 'url', stream_chunks):
+                    yield event
+                return
+        
+        if self.request_semaphore.locked():
+            print(f"⏳ {settings.MAX_CONCURRENT_REQUESTS} videos already processing, waiting for a slot...", flush=True)
+        async with self.request_semaphore:
+            async for event in self._process_video_events(video_url, content_description, stream_chunks, cache):
+                yield event
+    
+    def _cached_analysis_events(self, analysis_json: Dict, video_url: str, cache_hit: str, stream_chunks: bool) -> List[Dict]:
+        """Events replaying a cached analysis (cache_hit is 'url' or 'content')"""
+        # The cached analysis may come from another URL of the same video
+        analysis_json['url'] = str(video_url)
+        analysis_json.setdefault('processing_info', {})['cache_hit'] = cache_hit
+        events = []
+        if stream_chunks:
+            events.extend({'type': 'chunk', 'chunk': chunk} for chunk in analysis_json.get('chunks', []))
+        events.append({'type': 'result', 'analysis': analysis_json})
+        return events
+    
+    async def _process_video_events(
+        self,
+        video_url: str,
+        content_description: Optional[str] = None,
+        stream_chunks: bool = False,
+        cache=None
+    ) -> AsyncIterator[Dict]:
+        """Download, extract and analyze one video (caller holds a request slot)"""
         print(f"🎬 Processing Video: {video_url}", flush=True)
         
         temp_video_path = None
+        frame_job = None
         try:
             # Step 1: Download video to temp file
             print("📥 Downloading video...", flush=True)
+            yield {'type': 'status', 'stage': 'downloading'}
             
             # Create temp file path
             temp_video_path = tempfile.mktemp(suffix='.mp4')
             
-            # Download using yt-dlp
-            import yt_dlp
-            ydl_opts = {
-                'format': 'best[height<=720][ext=mp4]/best[ext=mp4]/best',
-                'outtmpl': temp_video_path,
-                'no_warnings': True,
-                'http_headers': {
-                    'User-Agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 14_7_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.2 Mobile/15E148 Safari/604.1'
-                },
-            }
-            
-            # Only use Chrome cookies if explicitly enabled (to avoid Chrome popups)
-            if os.getenv('USE_CHROME_COOKIES', 'false').lower() == 'true':
-                try:
-                    # Try different cookie extraction methods for encrypted Chrome cookies
-                    # Method 1: Default profile with keychain access
-                    ydl_opts['cookiesfrombrowser'] = ('chrome', None, None, None)
-                    print("📥 Using Chrome cookies for download", flush=True)
-                except Exception as cookie_err:
-                    print(f"⚠️ Chrome cookies not available: {cookie_err}", flush=True)
-                    try:
-                        # Method 2: Try with explicit profile path
-                        ydl_opts['cookiesfrombrowser'] = ('chrome', 'Default', None, None)
-                        print("📥 Trying Chrome cookies with Default profile", flush=True)
-                    except Exception as profile_err:
-                        print(f"⚠️ Chrome Default profile cookies failed: {profile_err}", flush=True)
-            else:
-                print("📥 Skipping Chrome cookies (set USE_CHROME_COOKIES=true to enable)", flush=True)
-            
-            download_success = False
-            
-            # Try downloading with cookies first (if enabled)
-            try:
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    ydl.download([video_url])
-                download_success = True
-                print("✅ Download successful with cookies", flush=True)
-            except Exception as dl_err:
-                print(f"⚠️ Download failed with cookies: {dl_err}", flush=True)
-                
-                # Fallback: Try without cookies if cookies were enabled
-                if 'cookiesfrombrowser' in ydl_opts:
-                    print("🔄 Retrying download without cookies...", flush=True)
-                    fallback_opts = ydl_opts.copy()
-                    del fallback_opts['cookiesfrombrowser']  # Remove cookies
-                    
-                    try:
-                        with yt_dlp.YoutubeDL(fallback_opts) as ydl:
-                            ydl.download([video_url])
-                        download_success = True
-                        print("✅ Download successful without cookies", flush=True)
-                    except Exception as fallback_err:
-                        print(f"❌ Download also failed without cookies: {fallback_err}", flush=True)
-                
-                if not download_success:
-                    raise err(400, "UNSUPPORTED_URL", f"Unsupported or restricted URL: {video_url}")
+            # Download using yt-dlp (or the download cache)
+            frame_job = await self._fetch_video(video_url, temp_video_path)
             
             # Check if file was downloaded
             if not Path(temp_video_path).exists() or Path(temp_video_path).stat().st_size == 0:
@@ -173,35 +311,87 @@ class VideoProcessor:
             file_size_mb = Path(temp_video_path).stat().st_size / (1024 * 1024)
             print(f"✅ Video downloaded successfully ({file_size_mb:.1f} MB)", flush=True)
             
-            # Step 2: Extract frames
+            # Hashed once per request: keys the analysis cache and the encoded frame cache
+            video_hash = None
+            if cache or get_frame_cache() is not None:
+                video_hash = await self._run_in_pool(self.extraction_pool, file_content_hash, temp_video_path)
+            
+            # The same video may have been analyzed under a different URL
+            if cache:
+                cached = cache.get(cache.content_key(video_hash, content_description))
+                if cached is not None:
+                    print(f"⚡ Cached analysis for identical video content", flush=True)
+                    cached['url'] = str(video_url)
+                    cache.put([cache.url_key(video_url, content_description)], cached, canonicalize_video_url(video_url))
+                    for event in self._cached_analysis_events(cached, video_url, 'content', stream_chunks):
+                        yield event
+                    return
+            
+            # Probe metadata once and share it across extraction stages
+            video_info = await self._run_in_pool(self.extraction_pool, self.frame_extractor.probe_video, temp_video_path)
+            
+            # Step 2: Extract frames and transcribe audio concurrently
+            yield {'type': 'status', 'stage': 'extracting', 'file_size_mb': round(file_size_mb, 2)}
             print("🎞️ Extracting frames with scene detection...", flush=True)
             print(f"   Video path: {temp_video_path}", flush=True)
             print(f"   File size: {file_size_mb:.1f} MB", flush=True)
+            print("🎤 Extracting and transcribing audio...", flush=True)
             
-            print(f"🎬 MAIN: Calling frame_extractor.extract_frames()...", flush=True)
-            frames = self.frame_extractor.extract_frames(temp_video_path)
-            print(f"✅ MAIN: Extracted {len(frames)} frames from {len(set(f.scene_id for f in frames))} scenes", flush=True)
+            print(f"🎬 MAIN: Calling frame_extractor.extract_frames() and audio_extractor.extract_audio() in parallel...", flush=True)
+            if frame_job is None:
+                frame_job = ExtractionJob(self.extraction_pool, self.frame_extractor.extract_frames, temp_video_path, video_info)
+            audio_task = asyncio.create_task(
+                self._run_in_pool(self.audio_pool, self.audio_extractor.extract_audio, temp_video_path, video_info)
+            )
+            try:
+                frames, audio_extraction = await asyncio.wait_for(
+                    asyncio.gather(frame_job.result(), audio_task),
+                    timeout=settings.EXTRACTION_TIMEOUT
+                )
+            except asyncio.TimeoutError:
+                raise err(408, "EXTRACTION_TIMEOUT", f"Frame and audio extraction exceeded {settings.EXTRACTION_TIMEOUT} seconds")
+            finally:
+                # If one side failed or timed out, stop waiting on the other
+                if not audio_task.done():
+                    audio_task.cancel()
             
-            # Step 3: Extract audio
-            print("🎤 Extracting and transcribing audio...", flush=True)
-            audio_extraction = self.audio_extractor.extract_audio(temp_video_path)
+            print(f"✅ MAIN: Extracted {len(frames)} frames from {len(set(f.scene_id for f in frames))} scenes", flush=True)
+            if video_hash:
+                # Lets the analyzer reuse frames encoded in earlier runs of this video
+                for frame in frames:
+                    frame.source_hash = video_hash
             if audio_extraction.error:
                 print(f"⚠️ Audio extraction warning: {audio_extraction.error}", flush=True)
             print(f"✅ Audio transcribed: {len(audio_extraction.full_transcript)} characters", flush=True)
             
-            # Step 4: Analyze with OpenAI
+            # Step 3: Analyze with OpenAI
             print("🤖 Analyzing with OpenAI...", flush=True)
             print(f"   Sending {len(frames)} frames to GPT for analysis...", flush=True)
             print(f"   Audio transcript length: {len(audio_extraction.full_transcript)} characters", flush=True)
+            yield {'type': 'status', 'stage': 'analyzing', 'frames': len(frames)}
             
             try:
-                print(f"🎯 MAIN: Calling analyzer.analyze_advertisement()...", flush=True)
-                analysis_json = await self.analyzer.analyze_advertisement(
-                    frames=frames,
-                    audio_extraction=audio_extraction,
-                    original_url=str(video_url),
-                    content_description=content_description
-                )
+                if stream_chunks:
+                    print(f"🎯 MAIN: Calling analyzer.analyze_advertisement_stream()...", flush=True)
+                    analysis_json = None
+                    async for event in self.analyzer.analyze_advertisement_stream(
+                        frames=frames,
+                        audio_extraction=audio_extraction,
+                        original_url=str(video_url),
+                        content_description=content_description
+                    ):
+                        if event['type'] == 'chunk':
+                            yield event
+                        else:
+                            analysis_json = event['analysis']
+                else:
+                    print(f"🎯 MAIN: Calling analyzer.analyze_advertisement()...", flush=True)
+                    analysis_json = await self.analyzer.analyze_advertisement(
+                        frames=frames,
+                        audio_extraction=audio_extraction,
+                        original_url=str(video_url),
+                        content_description=content_description
+                    )
                 print(f"✅ MAIN: Analysis complete: {len(analysis_json.get('chunks', []))} chunks identified", flush=True)
             except Exception as analysis_error:
                 print(f"❌ OpenAI analysis failed: {analysis_error}", flush=True)
@@ -225,7 +415,9 @@ class VideoProcessor:
                 'frames_extracted': len(frames),
                 'scenes_detected': len(set(f.scene_id for f in frames)),
                 'audio_segments': len(audio_extraction.transcript_segments),
-                'transcript_length': len(audio_extraction.full_transcript)
+                'transcript_length': len(audio_extraction.full_transcript),
+                'token_usage': analysis_json.pop('token_usage', None),
+                'cache_hit': None
             }
             
             # Persist JSON to disk
@@ -243,7 +435,13 @@ class VideoProcessor:
             except Exception as save_err:
                 print(f"⚠️ Failed to save analysis JSON: {save_err}")
             
-            return analysis_json
+            if cache:
+                keys = [cache.url_key(video_url, content_description)]
+                if video_hash:
+                    keys.append(cache.content_key(video_hash, content_description))
+                cache.put(keys, analysis_json, canonicalize_video_url(video_url))
+            
+            yield {'type': 'result', 'analysis': analysis_json}
             
         except HTTPException:
             raise
@@ -254,15 +452,29 @@ class VideoProcessor:
             raise err(500, "PROCESSING_FAILED", f"Video processing failed: {str(e)}")
         
         finally:
-            # Cleanup temp file
+            # Stop an unfinished extraction (failure, timeout, or a cache hit made it unnecessary)
+            # and let its thread exit before the file it decodes is deleted
+            if frame_job is not None:
+                await frame_job.stop()
+            
+            # Cleanup temp file (and a partial download left by a failure)
             try:
-                if temp_video_path and Path(temp_video_path).exists():
+                if temp_video_path:
                     Path(temp_video_path).unlink(missing_ok=True)
+                    Path(temp_video_path + '.part').unlink(missing_ok=True)
             except:
                 pass
 
-# Initialize global processor
-processor = VideoProcessor()
+# Initialize global processor. Detection workers are spawned processes that
+# re-import this file as __mp_main__ when it is run directly; they must not
+# build their own processor, pools and caches.
+processor = VideoProcessor() if __name__ != '__mp_main__' else None
+
+@app.on_event("shutdown")
+async def shutdown_processor():
+    """Release worker pools and pooled OpenAI connections on server shutdown"""
+    processor.shutdown()
+    await close_openai_clients()
 
 @app.get("/", response_model=HealthResponse)
 async def root():
@@ -294,7 +506,8 @@ async def analyze_ad(request: AnalyzeAdRequest):
         # Process the video
         analysis = await processor.process_video_url(
             str(request.url),
-            request.content_description
+            request.content_description,
+            use_cache=not request.refresh
         )
         
         return AnalyzeAdResponse(**analysis)
@@ -304,6 +517,56 @@ async def analyze_ad(request: AnalyzeAdRequest):
     except Exception as e:
         raise err(500, "UNEXPECTED_ERROR", str(e))
 
+STREAM_MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'sse': 'text/event-stream',
+}
+
+def format_stream_event(event: Dict, stream_format: str) -> str:
+    """Serialize one event as an NDJSON line or a Server-Sent Event"""
+    data = json.dumps(event, default=str)
+    if stream_format == 'sse':
+        return f"event: {event['type']}\ndata: {data}\n\n"
+    return f"{data}\n"
+
+@app.post("/analyze-ad/stream")
+async def analyze_ad_stream(request: AnalyzeAdRequest, stream_format: str = Query('ndjson', alias='format')):
+    """
+    Streaming variant of /analyze-ad
+    
+    Emits progress events as NDJSON (default) or Server-Sent Events (?format=sse):
+    status events for each processing stage, one chunk event per analysis chunk
+    as soon as the model produces it, then a result event with the full analysis
+    (same shape as /analyze-ad). Failures arrive as an error event.
+    """
+    if stream_format not in STREAM_MEDIA_TYPES:
+        raise err(400, "INVALID_FORMAT", f"Unsupported stream format '{stream_format}' (use 'ndjson' or 'sse')")
+    
+    async def event_stream():
+        events = processor.process_video_events(
+            str(request.url),
+            request.content_description,
+            stream_chunks=True,
+            use_cache=not request.refresh
+        )
+        try:
+            async for event in events:
+                yield format_stream_event(event, stream_format)
+        except HTTPException as he:
+            detail = he.detail if isinstance(he.detail, dict) else {"code": "ERROR", "message": str(he.detail)}
+            yield format_stream_event({'type': 'error', 'status': he.status_code, 'error': detail}, stream_format)
+        except Exception as e:
+            yield format_stream_event({'type': 'error', 'status': 500, 'error': {"code": "UNEXPECTED_ERROR", "message": str(e)}}, stream_format)
+        finally:
+            # Release the request slot and temp files if the client disconnects mid-stream
+            await events.aclose()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type=STREAM_MEDIA_TYPES[stream_format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/process-file", response_model=ProcessFileResponse)
 async def process_file(file: UploadFile = File(...)):
     """
@@ -21,12 +21,16 @@ from PIL import Image
 sys.path.insert(0, str(Path(__file__).parent))
 
 from ad_processing import ViralFrameExtractor, AudioExtractor, AdAnalyzer, VideoCompressor
+from ad_processing.frame_cache import file_content_hash, get_frame_cache
+from ad_processing.frame_encoder import get_frame_encoder
+from ad_processing.ytdlp_service import get_ytdlp_downloader
 
 class VideoProcessor:
     def __init__(self, output_base_dir="./video_outputs"):
         self.output_base_dir = Path(output_base_dir)
         self.compressor = VideoCompressor()
-        self.frame_extractor = ViralFrameExtractor()
+        # Decode frames at the archive profile's size so saved frames aren't capped at the API size
+        self.frame_extractor = ViralFrameExtractor(frame_max_size=get_frame_encoder().profile('archive').max_size)
         self.audio_extractor = AudioExtractor()
         self.analyzer = AdAnalyzer()
         
@@ -63,15 +67,13 @@ class VideoProcessor:
                 'candidate': 'CANDIDATE'
             }.get(frame.frame_type, frame.frame_type.upper())
             
-            filename = f"frame_{i:03d}_{frame.timestamp:.2f}s_scene{frame.scene_id}_{frame_type_label}.jpg"
-            filepath = frames_folder / filename
+            # Encode with the archive profile (sized for storage efficiency)
+            image_data, mime_type = frame.encode('archive')
+            extension = 'webp' if mime_type == 'image/webp' else 'jpg'
             
-            # Convert and save
-            pil_img = frame.to_pil()
-            # Resize for storage efficiency
-            if max(pil_img.size) > 1024:
-                pil_img.thumbnail((1024, 1024), Image.Resampling.LANCZOS)
-            pil_img.save(filepath, 'JPEG', quality=90)
+            filename = f"frame_{i:03d}_{frame.timestamp:.2f}s_scene{frame.scene_id}_{frame_type_label}.{extension}"
+            filepath = frames_folder / filename
+            filepath.write_bytes(image_data)
             
         print(f"✅ Frames saved to: {frames_folder}")
         return frames_folder
@@ -224,20 +226,12 @@ class VideoProcessor:
             # Create temp file path
             temp_video_path = tempfile.mktemp(suffix='.mp4')
             
-            # Download using yt-dlp (same as VideoCompressor but save to file)
-            import yt_dlp
-            ydl_opts = {
-                'format': 'best[height<=720][ext=mp4]/best[ext=mp4]/best',
-                'outtmpl': temp_video_path,
-                'no_warnings': False,  # Show warnings for debugging
-                # Instagram-specific options
-                'http_headers': {
-                    'User-Agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 14_7_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.2 Mobile/15E148 Safari/604.1'
-                },
-            }
-            
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([video_url])
+            # Download with the shared yt-dlp service (same format and headers as the API server)
+            await asyncio.wrap_future(get_ytdlp_downloader().submit(
+                video_url,
+                temp_video_path,
+                {'no_warnings': False}  # Show warnings for debugging
+            ))
             
             # Check if file was downloaded
             if not Path(temp_video_path).exists() or Path(temp_video_path).stat().st_size == 0:
@@ -254,14 +248,17 @@ class VideoProcessor:
             print("🔄 Step 2&3: Extracting frames and audio in parallel...")
             parallel_start = time.time()
             
+            # Probe metadata once and share it across both extractions
+            video_info = self.frame_extractor.probe_video(temp_video_path)
+            
             # Define async wrapper functions for parallel execution
             async def extract_frames_async():
                 loop = asyncio.get_event_loop()
-                return await loop.run_in_executor(None, self.frame_extractor.extract_frames, temp_video_path)
+                return await loop.run_in_executor(None, self.frame_extractor.extract_frames, temp_video_path, video_info)
             
             async def extract_audio_async():
                 loop = asyncio.get_event_loop()
-                return await loop.run_in_executor(None, self.audio_extractor.extract_audio, temp_video_path)
+                return await loop.run_in_executor(None, self.audio_extractor.extract_audio, temp_video_path, video_info)
             
             # Run both extractions in parallel
             frame_task = asyncio.create_task(extract_frames_async())
@@ -282,6 +279,12 @@ class VideoProcessor:
             print(f"   ⏱️ Total parallel time: {parallel_time:.2f}s")
             print()
             
+            if get_frame_cache() is not None:
+                # Lets the analyzer reuse frames encoded in earlier runs of this video
+                video_hash = file_content_hash(temp_video_path)
+                for frame in frames:
+                    frame.source_hash = video_hash
+            
             # Step 4: Analyze with OpenAI
             print("🤖 Step 4: Analyzing with OpenAI...")
             openai_start = time.time()
@@ -0,0 +1,15 @@
+"""
+Shared pytest setup for the backend tests
+Runs every test against throwaway cache directories and a dummy API key
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Settings are validated on import, so the environment must be ready first
+os.environ.setdefault('OPENAI_API_KEY', 'test-key')
+os.environ['TEMP_DIR'] = tempfile.mkdtemp(prefix='marketing_app_tests_')
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
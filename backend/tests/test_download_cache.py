@@ -0,0 +1,99 @@
+"""
+Download cache and shared in-flight downloads against a local HTTP server
+yt-dlp's generic extractor downloads the served file directly, so the whole
+fetch path (downloader, cache, single-flight coalescing, error mapping) runs offline
+"""
+
+import os
+import time
+import asyncio
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from fastapi import HTTPException
+
+from config.settings import settings
+from ad_processing.download_cache import VideoDownloadCache
+from ad_processing.ytdlp_service import YtDlpDownloader
+
+VIDEO_BYTES = os.urandom(256 * 1024)
+
+class VideoFileHandler(SimpleHTTPRequestHandler):
+    """Serves the directory, counting GETs per path and optionally slowing responses"""
+    extensions_map = {'.mp4': 'video/mp4'}
+    delay = 0.0
+
+    def do_GET(self):
+        self.server.gets[self.path] = self.server.gets.get(self.path, 0) + 1
+        time.sleep(self.delay)
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def video_server(tmp_path):
+    (tmp_path / 'clip.mp4').write_bytes(VIDEO_BYTES)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(VideoFileHandler, directory=str(tmp_path)))
+    server.gets = {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+    import main
+
+    # Frame extraction is not under test, only the download
+    monkeypatch.setattr(type(settings), 'PROGRESSIVE_DECODE', property(lambda self: False))
+    downloader = YtDlpDownloader(max_workers=4, use_chrome_cookies=False)
+    monkeypatch.setattr(main.processor, 'downloader', downloader)
+    monkeypatch.setattr(main.processor, 'download_cache', VideoDownloadCache(str(tmp_path / 'cache'), 64 * 1024 * 1024))
+    yield main.processor
+    downloader.close()
+
+def url(server, path: str = '/clip.mp4') -> str:
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+@pytest.mark.asyncio
+async def test_second_fetch_is_served_from_the_cache(processor, video_server, tmp_path):
+    first, second = str(tmp_path / 'first.mp4'), str(tmp_path / 'second.mp4')
+
+    await processor._fetch_video(url(video_server), first)
+    downloads = video_server.gets['/clip.mp4']
+    await processor._fetch_video(url(video_server), second)
+
+    assert video_server.gets['/clip.mp4'] == downloads
+    with open(first, 'rb') as f1, open(second, 'rb') as f2:
+        assert f1.read() == f2.read() == VIDEO_BYTES
+
+@pytest.mark.asyncio
+async def test_concurrent_fetches_share_one_download(processor, video_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(VideoFileHandler, 'delay', 0.3)
+    paths = [str(tmp_path / f'copy{i}.mp4') for i in range(3)]
+
+    await processor._fetch_video(url(video_server, '/clip.mp4?warmup'), str(tmp_path / 'warmup.mp4'))
+    downloads_per_fetch = video_server.gets['/clip.mp4?warmup']
+    await asyncio.gather(*[processor._fetch_video(url(video_server), path) for path in paths])
+
+    assert video_server.gets['/clip.mp4'] == downloads_per_fetch
+    for path in paths:
+        with open(path, 'rb') as f:
+            assert f.read() == VIDEO_BYTES
+
+@pytest.mark.asyncio
+async def test_failed_shared_download_maps_to_the_same_error_for_every_caller(processor, video_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(VideoFileHandler, 'delay', 0.3)
+
+    results = await asyncio.gather(
+        *[processor._fetch_video(url(video_server, '/missing.mp4'), str(tmp_path / f'missing{i}.mp4')) for i in range(3)],
+        return_exceptions=True
+    )
+
+    assert all(isinstance(result, HTTPException) for result in results)
+    assert {(result.status_code, result.detail['code']) for result in results} == {(400, 'UNSUPPORTED_URL')}
+    assert len({id(result) for result in results}) == len(results)
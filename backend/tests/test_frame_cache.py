@@ -0,0 +1,66 @@
+"""
+Encoded frame cache keys
+Frames that share a video, timestamp and shape but differ in pixels must not
+be served each other's bytes
+"""
+
+import numpy as np
+
+from config.settings import settings
+from ad_processing import frame_cache
+from ad_processing.frame_cache import DiskLRUCache, EncodedFrameCache, get_frame_cache, image_digest
+from ad_processing.frame_extractor import FrameData
+
+def test_same_timestamp_and_shape_with_different_pixels_do_not_collide(tmp_path, monkeypatch):
+    monkeypatch.setattr(type(settings), 'FRAME_CACHE_ENABLED', property(lambda self: True))
+    monkeypatch.setattr(type(settings), 'FRAME_CACHE_DIR', property(lambda self: str(tmp_path / 'frames')))
+    monkeypatch.setattr(frame_cache, '_frame_cache', None)
+    assert get_frame_cache() is not None
+    reused = np.full((288, 512, 3), 40, dtype=np.uint8)     # e.g. a detection sample served for a scene start
+    redecoded = np.full((288, 512, 3), 200, dtype=np.uint8)  # the same timestamp decoded again
+
+    first = FrameData(image=reused, timestamp=3.0, frame_type='jump_cut', source_hash='collision-video')
+    second = FrameData(image=redecoded, timestamp=3.0, frame_type='jump_cut', source_hash='collision-video')
+
+    first_url = first.to_base64()
+    second_url = second.to_base64()
+
+    assert first_url != second_url
+    assert second_url == FrameData(image=redecoded, timestamp=3.0, frame_type='jump_cut').to_base64()
+
+def test_keys_depend_on_pixels_video_and_encode_parameters():
+    image = np.zeros((4, 4, 3), dtype=np.uint8)
+    changed = image.copy()
+    changed[0, 0, 0] = 1
+
+    key = EncodedFrameCache.make_key('video', image_digest(image), 512, 60, 'api:jpeg:lanczos')
+
+    assert key == EncodedFrameCache.make_key('video', image_digest(image.copy()), 512, 60, 'api:jpeg:lanczos')
+    assert key != EncodedFrameCache.make_key('video', image_digest(changed), 512, 60, 'api:jpeg:lanczos')
+    assert key != EncodedFrameCache.make_key('other', image_digest(image), 512, 60, 'api:jpeg:lanczos')
+    assert key != EncodedFrameCache.make_key('video', image_digest(image), 256, 60, 'api:jpeg:lanczos')
+    assert key != EncodedFrameCache.make_key('video', image_digest(image), 512, 85, 'api:jpeg:lanczos')
+    assert key != EncodedFrameCache.make_key('video', image_digest(image.reshape(2, 8, 3)), 512, 60, 'api:jpeg:lanczos')
+
+def test_image_digest_ignores_memory_layout():
+    image = np.arange(6 * 8 * 3, dtype=np.uint8).reshape(6, 8, 3)
+    strided = np.ascontiguousarray(image[:, ::-1])[:, ::-1]
+
+    assert not strided.flags['C_CONTIGUOUS']
+    assert image_digest(strided) == image_digest(image)
+
+def test_put_file_links_then_replaces_without_leftover_temp_files(tmp_path):
+    cache = DiskLRUCache(str(tmp_path / 'cache'), 1024 * 1024)
+    first, second = tmp_path / 'first.bin', tmp_path / 'second.bin'
+    first.write_bytes(b'first download')
+    second.write_bytes(b'second download')
+    key = 'ab' * 32
+
+    linked = cache.put_file(key, str(first))
+    assert linked.stat().st_ino == first.stat().st_ino
+
+    replaced = cache.put_file(key, str(second))
+    assert replaced == linked
+    assert replaced.read_bytes() == b'second download'
+    assert first.read_bytes() == b'first download'
+    assert list((tmp_path / 'cache').glob('*/*.tmp')) == []
@@ -0,0 +1,109 @@
+"""
+Byte-for-byte stability of frame encoding
+The in-memory encoder must produce exactly what the single-pass reference
+encode (resize the BGR array once, one JPEG pass) produces
+"""
+
+import io
+import base64
+
+import cv2
+import numpy as np
+import pytest
+
+from config.settings import settings
+from ad_processing.frame_encoder import get_frame_encoder, _RESAMPLE_FILTERS
+from ad_processing.frame_extractor import FrameData, FrameArena
+
+def synthetic_frame(seed: int, width: int = 1280, height: int = 720) -> np.ndarray:
+    """Gradient with blocks of noise, so resizing and entropy coding both matter"""
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    image = np.stack([np.broadcast_to(x, (height, width)), np.broadcast_to(y, (height, width)), (x + y) / 2], axis=-1)
+    image[height // 4:height // 2, width // 4:width // 2] = rng.integers(0, 256, (height // 4, width // 4, 3))
+    return image.astype(np.uint8)
+
+def reference_jpeg(image: np.ndarray, max_size: int, quality: int, resample: str) -> bytes:
+    """Single-pass encode: one resize of the BGR array, one optimized JPEG pass"""
+    height, width = image.shape[:2]
+    if max(width, height) > max_size:
+        scale = max_size / max(width, height)
+        image = cv2.resize(image, (max(1, int(width * scale)), max(1, int(height * scale))), interpolation=_RESAMPLE_FILTERS[resample])
+    success, encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality, cv2.IMWRITE_JPEG_OPTIMIZE, 1])
+    assert success
+    return encoded.tobytes()
+
+@pytest.mark.parametrize('profile_name', ['api', 'api_low', 'detect'])
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_to_base64_matches_reference_encode(profile_name, seed):
+    image = synthetic_frame(seed)
+    profile = get_frame_encoder().profile(profile_name)
+    expected = reference_jpeg(image, profile.max_size, profile.quality, profile.resample)
+
+    data_url = FrameData(image=image, timestamp=1.0, frame_type='jump_cut').to_base64(profile=profile_name)
+
+    prefix, payload = data_url.split(',', 1)
+    assert prefix == 'data:image/jpeg;base64'
+    assert base64.b64decode(payload) == expected
+
+def test_overrides_match_reference_encode():
+    image = synthetic_frame(3)
+    profile = get_frame_encoder().profile('api')
+    expected = reference_jpeg(image, 256, 40, profile.resample)
+
+    image_data, mime_type = FrameData(image=image, timestamp=0.0, frame_type='interval').encode('api', max_size=256, quality=40)
+
+    assert mime_type == 'image/jpeg'
+    assert image_data == expected
+
+def test_encoding_is_stable_across_calls_and_cache_hits():
+    image = synthetic_frame(4)
+    frame = FrameData(image=image, timestamp=2.5, frame_type='jump_cut', source_hash='stable-video')
+
+    first = frame.to_base64()   # encoded and stored in the frame cache
+    second = frame.to_base64()  # served from the frame cache
+    uncached = FrameData(image=image.copy(), timestamp=2.5, frame_type='jump_cut').to_base64()
+
+    assert first == second == uncached
+
+def test_arena_views_encode_like_owned_arrays():
+    images = [synthetic_frame(seed) for seed in range(3)]
+    owned = [FrameData(image=image.copy(), timestamp=float(i), frame_type='interval') for i, image in enumerate(images)]
+    stream = io.BytesIO(b''.join(image.tobytes() for image in images))
+
+    arena = FrameArena(4, images[0].shape)
+    decoded = [FrameData(image=arena.read_frame(stream), timestamp=float(i), frame_type='interval') for i in range(3)]
+
+    assert arena.read_frame(stream) is None
+    assert arena.used == 3
+    for owned_frame, decoded_frame in zip(owned, decoded):
+        assert decoded_frame.image.base is arena.buffer
+        assert decoded_frame.to_base64() == owned_frame.to_base64()
+
+def test_arena_adopts_samples_and_overflows_to_owned_arrays():
+    images = [synthetic_frame(seed, 64, 48) for seed in range(3)]
+    arena = FrameArena(2, images[0].shape)
+
+    adopted = [arena.adopt(image) for image in images]
+
+    assert adopted[0].base is arena.buffer and adopted[1].base is arena.buffer
+    assert adopted[2].base is not arena.buffer
+    for image, slot in zip(images, adopted):
+        assert np.array_equal(image, slot)
+    cropped = images[0][:10]
+    assert arena.adopt(cropped) is cropped
+    assert arena.used == 2
+
+def test_api_profile_follows_frame_image_settings():
+    profile = get_frame_encoder().profile('api')
+
+    assert profile.max_size == settings.FRAME_IMAGE_MAX_SIZE
+    assert profile.quality == settings.FRAME_IMAGE_QUALITY
+
+def test_to_bytes_uses_the_encoder():
+    image = synthetic_frame(5)
+    frame = FrameData(image=image, timestamp=0.0, frame_type='interval')
+    profile = get_frame_encoder().profile('api')
+
+    assert frame.to_bytes() == reference_jpeg(image, profile.max_size, profile.quality, profile.resample)
@@ -0,0 +1,126 @@
+"""
+Batched multi-pass analysis
+Every batch is a structured-output request built like the single call; every
+batch after the first, including the final one, is sent the previous context
+and the entity registry built by the earlier batches
+"""
+
+import json
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from ad_processing.ad_analyzer import AdAnalyzer
+from ad_processing.audio_analyzer import AudioExtraction
+from ad_processing.frame_extractor import FrameData
+
+URL = 'https://example.com/ad'
+
+class RecordingCompletions:
+    """Stands in for chat.completions, answering each batch with one chunk and one entity"""
+
+    def __init__(self):
+        self.requests = []
+        self.release = None
+
+    async def create(self, **request):
+        self.requests.append(request)
+        batch = len(self.requests)
+        if self.release and batch > 1:
+            await self.release.wait()
+        answer = {
+            'id': f'ad_batch_{batch}', 'url': '', 'summary': f'summary {batch}', 'visualStyle': 'test', 'audioStyle': 'test', 'duration': 6.0,
+            'entities': {'people': [{'id': f'person_{batch}', 'name': f'Person {batch}'}]},
+            'chunks': [{'id': 'chunk_001', 'startTime': float(batch), 'endTime': float(batch) + 0.5, 'visual': {}, 'audio': {}}],
+            'context': f'context after batch {batch}'
+        }
+        message = SimpleNamespace(content=json.dumps(answer))
+        usage = SimpleNamespace(prompt_tokens=100 * batch, completion_tokens=10)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+def batch_text(request) -> list:
+    """The batch-specific text parts of a request (batch line, context, registry)"""
+    user = request['messages'][1]['content']
+    return [part['text'] for part in user if part['type'] == 'text' and part['text'].startswith('- ') and not part['text'].startswith('- Content description')]
+
+def registry_text(entities: dict) -> str:
+    return f"- Previously identified entities (reference these by ID, don't redefine):\n{json.dumps(entities, indent=2)}\n"
+
+@pytest.fixture
+def analyzer():
+    analyzer = AdAnalyzer()
+    analyzer.openai_client = SimpleNamespace(chat=SimpleNamespace(completions=RecordingCompletions()))
+    return analyzer
+
+@pytest.fixture
+def audio():
+    return AudioExtraction(duration=6.0, transcript_segments=[], full_transcript='')
+
+def make_frames(count: int):
+    image = np.full((72, 128, 3), 127, dtype=np.uint8)
+    return [FrameData(image=image, timestamp=float(i), frame_type='jump_cut', duration=1.0, scene_id=i + 1) for i in range(count)]
+
+@pytest.mark.asyncio
+async def test_batch_prompts_sequential(analyzer, audio):
+    analysis = await analyzer._analyze_multi_pass(make_frames(6), audio, URL, max_frames_per_batch=2, parallel=False)
+
+    requests = analyzer.openai_client.chat.completions.requests
+    person = lambda batch: {'id': f'person_{batch}', 'name': f'Person {batch}'}
+    assert [batch_text(request) for request in requests] == [
+        ['- Batch 1 of 3 (0.00s - 1.00s)\n'],
+        ['- Batch 2 of 3 (2.00s - 3.00s)\n', '- Previous video context: context after batch 1\n', registry_text({'people': [person(1)]})],
+        ['- Batch 3 of 3 (4.00s - 5.00s)\n', '- Previous video context: context after batch 2\n', registry_text({'people': [person(1), person(2)]})]
+    ]
+    assert {entity['id'] for entity in analysis['entities']['people']} == {'person_1', 'person_2', 'person_3'}
+
+@pytest.mark.asyncio
+async def test_batch_prompts_parallel(analyzer, audio):
+    analysis = await analyzer._analyze_multi_pass(make_frames(6), audio, URL, max_frames_per_batch=2, parallel=True)
+
+    requests = analyzer.openai_client.chat.completions.requests
+    registry = registry_text({'people': [{'id': 'person_1', 'name': 'Person 1'}]})
+    assert batch_text(requests[0]) == ['- Batch 1 of 3 (0.00s - 1.00s)\n']
+    assert sorted(batch_text(request) for request in requests[1:]) == [
+        ['- Batch 2 of 3 (2.00s - 3.00s)\n', '- Previous video context: context after batch 1\n', registry],
+        ['- Batch 3 of 3 (4.00s - 5.00s)\n', '- Previous video context: context after batch 1\n', registry]
+    ]
+    assert [chunk['id'] for chunk in analysis['chunks']] == ['chunk_001', 'chunk_002', 'chunk_003']
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('parallel', [False, True])
+async def test_batches_use_structured_output_and_report_token_usage(analyzer, audio, parallel):
+    analysis = await analyzer._analyze_multi_pass(make_frames(6), audio, URL, max_frames_per_batch=2, parallel=parallel)
+
+    requests = analyzer.openai_client.chat.completions.requests
+    for request in requests:
+        assert request['response_format']['type'] == 'json_schema'
+        assert 'context' in request['response_format']['json_schema']['schema']['required']
+        assert request['messages'][0] == {'role': 'system', 'content': analyzer.config['video_analysis']['system_prompt']}
+        assert {part['image_url']['detail'] for part in request['messages'][1]['content'] if part['type'] == 'image_url'} <= {'low', 'high'}
+    assert analysis['token_usage']['requests'] == 3
+    assert analysis['token_usage']['actual_prompt_tokens'] == 600
+    assert analysis['token_usage']['actual_completion_tokens'] == 30
+
+@pytest.mark.asyncio
+async def test_analyze_advertisement_batches_with_max_frames_per_batch(analyzer, audio):
+    analysis = await analyzer.analyze_advertisement(make_frames(6), audio, URL, max_frames_per_batch=2)
+
+    assert len(analyzer.openai_client.chat.completions.requests) == 3
+    assert len(analysis['chunks']) == 3
+
+@pytest.mark.asyncio
+async def test_stream_yields_each_batch_as_it_finishes(analyzer, audio):
+    completions = analyzer.openai_client.chat.completions
+    completions.release = asyncio.Event()
+    stream = analyzer.analyze_advertisement_stream(make_frames(6), audio, URL, max_frames_per_batch=2)
+
+    # The first batch's chunk arrives while the later batches are still waiting
+    first = await asyncio.wait_for(stream.__anext__(), timeout=5)
+    assert first['type'] == 'chunk' and first['chunk']['startTime'] == 1.0
+    completions.release.set()
+    events = [first] + [event async for event in stream]
+
+    assert [event['type'] for event in events] == ['chunk', 'chunk', 'chunk', 'result']
+    assert len(events[-1]['analysis']['chunks']) == 3
@@ -0,0 +1,105 @@
+"""
+Client-side rate limiting of the shared OpenAI clients
+Runs the real SDK against an httpx mock transport: 429s pause the endpoint
+for retry-after, and requests wait for their estimated token cost
+"""
+
+import sys
+import time
+
+import httpx
+import openai
+import pytest
+
+from ad_processing.openai_clients import RateLimiter, _build_async_http_client, estimate_request_tokens
+
+ENDPOINT = '/v1/chat/completions'
+
+# Responses and the mock transport must come from the httpx package the installed SDK is built on
+sdk_httpx = sys.modules[openai.DefaultAsyncHttpxClient.__bases__[0].__module__.partition('.')[0]]
+
+def completion(total_tokens: int, headers: dict = None) -> httpx.Response:
+    body = {
+        'id': 'chatcmpl-test',
+        'object': 'chat.completion',
+        'created': 0,
+        'model': 'gpt-4o',
+        'choices': [{'index': 0, 'finish_reason': 'stop', 'message': {'role': 'assistant', 'content': '{}'}}],
+        'usage': {'prompt_tokens': total_tokens - 1, 'completion_tokens': 1, 'total_tokens': total_tokens}
+    }
+    return sdk_httpx.Response(200, json=body, headers=headers or {})
+
+def make_client(limiter: RateLimiter, handler, max_retries: int = 2) -> openai.AsyncOpenAI:
+    return openai.AsyncOpenAI(
+        api_key='test-key',
+        base_url='http://openai.test/v1',
+        max_retries=max_retries,
+        http_client=_build_async_http_client(limiter, transport=sdk_httpx.MockTransport(handler))
+    )
+
+async def ask(client: openai.AsyncOpenAI, max_tokens: int = 100):
+    return await client.chat.completions.create(model='gpt-4o', messages=[{'role': 'user', 'content': 'x' * 400}], max_tokens=max_tokens)
+
+def test_estimate_counts_prompt_and_completion_allowance():
+    body = {'model': 'gpt-4o', 'max_tokens': 100, 'messages': [{'role': 'user', 'content': [
+        {'type': 'text', 'text': 'x' * 400},
+        {'type': 'image_url', 'image_url': {'url': 'https://example.com/frame.jpg', 'detail': 'low'}}
+    ]}]}
+    request = httpx.Request('POST', 'http://openai.test' + ENDPOINT, json=body)
+
+    assert estimate_request_tokens(request) == 100 + 85 + 100
+
+@pytest.mark.asyncio
+async def test_429_pauses_the_endpoint_for_retry_after():
+    attempts = []
+
+    def handler(request):
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            return sdk_httpx.Response(429, json={'error': {'message': 'Rate limit reached'}}, headers={'retry-after-ms': '400'})
+        return completion(50)
+
+    limiter = RateLimiter()
+    response = await ask(make_client(limiter, handler))
+
+    assert response.usage.total_tokens == 50
+    assert len(attempts) == 2
+    assert attempts[1] - attempts[0] >= 0.4
+
+@pytest.mark.asyncio
+async def test_requests_wait_for_their_token_cost_and_settle_from_usage():
+    # Each request is estimated at 100 prompt + 100 completion tokens and reports 120 used
+    headers = {
+        'x-ratelimit-limit-tokens': '1000',
+        'x-ratelimit-remaining-tokens': '250',
+        'x-ratelimit-reset-tokens': '7500ms'  # refills 750 tokens in 7.5s = 100 tokens/s
+    }
+    limiter = RateLimiter()
+    client = make_client(limiter, lambda request: completion(120, headers), max_retries=0)
+
+    await ask(client)        # learns the bucket: 250 tokens left
+    start = time.monotonic()
+    await ask(client)        # 200 fit, leaving 50; settling refunds the unused 80
+    unthrottled = time.monotonic() - start
+    start = time.monotonic()
+    await ask(client)        # 130 left, so waits for 70 more at 100/s (1.5s without the refund)
+    throttled = time.monotonic() - start
+
+    assert unthrottled < 0.3
+    assert 0.5 <= throttled < 1.2
+
+def test_settle_refunds_unused_reservation():
+    limiter = RateLimiter()
+    limiter.update(ENDPOINT, {'x-ratelimit-limit-tokens': '1000', 'x-ratelimit-remaining-tokens': '1000', 'x-ratelimit-reset-tokens': '60s'}, 200)
+
+    assert limiter.reserve(ENDPOINT, 800) == 0
+    limiter.settle(ENDPOINT, 800, 100)
+
+    assert limiter.reserve(ENDPOINT, 800) == 0
+    assert limiter.reserve(ENDPOINT, 800) > 0
+
+def test_disabled_limiter_never_waits():
+    limiter = RateLimiter(enabled=False)
+    limiter.update(ENDPOINT, {'x-ratelimit-limit-tokens': '10', 'x-ratelimit-remaining-tokens': '0'}, 429)
+
+    assert limiter.reserve(ENDPOINT, 10_000) == 0
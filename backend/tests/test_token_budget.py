@@ -0,0 +1,41 @@
+"""
+Frame detail planning against the image token budget
+Jump cut frames carry the similarity of their cut, and the least distinct
+ones are downgraded first
+"""
+
+import numpy as np
+
+from ad_processing.frame_encoder import get_frame_encoder
+from ad_processing.frame_extractor import FrameData, ViralFrameExtractor
+from ad_processing.token_budget import plan_frame_details
+
+def scene_frames():
+    """Two frames per scene for three jump cuts of decreasing distinctness"""
+    extractor = ViralFrameExtractor()
+    cuts = [(0.0, {'combined_similarity': 0.0}), (2.0, {'combined_similarity': 0.2}), (4.0, {'combined_similarity': 0.6})]
+    scenes = extractor.define_scenes_from_timestamps(cuts, 6.0)
+
+    frames = []
+    for scene_id, scene in enumerate(scenes, start=1):
+        decoded = [FrameData(image=np.zeros((288, 512, 3), dtype=np.uint8), timestamp=t, frame_type='interval') for t in (scene['start'], scene['start'] + 1.0)]
+        frames.extend(extractor._label_scene_frames(decoded, scene_id, scene.get('similarity')))
+    return frames
+
+def test_jump_cut_frames_carry_their_cut_similarity():
+    frames = scene_frames()
+
+    assert [f.similarity_score for f in frames if f.frame_type == 'jump_cut'] == [0.0, 0.2, 0.6]
+    assert all(f.similarity_score is None for f in frames if f.frame_type == 'scene_interval')
+
+def test_most_similar_jump_cuts_are_downgraded_first():
+    frames = scene_frames()
+    details = {'jump_cut': 'high', 'scene_interval': 'low'}
+    profiles = {'high': 'api', 'low': 'api_low'}
+
+    unlimited, total = plan_frame_details(frames, 0, details, profiles, get_frame_encoder().profiles)
+    one_downgrade = unlimited[0].estimated_tokens - unlimited[1].estimated_tokens  # high minus low
+    plans, _ = plan_frame_details(frames, total - one_downgrade, details, profiles, get_frame_encoder().profiles)
+
+    jump_cut_details = [plan.detail for frame, plan in zip(frames, plans) if frame.frame_type == 'jump_cut']
+    assert jump_cut_details == ['high', 'high', 'low']
@@ -0,0 +1,100 @@
+"""
+Analysis step of the API's video pipeline with the default config
+Every video is analyzed with one structured-output chat completion, streamed or not,
+and the video file is hashed at most once per request
+"""
+
+import json
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from config.settings import settings
+from ad_processing import frame_cache as frame_cache_module
+from ad_processing.audio_analyzer import AudioExtraction
+from ad_processing.frame_extractor import FrameData
+
+ANALYSIS = {
+    'id': 'ad_test', 'url': '', 'summary': 'test', 'visualStyle': 'test', 'audioStyle': 'test', 'duration': 30.0,
+    'entities': {},
+    'chunks': [{'id': f'chunk_{i:03d}', 'startTime': float(i), 'endTime': float(i) + 1.0, 'visual': {}, 'audio': {}} for i in range(1, 4)]
+}
+
+class StubCompletions:
+    """Records every chat completion request and answers with ANALYSIS"""
+
+    def __init__(self):
+        self.requests = []
+
+    async def create(self, **request):
+        self.requests.append(request)
+        usage = SimpleNamespace(prompt_tokens=1000, completion_tokens=100)
+        if request.get('stream'):
+            return self._stream(usage)
+        message = SimpleNamespace(content=json.dumps(ANALYSIS))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+    async def _stream(self, usage):
+        text = json.dumps(ANALYSIS)
+        for start in range(0, len(text), 40):
+            delta = SimpleNamespace(content=text[start:start + 40])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+        yield SimpleNamespace(choices=[], usage=usage)
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+    import main
+
+    processor = main.processor
+    frames = [
+        FrameData(image=np.full((288, 512, 3), i * 8, dtype=np.uint8), timestamp=float(i), frame_type='jump_cut', duration=1.0, scene_id=i + 1)
+        for i in range(30)
+    ]
+
+    async def fetch_video(video_url, temp_video_path):
+        with open(temp_video_path, 'wb') as f:
+            f.write(b'\0' * 1024)
+        return None
+
+    monkeypatch.setattr(processor, '_fetch_video', fetch_video)
+    monkeypatch.setattr(processor.frame_extractor, 'probe_video', lambda path: None)
+    processor.extracted_frames = frames
+    monkeypatch.setattr(processor.frame_extractor, 'extract_frames', lambda path, info, **kwargs: frames)
+    monkeypatch.setattr(processor.audio_extractor, 'extract_audio', lambda path, info: AudioExtraction(duration=30.0, transcript_segments=[], full_transcript=''))
+    monkeypatch.setattr(processor.analyzer, 'openai_client', SimpleNamespace(chat=SimpleNamespace(completions=StubCompletions())))
+    monkeypatch.setattr(processor, 'outputs_dir', tmp_path)
+    return processor
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('stream_chunks', [False, True])
+async def test_default_config_makes_one_structured_output_request(processor, stream_chunks):
+    events = [event async for event in processor.process_video_events('https://example.com/ad.mp4', stream_chunks=stream_chunks, use_cache=False)]
+
+    requests = processor.analyzer.openai_client.chat.completions.requests
+    assert len(requests) == 1
+    assert requests[0]['response_format']['type'] == 'json_schema'
+    assert bool(requests[0].get('stream')) == stream_chunks
+
+    result = events[-1]
+    assert result['type'] == 'result'
+    assert len(result['analysis']['chunks']) == 3
+    assert result['analysis']['processing_info']['token_usage']['actual_prompt_tokens'] == 1000
+    if stream_chunks:
+        assert [event['chunk']['id'] for event in events if event['type'] == 'chunk'] == ['chunk_001', 'chunk_002', 'chunk_003']
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('frame_cache', [False, True])
+async def test_video_is_hashed_at_most_once_and_frames_carry_the_hash(processor, tmp_path, monkeypatch, frame_cache):
+    import main
+
+    hashed = []
+    monkeypatch.setattr(type(settings), 'FRAME_CACHE_ENABLED', property(lambda self: frame_cache))
+    monkeypatch.setattr(type(settings), 'FRAME_CACHE_DIR', property(lambda self: str(tmp_path / 'frames')))
+    monkeypatch.setattr(frame_cache_module, '_frame_cache', None)
+    monkeypatch.setattr(main, 'file_content_hash', lambda path: hashed.append(path) or 'video-hash')
+
+    [event async for event in processor.process_video_events('https://example.com/ad.mp4', use_cache=False)]
+
+    assert len(hashed) == int(frame_cache)
+    assert {frame.source_hash for frame in processor.extracted_frames} == {'video-hash' if frame_cache else None}